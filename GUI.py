@@ -2,10 +2,12 @@ import tkinter as tk
 from tkinter.ttk import Frame, Label, Button, Style, Combobox
 from tkinter import StringVar, Entry, Listbox, Scrollbar
 from typing import Protocol
+from collections.abc import Callable
 from hashlib import sha256
 from dataStructures import Employee, Equipment, Skill, Log
 from customWidgets import ListFrame
 from Pipeline import AllFilters, Pipeline
+from log_aggregates import LogAggregates
 
 
 class Manager(Protocol):  # for accessing Manager class without circular importing error
@@ -27,6 +29,42 @@ class Manager(Protocol):  # for accessing Manager class without circular importi
     
     def getEquipmentByID(self, equip_id: str) -> Equipment|None:
         ...
+
+    def addEmployee(self, emp: Employee) -> None:
+        ...
+
+    def addEquipment(self, equip: Equipment) -> None:
+        ...
+
+    def addSkill(self, skill: Skill) -> None:
+        ...
+
+    def changeEmployeeID(self, emp: Employee, new_id: str) -> None:
+        ...
+
+    def changeEquipmentID(self, equip: Equipment, new_id: str) -> None:
+        ...
+
+    def changeSkillID(self, skill: Skill, new_id: str) -> None:
+        ...
+
+    def getEmployeesWithSkill(self, skill_id: str) -> list[Employee]:
+        ...
+
+    def getEquipmentRequiringSkill(self, skill_id: str) -> list[Equipment]:
+        ...
+
+    def addEmployeeSkill(self, emp: Employee, skill_id: str) -> None:
+        ...
+
+    def removeEmployeeSkill(self, emp: Employee, skill_id: str) -> None:
+        ...
+
+    def addEquipmentSkill(self, equip: Equipment, skill_id: str) -> None:
+        ...
+
+    def removeEquipmentSkill(self, equip: Equipment, skill_id: str) -> None:
+        ...
     
     def checkIn(self, equip: Equipment, emp:Employee|None=None, notes: list[str]=[]):
         ...
@@ -36,12 +74,49 @@ class Manager(Protocol):  # for accessing Manager class without circular importi
 
     def logLost(self, equip: Equipment, emp:Employee|None):
         ...
+
+    def reserve(self, equip: Equipment, emp: Employee|None=None, priority: int=0):
+        ...
+
+    def cancelReservation(self, equip: Equipment, emp: Employee|None=None):
+        ...
+
+    def getReservedEquipment(self, emp: Employee|None=None) -> list[Equipment]:
+        ...
+
+    def getAvailableEquipment(self) -> list[Equipment]:
+        ...
+
+    def getEligibleEquipment(self, emp: Employee, equipment: list[Equipment]|None=None) -> list[Equipment]:
+        ...
+
+    def getQualifiedEmployees(self, equip: Equipment) -> list[Employee]:
+        ...
+
+    def getLostEquipment(self) -> list[Equipment]:
+        ...
+
+    def isEquipmentLost(self, equip: Equipment) -> bool:
+        ...
     
-    def save_data_to_csv(self):
+    def save_data(self, cache: bool=False):
+        ...
+
+    def finishSaves(self) -> list[str]:
+        ...
+
+    def isSaving(self) -> bool:
+        ...
+
+    def hasUnsavedChanges(self) -> bool:
         ...
 
     def getLogs(self) -> list[Log]:
         ...
+
+    def getLogAggregates(self) -> LogAggregates|None:
+        ...
+
     
     def getNumEquipment(self) -> int:
         ...
@@ -72,6 +147,7 @@ def new_button(root: Frame, text: str, command: callable, style: str = "a20.TBut
 
 class GUI(tk.Tk):
     WIDTH, HEIGHT = 1000, 800
+    SAVE_POLL_MS = 200
 
     def __init__(self, manager: Manager, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -91,12 +167,29 @@ class GUI(tk.Tk):
         s.configure('a20.TButton', font=('Arial', 20))
 
         self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(self.SAVE_POLL_MS, self.poll_saves)
 
         self.login_frame()  # open login screen
 
     def on_close(self):
-        self.manager.save_data_to_csv()
-        self.destroy()
+        self.manager.save_data(cache=True)  # runs in the background
+        self.close_when_saved()
+
+    def poll_saves(self, repeat: bool=True) -> None:  # shows errors from background saves, runs every SAVE_POLL_MS
+        for error in self.manager.finishSaves():
+            self.popup(error)
+        if repeat:
+            self.after(self.SAVE_POLL_MS, self.poll_saves)
+
+    def close_when_saved(self, errors: list[str]|None=None) -> None:  # keeps the window responsive until the save is done
+        errors = (errors or []) + self.manager.finishSaves()
+        if self.manager.isSaving():
+            self.after(50, lambda: self.close_when_saved(errors))
+        elif not self.manager.hasUnsavedChanges():
+            self.destroy()
+        else:  # the save failed, retrying may not help (ex: read-only folder, full disk) so the user can quit without it
+            self.popup(text="\n".join(errors or ["Saving failed"]) + "\nQuit anyway? Changes since the last save will be lost.",
+                       buttons=[("Quit Anyway", self.destroy), ("Stay Open", None)])
 
     def clear_current_frame(self) -> None:
         if self.current_frame is not None:
@@ -155,6 +248,7 @@ class GUI(tk.Tk):
         btn_dicts = [
             {"text": "Check In Equipment",  "command": lambda : self.checkIn()},
             {"text": "Check Out Equipment", "command": lambda : self.checkOut()},
+            {"text": "Reserve Equipment",   "command": lambda : self.reserve()},
             {"text": "Reports",             "command": lambda : self.Reports()},
             {"text": "View User Details",   "command": lambda : self.UserDetails()},
             {"text": "Report Lost Equipment", "command": lambda: self.lostEquipment_selection()}
@@ -193,12 +287,11 @@ class GUI(tk.Tk):
         # but thought about situations where it was lost but never checked out, but still be marked as lost
         if equip.borrower_id is not None and (emp:=self.manager.getEmployeeByID(equip.borrower_id)) is not None:
             emp.numLostEquips += 1
-        equip.isLost = True
-        self.manager.logLost(equip=equip, emp=emp)
+        self.manager.logLost(equip=equip, emp=emp)  # marks the equipment as lost
 
     def lostEquipment_selection(self, items: list[Equipment]=None, selection_index: int|None=None):
         if items is None:
-            items = [self.manager.getEquipmentByID(x) for x in self.manager.current_user.borrowedEquipIds]
+            items = [equip for x in self.manager.current_user.borrowedEquipIds if (equip:=self.manager.getEquipmentByID(x)) is not None and not self.manager.isEquipmentLost(equip)]
         do_success_popup = False
         self.clear_current_frame()
         do_grid(root=self.current_frame, cols=(cols:=2), rows=(rows:=4))
@@ -220,7 +313,8 @@ class GUI(tk.Tk):
         self.manager.current_user = None
         self.login_frame()
 
-    def popup(self, text: str, isError: bool=True) -> None:
+    def popup(self, text: str, isError: bool=True, buttons: list[tuple[str, Callable|None]]|None=None) -> None:
+        # buttons: (text, command) shown instead of Close, each one closes the popup first (command None = only close)
         if self.current_frame is None:
             return
         s = Style()
@@ -234,7 +328,14 @@ class GUI(tk.Tk):
         do_grid(root=subFrame, cols=3, rows=3)
 
         new_label(root=subFrame, text=text).grid(row=0, column=0, columnspan=3, sticky="news")
-        new_button(root=subFrame, text="Close", command=lambda: subFrame.destroy()).grid(row=2, column=0, columnspan=3)
+        if buttons is None:
+            new_button(root=subFrame, text="Close", command=lambda: subFrame.destroy()).grid(row=2, column=0, columnspan=3)
+        def press(command: Callable|None) -> None:
+            subFrame.destroy()
+            if command is not None:
+                command()
+        for i, (buttonText, command) in enumerate(buttons or []):  # up to 2, left and right
+            new_button(root=subFrame, text=buttonText, command=lambda command=command: press(command)).grid(row=2, column=2 * i)
 
     def checkIn(self) -> None:
         self.clear_current_frame()
@@ -244,7 +345,7 @@ class GUI(tk.Tk):
 
         new_label(root=self.current_frame, text="Select Equipment").grid(row=rows//2, column=0, columnspan=2)
         equips = [equip for equipID in self.manager.current_user.borrowedEquipIds if (equip:=self.manager.getEquipmentByID(equip_id=equipID)) is not None]
-        values=[equip.name for equipID in self.manager.current_user.borrowedEquipIds if (equip:=self.manager.getEquipmentByID(equip_id=equipID)) is not None]
+        values=[equip.name for equip in equips]
         combo = Combobox(master=self.current_frame, state="readonly", values=values, font=("Arial", 20), justify="center")
         combo.grid(row=rows//2, column=2, columnspan=cols-1, sticky="nesw")
 
@@ -260,7 +361,7 @@ class GUI(tk.Tk):
         new_label(root=self.current_frame, text="Check-Out").grid(row=0, column=0, columnspan=cols, sticky="nesw")
 
         new_label(root=self.current_frame, text="Select Equipment").grid(row=rows//2, column=0, columnspan=2)
-        equips = [equip for equip in self.manager.equipment if equip.borrower_id in [None, '']]
+        equips = self.manager.getEligibleEquipment(self.manager.current_user, self.manager.getAvailableEquipment())  # only what they have the skills for
         values=[equip.name for equip in equips]
         combo = Combobox(master=self.current_frame, state="readonly", values=values, font=("Arial", 20), justify="center")
         combo.grid(row=rows//2, column=2, columnspan=cols-1, sticky="nesw")
@@ -270,6 +371,29 @@ class GUI(tk.Tk):
         new_button(root=self.current_frame, text="Check-Out", command= lambda: self.manager.checkout(equips[combo.current()])).grid(row=rows-1, column=cols//2, columnspan=cols//2, sticky="nesw")
 
 
+    def reserve(self) -> None:
+        self.clear_current_frame()
+        do_grid(root=self.current_frame, cols=(cols:=6), rows=(rows:=5))
+
+        new_label(root=self.current_frame, text="Reservations").grid(row=0, column=0, columnspan=cols, sticky="nesw")
+
+        user = self.manager.current_user
+        # checked out by someone else, they have the skills for it and aren't already waiting for it
+        equips = [equip for equip in self.manager.getEligibleEquipment(user) if equip.borrower_id not in [None, '', user.emp_id] and user.emp_id not in equip.queue]
+        new_label(root=self.current_frame, text="Reserve").grid(row=1, column=0, columnspan=2)
+        combo = Combobox(master=self.current_frame, state="readonly", values=[equip.name for equip in equips], font=("Arial", 20), justify="center")
+        combo.grid(row=1, column=2, columnspan=cols-3, sticky="nesw")
+        # current() is -1 with nothing selected, which would pick the last item
+        new_button(root=self.current_frame, text="Reserve", command=lambda: self.manager.reserve(equips[combo.current()]) if combo.current() != -1 else self.popup(text="Select equipment first")).grid(row=1, column=cols-1, sticky="nesw")
+
+        reserved = self.manager.getReservedEquipment(user)
+        new_label(root=self.current_frame, text="Your Reservations").grid(row=2, column=0, columnspan=2)
+        reservedCombo = Combobox(master=self.current_frame, state="readonly", values=[f"{equip.name} (#{list(equip.queue).index(user.emp_id) + 1})" for equip in reserved], font=("Arial", 20), justify="center")
+        reservedCombo.grid(row=2, column=2, columnspan=cols-3, sticky="nesw")
+        new_button(root=self.current_frame, text="Cancel", command=lambda: self.manager.cancelReservation(reserved[reservedCombo.current()]) if reservedCombo.current() != -1 else self.popup(text="Select a reservation first")).grid(row=2, column=cols-1, sticky="nesw")
+
+        new_button(root=self.current_frame, text="Back", command=lambda : self.main_menu_frame()).grid(row=rows-1, column=0, columnspan=cols, sticky="nesw")
+
     def Reports(self, UnselectedFilters:list[dict]=AllFilters, SelectedFilters:list[dict]=[]) -> None:
         def addFunc():
             SelectedFilters.append(UnselectedFilters.pop(comboUnselected.current()))
@@ -304,6 +428,7 @@ class GUI(tk.Tk):
             self.Reports(UnselectedFilters=UnselectedFilters, SelectedFilters=SelectedFilters)
             return
         p = Pipeline(filters=[x['func'] for x in SelectedFilters], data=[self.manager.getLogs(), self.manager.getNumEmployees(), self.manager.getNumEquipment(), self.manager.getNumSkills()])
+        p.addLogAggregates(self.manager.getLogAggregates())
         report: dict = p.executeFilters()
         report['data'].pop('logs')
         vals = [f"{report['header']}"]
@@ -454,7 +579,7 @@ class GUI(tk.Tk):
         combo.grid(row=3, column=0, columnspan=cols-1, sticky="news")
 
         def remove():
-            emp.skillIds.pop(combo.current())
+            self.manager.removeEmployeeSkill(emp, emp.skillIds[combo.current()])
             self.editEmployeeSkills(items=items, selected_index=selected_index)
             self.popup(text="Successfully removed skill", isError=False)
 
@@ -477,7 +602,7 @@ class GUI(tk.Tk):
         combo.grid(row=3, column=0, columnspan=cols-1, sticky="news")
 
         def remove():
-            equip.skillRequirementsIDs.pop(combo.current())
+            self.manager.removeEquipmentSkill(equip, equip.skillRequirementsIDs[combo.current()])
             self.editEquipmentRequirements(items=items, selected_index=selected_index)
             self.popup(text="Successfully removed skill", isError=False)
 
@@ -497,7 +622,7 @@ class GUI(tk.Tk):
         combo.grid(row=1, column=0, columnspan=cols, sticky="news")
 
         def addNew():
-            items[selected_index].skillIds.append(skills[combo.current()].skillId)
+            self.manager.addEmployeeSkill(items[selected_index], skills[combo.current()].skillId)
             self.addNewEmpSkillRequirement(items=items, selected_index=selected_index)
             self.popup(text="Successfully added New skill to Employee.", isError=False)
 
@@ -516,7 +641,7 @@ class GUI(tk.Tk):
         combo.grid(row=1, column=0, columnspan=cols, sticky="news")
 
         def addNew():
-            items[selected_index].skillRequirementsIDs.append(skills[combo.current()].skillId)
+            self.manager.addEquipmentSkill(items[selected_index], skills[combo.current()].skillId)
             self.addNewSkillRequirement(items=items, selected_index=selected_index)
             self.popup(text="Successfully added New skill requirement to equipment.", isError=False)
 
@@ -551,22 +676,12 @@ class GUI(tk.Tk):
             skill_id = self.reusableStringVars[1].get()
             
             # check for clashes
-            if skill_id in [skill.skillId for skill in self.manager.skills]:
+            if (other:=self.manager.getSkillByID(skill_id)) is not None and other is not skill:
                 self.popup("Error: Skill ID already exists.")
                 return
 
-            if skill.name != "" and skill.skillId != "": # not a new skill so need to update references
-                # update references
-                for emp in self.manager.employees: # employee references
-                    if emp.hasSkillId(skillID=skill.skillId):
-                        emp.alterSkill(skill.skillId, skill_id)
-                for equip in self.manager.equipment: # equipment references
-                    if equip.hasSkillId(skillID=skill.skillId):
-                        equip.alterSkill(skill.skillId, skill_id)
-                # skills don't need to update logs
-
             skill.name = self.reusableStringVars[0].get()
-            skill.skillId =  skill_id
+            self.manager.changeSkillID(skill, skill_id) # also updates the employees / equipment referencing it
             self.popup("Skill Saved Successfully", isError=False)
 
         new_button(root=self.current_frame, text="Save", command=saveSkill).grid(row=3, column=0, columnspan=cols, sticky="news")
@@ -586,7 +701,7 @@ class GUI(tk.Tk):
         new_button(root=self.current_frame, text="DELETE SKILL", command=lambda: self.manager.removeSkill(skills[combo.current()], skills, items, selection_index, t) if len(skills) > 0 else "").grid(row=3, column=cols//2, columnspan=cols//2, sticky="news")
 
         def newSkill():
-            self.manager.skills.append((newSkill:=Skill(name="", skillId="")))
+            self.manager.addSkill((newSkill:=Skill(name="", skillId="")))
             self.editSkill(newSkill, skills=skills + [newSkill], items=items, selection_index=selection_index, t=t)
         new_button(root=self.current_frame, text="New Skill", command=newSkill).grid(row=8, column=0, columnspan=cols, sticky="news")
         new_button(root=self.current_frame, text="Back", command=lambda: self.ManageItems(t=t, items=items, selection_index=selection_index) if items is not None else self.main_menu_frame()).grid(row=9, column=0, columnspan=cols, sticky="news")
@@ -614,7 +729,7 @@ class GUI(tk.Tk):
             self.popup("Admin Priviliges Needed")
             return
         equip = Equipment(equipId="", name="")
-        self.manager.equipment.append(equip)
+        self.manager.addEquipment(equip)
         self.ManageItems(t=Equipment, items=self.manager.equipment, selection_index=len(self.manager.equipment)-1)
 
     def addNewEmployee(self, items: list[Employee]):
@@ -622,7 +737,7 @@ class GUI(tk.Tk):
             self.popup("Admin Priviliges Needed")
             return
         emp = Employee(emp_id="", name="", password_hash=sha256("".encode('utf-8')).hexdigest(), contactInfo="")
-        self.manager.employees.append(emp)
+        self.manager.addEmployee(emp)
         self.ManageItems(t=Employee, items=self.manager.employees, selection_index=len(self.manager.employees)-1)
     
     def _save_changes(self, savingObj: Employee|Equipment):
@@ -634,33 +749,24 @@ class GUI(tk.Tk):
 
             # check for clashes
             emp_id = vals[1]
-            if emp_id in [x.emp_id for x in self.manager.employees]:
+            if (other:=self.manager.getEmployeeByID(emp_id)) is not None and other is not savingObj:
                 self.popup("Error: Employee ID already exists.")
                 return
-            
-            if savingObj.name != "" and savingObj.emp_id != "": # not new employee so need to update references
-                # equipment ref update
-                for equip in self.manager.equipment:
-                    if savingObj.emp_id == equip.borrower_id: # if ref has old ID change to new ID
-                        equip.borrower_id = emp_id
-                # log ref update
-                for log in self.manager.logs:
-                    if log.empId == savingObj.emp_id:
-                        log.empId = emp_id
-                
 
             savingObj.name = vals[0] # name
-            # TODO: if ID changes need to look through and change references & check for clashes
-            savingObj.emp_id = emp_id # Emp ID 
+            self.manager.changeEmployeeID(savingObj, emp_id) # Emp ID (also updates references)
             savingObj.contactInfo = vals[2] # contact Info
             
             savingObj.isAdmin = True if vals[3]=="True" else False # admin
         elif isinstance(savingObj, Equipment):
             vars = self.reusableStringVars[:2]
             vals = [var.get() for var in vars]
+            # check for clashes
+            if (other:=self.manager.getEquipmentByID(vals[1])) is not None and other is not savingObj:
+                self.popup("Error: Equipment ID already exists.")
+                return
             savingObj.name = vals[0] # name
-            # TODO: if ID changes need to look through and change references & check for clashes
-            savingObj.equipId = vals[1] # equipment Id  
+            self.manager.changeEquipmentID(savingObj, vals[1]) # equipment Id (also updates references)
         else:
             self.popup("Error: Object typing isn't as expected") # This should never happen
             return
@@ -1,14 +1,23 @@
 from enum import Enum
+from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
 from dataStructures import *
 from collections.abc import Callable 
+from itertools import islice
+from columnar_logs import ColumnarLogs
+from report_arrays import LogArrays, np
+from log_aggregates import LogAggregates
+
+ACCUMULATE_BATCH = 4096 # logs held at a time during Pipeline's single pass
 
 class Pipeline:
 	_report_template = {"header": f"Report {datetime.strftime(datetime.now(), '%m/%d/%Y %I:%M%p')}", "data": {}}
 
-	def __init__(self, report: dict = _report_template, filters: list[Callable] = [], data: list=None):
+	def __init__(self, report: dict = _report_template, filters: list[Callable] = [], data: list=None, engine: str="auto"):
 		self.filters: list[Callable] = filters
 		self.report: dict = report # basic initialization of report
+		self.engine = engine # "python", "numpy" (converts the logs to LogArrays) or "auto" (numpy when the arrays come for free)
+		self.logAggregates: LogAggregates|None = None
 		if data is not None and isinstance(data, list) and len(data) == 4:
 			self.addLogs(data[0])
 			self.addNumEmployees(data[1])
@@ -27,6 +36,9 @@ class Pipeline:
 
 	def addNumEquipment(self, num: int) -> None:
 		self.report['data']['numEquipment'] = num
+
+	def addLogAggregates(self, aggregates: LogAggregates|None) -> None: # kept up to date by Manager (same logs as addLogs)
+		self.logAggregates = aggregates
 	# --------------------
 		
 	# ---filter stuff-----
@@ -42,9 +54,49 @@ class Pipeline:
 	def executeFilters(self) -> dict|None:
 		if not self.hasAllData():
 			return {"Missing Data..."}
-		for report_filter in self.filters: # Order of filters matter
-			self.report = report_filter(self.report)
+		accumulators = self._accumulate()
+		for report_filter, accumulator in zip(self.filters, accumulators): # Order of filters matter
+			self.report = report_filter(self.report) if accumulator is None else accumulator.finish(self.report)
 		return self.report
+
+	def _accumulate(self) -> list:
+		"""
+		Runs the accumulators of the filters that have one (see with_accumulator) together.
+		With LogAggregates they're read from the running totals, with LogArrays they're computed from the arrays,
+		otherwise they're run in one pass over the logs.
+		Returns each filter's finished accumulator, None for filters that run on their own.
+		Logs with a countCode() (columnar / partitioned / compacted) already answer counts without a pass, they aren't fused
+		into one unless they can be vectorized.
+		"""
+		logs = self.report['data']['logs']
+		accumulators = [make() if (make:=getattr(report_filter, 'accumulator', None)) is not None else None for report_filter in self.filters]
+		wanted = [accumulator for accumulator in accumulators if accumulator is not None]
+		if len(wanted) == 0:
+			return accumulators
+		if all(accumulator.vectorized for accumulator in wanted) and (summary:=self.logAggregates if self.logAggregates is not None else self._logArrays(logs)) is not None:
+			for accumulator in wanted:
+				accumulator.addArrays(summary)
+			return accumulators
+		if hasattr(logs, 'countCode'):
+			return [None] * len(self.filters)
+		byCode: dict[LOG_CODES, list[Accumulator]] = {}  # so each log only goes to the accumulators that want its code
+		for accumulator in wanted:
+			for logCode in accumulator.logCodes:
+				byCode.setdefault(logCode, []).append(accumulator)
+		logs = iter(logs)
+		while len(batch:=list(islice(logs, ACCUMULATE_BATCH))) > 0: # one pass, a batch at a time (a call per log per accumulator is slow)
+			for logCode, codeAccumulators in byCode.items():
+				if len(bucket:=[log for log in batch if log.logCode == logCode]) > 0:
+					for accumulator in codeAccumulators:
+						accumulator.addBatch(bucket)
+		return accumulators
+
+	def _logArrays(self, logs) -> LogArrays|None:
+		if self.engine == "python":
+			return None
+		if self.engine == "numpy" or (isinstance(logs, ColumnarLogs) and np is not None): # columnar logs are arrays already
+			return LogArrays.fromLogs(logs)
+		return None
     
 	def clear_filters(self) -> None:
 		self.filters.clear()
@@ -73,13 +125,18 @@ class Pipeline:
 def getLogCodeName(logCode: LOG_CODES) -> str:
 	return {v:k for k,v in LOG_CODES.__dict__.items() if v in [LOG_CODES.LOST, LOG_CODES.CHECKIN, LOG_CODES.CHECKOUT]}[logCode]
 
+def count_log_code(logs, logCode: LOG_CODES) -> int:
+	if hasattr(logs, 'countCode'): # columnar logs can count without making Log objects
+		return logs.countCode(logCode)
+	return sum(1 for log in logs if log.logCode == logCode)  # logs can be a list or streamed (ex: CSVLogReader)
+
 # Filters
 def update_header(report: dict, text: str=f"Report {datetime.strftime(datetime.now(), '%m/%d/%Y %I:%M%p')}") -> dict:
 	report['header'] = text
 	return report
 
 def num_lost_equipment(report: dict) -> dict:
-	count = [log.logCode for log in report["data"]["logs"]].count(LOG_CODES.LOST)
+	count = count_log_code(report["data"]["logs"], LOG_CODES.LOST)
 	report['data']['numLostEquipment'] = count
 	return report
 
@@ -95,39 +152,122 @@ def calculate_percentage_lost(report: dict) -> dict:
    
 def calc_frequency_of(logCode: int, report: dict):
 	logCodeName = getLogCodeName(logCode=logCode)
-	if len(report['data']['logs']) == 0:
-		report['data'][f'frequencyOf{logCodeName}'] = "NA"
-	frequency = [log.logCode for log in report['data']['logs']].count(logCode)
+	frequency = count_log_code(report['data']['logs'], logCode)
 	report['data'][f'frequencyOf{logCodeName}'] = frequency
 	return report
 
-def calc_datetimes_of(logCode: int, report:dict, start_date: datetime, end_date: datetime=datetime.today()):
+def calc_datetimes_of(logCode: int, report:dict, start_date: datetime, end_date: datetime|None=None):
+	if end_date is None: # now, not when the module was imported
+		end_date = datetime.today()
 	logCodeName = getLogCodeName(logCode=logCode)
-	if len(report['data']['logs']) == 0:
-		report['data'][f'dateTimesOf{logCodeName}'] = "NA"
-	datetimes = [log.date for log in report['data']['logs'] if log.logCode == logCode and (start_date <= log.date <= end_date)]
+	logs = report['data']['logs']
+	if hasattr(logs, 'filter'): # streamed / columnar logs skip everything outside the range before making Log objects
+		datetimes = [log.date for log in logs.filter(start_date=start_date, end_date=end_date, logCodes=[logCode])]
+	else:
+		datetimes = [log.date for log in logs if log.logCode == logCode and (start_date <= log.date <= end_date)]
 	report['data'][f'dateTimesOf{logCodeName}'] = datetimes
 	return report
 
 
+# Accumulators
+class Accumulator(ABC):
+	"""
+	The per log part of a filter, so Pipeline can compute every selected filter in one pass over the logs.
+	addBatch() gets the logs with one of the logCodes a batch at a time, finish() puts the result in the report the same
+	way the filter would. Subclasses missing one of them can't be created, vectorized ones also need addArrays().
+	"""
+	logCodes: tuple = ()
+	vectorized = False # has addArrays(), so it can be computed from LogArrays / LogAggregates instead
+
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		if cls.vectorized and cls.addArrays is Accumulator.addArrays:
+			raise TypeError(f"{cls.__name__} is vectorized but has no addArrays()")
+
+	@abstractmethod
+	def addBatch(self, logs: list[Log]) -> None:
+		...
+
+	def addArrays(self, arrays: LogArrays|LogAggregates) -> None:
+		raise NotImplementedError # only called when vectorized, which needs it overridden
+
+	@abstractmethod
+	def finish(self, report: dict) -> dict:
+		...
+
+class CodeCounter(Accumulator):
+	def __init__(self, logCode: LOG_CODES, key: str):
+		self.logCodes = (logCode,)
+		self.key = key # report['data'] key the count goes in
+		self.count = 0
+
+	vectorized = True
+
+	def addBatch(self, logs: list[Log]) -> None:
+		self.count += len(logs)
+
+	def addArrays(self, arrays: LogArrays|LogAggregates) -> None:
+		self.count += arrays.countCode(self.logCodes[0]) # bincount / running total
+
+	def finish(self, report: dict) -> dict:
+		report['data'][self.key] = self.count
+		return report
+
+class LostPercentage(CodeCounter):
+	def __init__(self):
+		super().__init__(LOG_CODES.LOST, 'numLostEquipment')
+
+	def finish(self, report: dict) -> dict:
+		if self.key not in report['data']: # same as calculate_percentage_lost, the count is only added if it's missing
+			report = super().finish(report)
+		return calculate_percentage_lost(report)
+
+class DateCollector(Accumulator):
+	def __init__(self, logCode: LOG_CODES, start_date: datetime, end_date: datetime|None=None):
+		self.logCodes = (logCode,)
+		self.start_date = start_date
+		self.end_date = datetime.today() if end_date is None else end_date
+		self.datetimes: list[datetime] = []
+
+	vectorized = True
+
+	def addBatch(self, logs: list[Log]) -> None:
+		start_date, end_date = self.start_date, self.end_date
+		self.datetimes.extend([log.date for log in logs if start_date <= log.date <= end_date])
+
+	def addArrays(self, arrays: LogArrays|LogAggregates) -> None:
+		self.datetimes.extend(arrays.datesOf(self.logCodes[0], self.start_date, self.end_date)) # searchsorted / bisect
+
+	def finish(self, report: dict) -> dict:
+		report['data'][f'dateTimesOf{getLogCodeName(logCode=self.logCodes[0])}'] = self.datetimes
+		return report
+
+def with_accumulator(report_filter: Callable, make_accumulator: Callable[[], Accumulator]) -> Callable:
+	# lets Pipeline fuse the filter into its single pass, the filter still works on its own
+	report_filter.accumulator = make_accumulator
+	return report_filter
+
+with_accumulator(num_lost_equipment, lambda: CodeCounter(LOG_CODES.LOST, 'numLostEquipment'))
+with_accumulator(calculate_percentage_lost, LostPercentage)
+
+def frequency_filter(logCode: LOG_CODES) -> Callable:
+	return with_accumulator(lambda report: calc_frequency_of(logCode=logCode, report=report),
+							lambda: CodeCounter(logCode, f'frequencyOf{getLogCodeName(logCode=logCode)}'))
+
+def datetimes_filter(logCode: LOG_CODES, days: int) -> Callable: # logs with the code in the last `days` days
+	return with_accumulator(lambda report: calc_datetimes_of(logCode=logCode, report=report, start_date=datetime.today()-timedelta(days=days)),
+							lambda: DateCollector(logCode, start_date=datetime.today()-timedelta(days=days)))
+
+
 AllFilters = [
 	{"name": "Update Header", "func": update_header},
 	{"name": "Calculate Number of Lost Equipment", "func": num_lost_equipment},
 	{"name": "Calculate Percentage Of Lost Equipment", "func": calculate_percentage_lost}] + [
-	{"name": f"Calculate Frequency of Lost Equipment", "func":  lambda report: calc_frequency_of(logCode=LOG_CODES.LOST, report=report)},
-	{"name": "Calculate Frequency of Checked-In Equipment", "func": lambda report: calc_frequency_of(logCode=LOG_CODES.CHECKIN, report=report)},
-	{"name": "Calculate Frequency of Checked-Out Equipment", "func": lambda report: calc_frequency_of(logCode=LOG_CODES.CHECKOUT, report=report)}
+	{"name": f"Calculate Frequency of Lost Equipment", "func": frequency_filter(LOG_CODES.LOST)},
+	{"name": "Calculate Frequency of Checked-In Equipment", "func": frequency_filter(LOG_CODES.CHECKIN)},
+	{"name": "Calculate Frequency of Checked-Out Equipment", "func": frequency_filter(LOG_CODES.CHECKOUT)}
 	] + [
-	{
-		"name": "Get Dates and times of Lost Equipment in last day", 
-		"func": lambda report: calc_datetimes_of(logCode=LOG_CODES.LOST, report=report, start_date=datetime.today()-timedelta(days=1))
-	},
-	{
-		"name": "Get Dates and times of Lost Equipment in last day",
-		"func": lambda report: calc_datetimes_of(logCode=LOG_CODES.LOST, report=report, start_date=datetime.today()-timedelta(days=7))	
-	},
-	{
-		"name": "Get Dates and times of Lost Equipment in last month",
-		"func": lambda report: calc_datetimes_of(logCode=LOG_CODES.LOST, report=report, start_date=datetime.today()-timedelta(days=30))
-	}
+	{"name": "Get Dates and times of Lost Equipment in last day", "func": datetimes_filter(LOG_CODES.LOST, days=1)},
+	{"name": "Get Dates and times of Lost Equipment in last day", "func": datetimes_filter(LOG_CODES.LOST, days=7)},
+	{"name": "Get Dates and times of Lost Equipment in last month", "func": datetimes_filter(LOG_CODES.LOST, days=30)}
 	]
@@ -0,0 +1,89 @@
+# background_saver.py - runs saves on a worker thread so the window doesn't freeze while files are written.
+
+import threading
+import queue
+
+
+class BackgroundSaver:
+    """
+    Save jobs run one at a time, in order, on a single worker thread.
+    The GUI thread submits jobs and collects the finished ones with poll() (ex: from a tkinter after() loop),
+    so nothing on the worker ever touches tkinter.
+    """
+    def __init__(self) -> None:
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._pending = 0  # submitted but not polled yet, only used from the GUI thread
+        self._thread = threading.Thread(target=self._run, name="BackgroundSaver", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while (item := self._jobs.get()) is not None:
+            job, tag = item
+            try:
+                job()
+                self._results.put((tag, None))
+            except Exception as e:
+                self._results.put((tag, e))
+
+    def submit(self, job: callable, tag=None) -> None:
+        """
+        job is called with no arguments on the worker, it should only use data that was copied for it.
+        tag comes back with the job's result from poll() (ex: the tables that were being saved).
+        """
+        self._pending += 1
+        self._jobs.put((job, tag))
+
+    def poll(self) -> list[tuple[object, Exception|None]]:
+        # finished jobs since the last call: (tag, error or None)
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        self._pending -= len(results)
+        return results
+
+    def isBusy(self) -> bool:
+        return self._pending > 0
+
+    def wait(self) -> list[tuple[object, Exception|None]]:
+        # blocks until every submitted job is done, returns them like poll()
+        results = []
+        while self._pending > 0:
+            results.append(self._results.get())
+            self._pending -= 1
+        return results
+
+    def close(self) -> None:
+        self._jobs.put(None)
+        self._thread.join()
+
+
+class AutosaveSchedule:
+    """
+    When to autosave: every `interval` seconds and/or after `every` transactions (None turns either one off).
+    """
+    def __init__(self, interval: float|None=None, every: int|None=None) -> None:
+        self.interval = interval
+        self.every = every
+        self.transactions = 0  # since the last save
+        self.pending = False  # transaction() said to save and the save hasn't run yet
+
+    def intervalMs(self) -> int|None:  # for tkinter's after()
+        return None if self.interval is None else int(self.interval * 1000)
+
+    def transaction(self) -> bool:
+        # counts a transaction, True if it's time to save (once, until ran() is called)
+        self.transactions += 1
+        if self.pending or self.every is None or self.transactions < self.every:
+            return False
+        self.pending = True
+        return True
+
+    def ran(self) -> None:  # the save transaction() asked for ran (it may have had nothing to do)
+        self.pending = False
+
+    def saved(self) -> None:
+        self.transactions = 0
@@ -0,0 +1,156 @@
+# benchmarks.py - rough timings for the data handling code (not part of the app). Run with: python benchmarks.py
+
+import tracemalloc
+from time import perf_counter
+from datetime import datetime, timedelta
+from os import remove
+from csv_database import LEGACY_LOG_DATE_FORMAT, encode_log_date, decode_log_date, write_employees_to_csv, read_employees_from_csv, append_logs_to_csv, CSVLogReader
+from dataStructures import Employee, Log, LOG_CODES
+from Pipeline import AllFilters, Pipeline
+from log_aggregates import LogAggregates
+from log_index import LogTimeIndex
+from snapshot_cache import read_snapshot_cache, write_snapshot_cache
+
+
+def timed(func) -> float:  # seconds func took
+    start = perf_counter()
+    func()
+    return perf_counter() - start
+
+
+def bench_log_dates(n=200_000):
+    dates = [datetime(year=2024, month=1, day=1) + timedelta(seconds=i*37) for i in range(n)]
+    legacy_texts = [date.strftime(LEGACY_LOG_DATE_FORMAT) for date in dates]
+    iso_texts = [encode_log_date(date) for date in dates]
+
+    results = {
+        "strftime (old format)": timed(lambda: [date.strftime(LEGACY_LOG_DATE_FORMAT) for date in dates]),
+        "encode_log_date (ISO)": timed(lambda: [encode_log_date(date) for date in dates]),
+        "strptime (old format)": timed(lambda: [datetime.strptime(text, LEGACY_LOG_DATE_FORMAT) for text in legacy_texts]),
+        "decode_log_date (old format)": timed(lambda: [decode_log_date(text) for text in legacy_texts]),
+        "decode_log_date (ISO)": timed(lambda: [decode_log_date(text) for text in iso_texts]),
+    }
+    print(f"Log dates ({n} rows):")
+    for name, seconds in results.items():
+        print(f"     {name:<30} {n / seconds:>12,.0f} rows/sec")
+
+
+def bench_startup(n=100_000):
+    source, cache = "bench_employees.csv", "bench_tables.cache"
+    employees = [Employee(name=f"Employee {i}", password_hash="0"*64, emp_id=f"emp{i}", contactInfo=f"emp{i}@email.com", skillIds=["s0", "s1"], key=i) for i in range(n)]
+    write_employees_to_csv(employees, source)
+    write_snapshot_cache(cache, [source], {"employees": employees})
+
+    results = {
+        "csv parse": timed(lambda: read_employees_from_csv(source)),
+        "snapshot cache": timed(lambda: read_snapshot_cache(cache, [source])),
+    }
+    remove(source)
+    remove(cache)
+    print(f"Loading employees ({n} rows):")
+    for name, seconds in results.items():
+        print(f"     {name:<30} {seconds * 1000:>12,.1f} ms")
+
+
+class PlainEmployee:  # how Employee was stored before __slots__ / IdSet, for comparison
+    def __init__(self, name, password_hash, emp_id, contactInfo, borrowedEquipIds, skillIds, numLostEquips=0, isAdmin=False, key=None):
+        self.key, self.name, self.password_hash, self.emp_id, self.contactInfo = key, name, password_hash, emp_id, contactInfo
+        self.borrowedEquipIds, self.skillIds, self.numLostEquips, self.isAdmin = borrowedEquipIds, skillIds, numLostEquips, isAdmin
+
+
+def memory_of(build) -> int:  # bytes still allocated by what build() returns
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def bench_memory(n=100_000):
+    # IDs are parsed from csv text, so each row gets its own copy of the strings unless they're interned
+    rows = [(f"Employee {i}", "0"*64, f"emp{i}", f"emp{i}@email.com", [f"equip{i % 500}"], [f"skill{j}" for j in range(i % 4)]) for i in range(n)]
+    copied = lambda: [(name, pwd, emp_id, contact, [(x + ".")[:-1] for x in borrowed], [(x + ".")[:-1] for x in skills]) for name, pwd, emp_id, contact, borrowed, skills in rows]
+    results = {
+        "plain class + lists": memory_of(lambda: [PlainEmployee(*row) for row in copied()]),
+        "__slots__ + IdSet + interned": memory_of(lambda: [Employee(*row) for row in copied()]),
+    }
+    print(f"Memory of {n} employees:")
+    for name, size in results.items():
+        print(f"     {name:<30} {size / 2**20:>12,.1f} MB")
+
+
+def run_separately(filters, logs) -> dict:  # how executeFilters ran them before, one pass (or more) per filter
+    report = {"header": "", "data": {"logs": logs, "numEmployees": 1, "numEquipment": 1, "numSkills": 1}}
+    for report_filter in filters:
+        report = report_filter(report)
+    return report
+
+
+def bench_fused_filters(n=300_000):
+    source = "bench_logs.csv"
+    now = datetime.now()
+    logs = [Log(date=now - timedelta(minutes=i), logCode=[LOG_CODES.LOST, LOG_CODES.CHECKIN, LOG_CODES.CHECKOUT][i % 3], empId="emp0", equipId="equip0", notes=[]) for i in range(n)]
+    append_logs_to_csv(logs, source)
+    filters = [x["func"] for x in AllFilters]
+    fused = lambda logs: Pipeline(report={"header": "", "data": {}}, filters=filters, data=[logs, 1, 1, 1]).executeFilters()
+
+    results = {
+        "list, filter by filter": timed(lambda: run_separately(filters, logs)),
+        "list, one fused pass": timed(lambda: fused(logs)),
+        "csv stream, filter by filter": timed(lambda: run_separately(filters, CSVLogReader(source))),
+        "csv stream, one fused pass": timed(lambda: fused(CSVLogReader(source))),
+    }
+    remove(source)
+    print(f"All report filters ({n} logs):")
+    for name, seconds in results.items():
+        print(f"     {name:<30} {seconds * 1000:>12,.1f} ms")
+
+
+def bench_vector_reports(n=1_000_000):
+    now = datetime.now()
+    logs = [Log(date=now - timedelta(seconds=i * 13), logCode=[LOG_CODES.LOST, LOG_CODES.CHECKIN, LOG_CODES.CHECKOUT][i % 3], empId=f"emp{i % 500}", equipId=f"equip{i % 2000}", notes=[]) for i in range(n)]
+    filters = [x["func"] for x in AllFilters]
+    def report(engine, aggregates=None):
+        pipeline = Pipeline(report={"header": "", "data": {}}, filters=filters, data=[logs, 1, 1, 1], engine=engine)
+        pipeline.addLogAggregates(aggregates)
+        return pipeline.executeFilters()
+
+    aggregates = LogAggregates(reversed(logs))  # oldest first, like Manager adds them
+    new_logs = [Log(date=now + timedelta(seconds=i), logCode=LOG_CODES.CHECKOUT, empId="emp0", equipId="equip0", notes=[]) for i in range(1000)]
+    results = {
+        "python, filter by filter": timed(lambda: run_separately(filters, logs)),
+        "python, one fused pass": timed(lambda: report("python")),
+        "numpy, converting the logs": timed(lambda: report("numpy")),
+        "running totals (LogAggregates)": timed(lambda: report("auto", aggregates=aggregates)),
+        "running totals, add 1000 logs": timed(lambda: [aggregates.add(log) for log in new_logs]),
+    }
+    print(f"All report filters ({n} logs):")
+    for name, seconds in results.items():
+        print(f"     {name:<30} {seconds * 1000:>12,.1f} ms")
+
+
+def bench_log_windows(n=1_000_000):
+    now = datetime.now()
+    logs = [Log(date=now - timedelta(seconds=(n - i) * 13), logCode=[LOG_CODES.LOST, LOG_CODES.CHECKIN, LOG_CODES.CHECKOUT][i % 3], empId="emp0", equipId="equip0", notes=[]) for i in range(n)]
+    week = now - timedelta(days=7)
+    index = LogTimeIndex()
+    results = {
+        "build the index": timed(lambda: index.extend(logs)),
+        "lost last week, scan": timed(lambda: [log.date for log in logs if log.logCode == LOG_CODES.LOST and week <= log.date <= now]),
+        "lost last week, bisect": timed(lambda: index.datesOf(LOG_CODES.LOST, week, now)),
+        "1000 out of order adds": timed(lambda: [index.add(Log(date=now - timedelta(seconds=i * 997), logCode=LOG_CODES.LOST, empId="emp0", equipId="equip0", notes=[])) for i in range(1000)]),
+        "lost last week, after those": timed(lambda: index.datesOf(LOG_CODES.LOST, week, now)),
+    }
+    print(f"Date windows ({n} logs):")
+    for name, seconds in results.items():
+        print(f"     {name:<30} {seconds * 1000:>12,.1f} ms")
+
+
+if __name__ == "__main__":
+    bench_log_dates()
+    bench_startup()
+    bench_memory()
+    bench_fused_filters()
+    bench_vector_reports()
+    bench_log_windows()
@@ -0,0 +1,222 @@
+# columnar_logs.py - optional binary log storage, one NumPy array file per column (needs numpy).
+
+import math
+from os import path, makedirs, fsync, truncate, remove
+from datetime import datetime, timedelta
+from dataStructures import Log, LOG_CODES
+from csv_database import tarnslateLogCode, fileExits, read_logs_from_csv, atomic_open
+
+try:
+    import numpy as np
+except ImportError:  # only needed when the columnar log store is turned on
+    np = None
+
+EPOCH = datetime(year=1970, month=1, day=1)
+SECOND = timedelta(seconds=1)
+NOTE_SEPARATOR = "\x1f"  # notes are joined with this instead of '-' so notes with dashes survive
+
+# column name -> numpy dtype, stored as <directory>/<name>.bin
+COLUMNS = {
+    "dates": "<i8",  # seconds since EPOCH
+    "codes": "u1",  # tarnslateLogCode value
+    "emp_ids": "<i4",  # index into emp_ids_table.bin
+    "equip_ids": "<i4",  # index into equip_ids_table.bin
+    "emp_keys": "<i4",  # -1 = no key
+    "equip_keys": "<i4",
+    "note_ends": "<i8",  # end of this log's notes in notes.bin
+}
+
+
+def encode_id(itemId: str) -> bytes:  # ID tables store each ID as its length then its utf-8 bytes, so any character works
+    data = itemId.encode('utf-8')
+    return len(data).to_bytes(4, "little") + data
+
+
+def decode_ids(data: bytes) -> tuple[list[str], int]:  # the IDs and where the last complete one ends
+    ids, pos = [], 0
+    while pos + 4 <= len(data):
+        end = pos + 4 + int.from_bytes(data[pos:pos + 4], "little")
+        if end > len(data):  # cut short by a crash part way through an append
+            break
+        ids.append(data[pos + 4:end].decode('utf-8'))
+        pos = end
+    return ids, pos
+
+
+def date_to_seconds(date: datetime) -> int:
+    return (date - EPOCH) // SECOND
+
+
+def seconds_to_date(seconds: int) -> datetime:
+    return EPOCH + timedelta(seconds=int(seconds))
+
+
+class ColumnarLogs:
+    """
+    Logs stored column by column in a directory and opened with numpy.memmap, so opening it doesn't read the logs.
+    Looping over it makes Log objects one at a time, Pipeline filters use countCode() / filter() to work on the arrays directly.
+    """
+    def __init__(self, directory: str, rows=None, parent: 'ColumnarLogs|None' = None) -> None:
+        if np is None:
+            raise ImportError("numpy is needed for the columnar log store")
+        self.directory = directory
+        self._rows = rows  # indexes of the logs in this view (None = all of them)
+        self._parent = parent
+        if parent is None:
+            makedirs(directory, exist_ok=True)
+            self._columns = None
+            self._idTables = {name: self._read_ids(name) for name in ["emp_ids", "equip_ids"]}
+            self._idIndexes = {name: {itemId: i for i, itemId in enumerate(ids)} for name, ids in self._idTables.items()}
+
+    # ------ files ------
+    def _file(self, name: str) -> str:
+        return path.join(self.directory, name)
+
+    def _read_ids(self, name: str) -> list[str]:
+        fn = self._file(f"{name}_table.bin")
+        if not fileExits(fn):
+            if fileExits(legacy := self._file(f"{name}.txt")):  # older stores had one ID per line
+                with open(legacy, 'r', encoding='utf-8', newline='\n') as file:
+                    ids = file.read().split("\n")[:-1]
+                with atomic_open(fn, binary=True) as file:
+                    file.write(b"".join(map(encode_id, ids)))
+                remove(legacy)
+                return ids
+            return []
+        with open(fn, 'rb') as file:
+            data = file.read()
+        ids, end = decode_ids(data)
+        if end < len(data):  # so the next ID is appended after the last complete one
+            truncate(fn, end)
+        return ids
+
+    def columns(self) -> dict:  # name -> read only memmap (shared with views)
+        if self._parent is not None:
+            return self._parent.columns()
+        if self._columns is None:
+            sizes = {name: path.getsize(fn) // np.dtype(dtype).itemsize if fileExits(fn := self._file(f"{name}.bin")) else 0 for name, dtype in COLUMNS.items()}
+            count = min(sizes.values())  # a crash part way through an append leaves some columns longer, ignore the extra
+            self._columns = {name: np.memmap(self._file(f"{name}.bin"), dtype=dtype, mode='r', shape=(count,)) if count > 0 else np.zeros(0, dtype=dtype)
+                             for name, dtype in COLUMNS.items()}
+            notes_size = path.getsize(fn) if fileExits(fn := self._file("notes.bin")) else 0
+            self._columns["notes"] = np.memmap(fn, dtype="u1", mode='r') if notes_size > 0 else np.zeros(0, dtype="u1")
+        return self._columns
+
+    def _column(self, name: str):
+        column = self.columns()[name]
+        return column if self._rows is None else column[self._rows]
+
+    def ids(self, name: str) -> list[str]:  # interned ID strings ("emp_ids" or "equip_ids")
+        return (self._parent or self)._idTables[name]
+
+    # ------ reading ------
+    def __len__(self) -> int:
+        return len(self.columns()["dates"]) if self._rows is None else len(self._rows)
+
+    def __iter__(self):
+        rows = range(len(self.columns()["dates"])) if self._rows is None else self._rows
+        for i in rows:
+            yield self._log(int(i))
+
+    def __getitem__(self, i: int) -> Log:
+        return self._log(int(i if self._rows is None else self._rows[i]))
+
+    def _log(self, i: int) -> Log:
+        columns = self.columns()
+        start = int(columns["note_ends"][i - 1]) if i > 0 else 0
+        notes = columns["notes"][start:int(columns["note_ends"][i])].tobytes().decode('utf-8')
+        emp_key, equip_key = int(columns["emp_keys"][i]), int(columns["equip_keys"][i])
+        return Log(
+            date=seconds_to_date(columns["dates"][i]),
+            logCode=tarnslateLogCode(int(columns["codes"][i])),
+            empId=self.ids("emp_ids")[columns["emp_ids"][i]],
+            equipId=self.ids("equip_ids")[columns["equip_ids"][i]],
+            notes=notes.split(NOTE_SEPARATOR) if notes else [],
+            empKey=None if emp_key < 0 else emp_key,
+            equipKey=None if equip_key < 0 else equip_key
+        )
+
+    def dates(self):  # seconds since EPOCH
+        return self._column("dates")
+
+    def codes(self):  # tarnslateLogCode values
+        return self._column("codes")
+
+    def countCode(self, logCode: LOG_CODES) -> int:
+        return int(np.count_nonzero(self.codes() == tarnslateLogCode(logCode)))
+
+    def filter(self, start_date: datetime|None=None, end_date: datetime|None=None, logCodes: list[LOG_CODES]|None=None) -> 'ColumnarLogs':
+        mask = np.ones(len(self), dtype=bool)
+        dates = self.dates()
+        if start_date is not None:
+            mask &= dates >= math.ceil((start_date - EPOCH) / SECOND)
+        if end_date is not None:
+            mask &= dates <= date_to_seconds(end_date)
+        if logCodes is not None:
+            mask &= np.isin(self.codes(), [tarnslateLogCode(code) for code in logCodes])
+        rows = np.flatnonzero(mask) if self._rows is None else self._rows[mask]
+        return ColumnarLogs(self.directory, rows=rows, parent=self._parent or self)
+
+    # ------ writing ------
+    def append(self, log: Log) -> None:
+        self.extend([log])
+
+    def extend(self, logs: list[Log]) -> None:
+        """
+        Appends the logs to the end of each column file and flushes them to disk.
+        """
+        if self._parent is not None:
+            raise ValueError("Can't add logs to a filtered view")
+        if len(logs) == 0:
+            return
+        self._trim()
+        notes = [NOTE_SEPARATOR.join(log.notes).encode('utf-8') for log in logs]
+        note_start = int(self.columns()["note_ends"][-1]) if len(self) > 0 else 0
+        data = {
+            "dates": [date_to_seconds(log.date) for log in logs],
+            "codes": [tarnslateLogCode(log.logCode) for log in logs],
+            "emp_ids": [self._intern("emp_ids", log.empId) for log in logs],
+            "equip_ids": [self._intern("equip_ids", log.equipId) for log in logs],
+            "emp_keys": [-1 if log.empKey is None else log.empKey for log in logs],
+            "equip_keys": [-1 if log.equipKey is None else log.equipKey for log in logs],
+            "note_ends": note_start + np.cumsum([len(x) for x in notes]),
+        }
+        self._append_bytes("notes.bin", b"".join(notes))
+        for name, dtype in COLUMNS.items():  # note_ends last, a log only counts once all its columns are written
+            self._append_bytes(f"{name}.bin", np.asarray(data[name], dtype=dtype).tobytes())
+        self._columns = None  # re-open the memmaps with the new length
+
+    def _trim(self) -> None:  # cut off anything left over from an append that didn't finish so the columns line up
+        count = len(self)
+        sizes = {f"{name}.bin": count * np.dtype(dtype).itemsize for name, dtype in COLUMNS.items()}
+        sizes["notes.bin"] = int(self.columns()["note_ends"][-1]) if count > 0 else 0
+        for name, size in sizes.items():
+            if fileExits(fn := self._file(name)) and path.getsize(fn) > size:
+                self._columns = None
+                truncate(fn, size)
+
+    def _intern(self, name: str, itemId: str) -> int:  # each ID string is stored once, the columns hold its index
+        ids, index = self._idTables[name], self._idIndexes[name]
+        if itemId not in index:
+            index[itemId] = len(ids)
+            ids.append(itemId)
+            self._append_bytes(f"{name}_table.bin", encode_id(itemId))
+        return index[itemId]
+
+    def _append_bytes(self, name: str, data: bytes) -> None:
+        with open(self._file(name), 'ab') as file:
+            file.write(data)
+            file.flush()
+            fsync(file.fileno())
+
+
+def open_columnar_logs(directory: str, import_from: str|None = None, backfill=None) -> ColumnarLogs:
+    """
+    Opens the columnar log store, the first time it's opened the logs from the csv file import_from are copied in.
+    backfill(logs) fills in the keys of imported logs that don't have them (ex: Manager._backfill_log_keys).
+    """
+    logs = ColumnarLogs(directory)
+    if len(logs) == 0 and import_from is not None and fileExits(import_from):
+        imported = read_logs_from_csv(import_from)
+        logs.extend(imported if backfill is None else backfill(imported))
+    return logs
@@ -1,8 +1,13 @@
 # csv_database.py - backup to database.py if MySQL cannot be resolved.
 
 import csv
-from os import path
-from dataStructures import Employee, Equipment, Skill, Log, LOG_CODES
+import io
+import os
+from os import path, fsync
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from dataStructures import Employee, Equipment, Skill, Log, LOG_CODES, KeyTable
 from datetime import datetime
 
 def fileExits(filename):
@@ -10,8 +15,32 @@ def fileExits(filename):
         return True
     return False
 
+@contextmanager
+def atomic_open(filename, binary=False):
+    """
+    Opens a temp file next to filename for writing, then fsyncs it and renames it over filename.
+    A crash part way through leaves the old file as it was instead of a half written one.
+    """
+    tmp = f"{filename}.tmp"
+    try:
+        with (open(tmp, 'wb') if binary else open(tmp, 'w', newline='')) as file:
+            yield file
+            file.flush()
+            fsync(file.fileno())
+        os.replace(tmp, filename)  # atomic, readers see the old file or the new one
+    except BaseException:
+        if fileExits(tmp):
+            os.remove(tmp)
+        raise
+    if hasattr(os, "O_DIRECTORY"):  # make the rename itself durable (not possible on Windows)
+        fd = os.open(path.dirname(path.abspath(filename)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            fsync(fd)
+        finally:
+            os.close(fd)
+
 def write_employees_to_csv(employees: list[Employee], filename):
-    with open(filename, 'w+', newline='') as file:
+    with atomic_open(filename) as file:
         writer = csv.writer(file)
         writer.writerow(["Name", "Password Hashed", "Employee ID", "Contact Info", "Borrowed Equipment IDs", "Skill IDs", "Number of Lost Equipments", "Is Admin"])
         for employee in employees:
@@ -40,7 +69,7 @@ def read_employees_from_csv(filename):
 
 
 def write_equipment_to_csv(equipment: list[Equipment], filename: str):
-    with open(filename, 'w+', newline='') as file:
+    with atomic_open(filename) as file:
         writer = csv.writer(file)
         writer.writerow(["Equipment ID", "Name", "Borrower ID", "Skill Requirements IDs", "Queue"])
         for equip in equipment:
@@ -49,7 +78,7 @@ def write_equipment_to_csv(equipment: list[Equipment], filename: str):
                 equip.name,
                 equip.borrower_id,
                 "-".join(equip.skillRequirementsIDs),
-                "-".join(equip.queue)
+                "-".join(equip.queue.savedItems())
             ])
 
 
@@ -73,7 +102,7 @@ def read_equipment_from_csv(filename):
 
 
 def write_skills_to_csv(skills: list[Skill], filename):
-    with open(filename, 'w+', newline='') as file:
+    with atomic_open(filename) as file:
         writer = csv.writer(file)
         writer.writerow(["Name", "Skill ID"])
         for skill in skills:
@@ -102,32 +131,237 @@ def tarnslateLogCode(val: LOG_CODES|int) -> int|LOG_CODES:
     return [LOG_CODES.CHECKIN, LOG_CODES.CHECKOUT, LOG_CODES.LOST][val]
 
 
+LEGACY_LOG_DATE_FORMAT = "%d/%m/%Y, %H:%M:%S"  # format used before ISO dates, still read
+
+def encode_log_date(date: datetime) -> str:
+    return date.isoformat(sep=" ", timespec="seconds")  # ex: 2024-02-16 01:01:01 (sorts the same as the dates)
+
+
+def decode_log_date(text: str) -> datetime:
+    if text[2] == "/":  # older files: "16/02/2024, 01:01:01", sliced by hand since strptime is slow
+        return datetime(int(text[6:10]), int(text[3:5]), int(text[0:2]), int(text[12:14]), int(text[15:17]), int(text[18:20]))
+    return datetime.fromisoformat(text)
+
+
+LOG_HEADER = ["Date", "Emp ID", "Equip ID", "Logcode", "Notes", "Emp Key", "Equip Key"]
+
+def _log_to_row(log: Log) -> list:
+    return [
+        encode_log_date(log.date),
+        log.empId,
+        log.equipId,
+        tarnslateLogCode(log.logCode),
+        "-".join(log.notes),
+        "" if log.empKey is None else log.empKey,
+        "" if log.equipKey is None else log.equipKey
+    ]
+
+
 def write_logs_to_csv(logs: list[Log], filename):
-    with open(filename, 'w+', newline='') as file:
+    with atomic_open(filename) as file:
         writer = csv.writer(file)
-        writer.writerow(["Date", "Emp ID", "Equip ID", "Logcode", "Notes"])
+        writer.writerow(LOG_HEADER)
         for log in logs:
-            writer.writerow([
-                log.date.strftime("%d/%m/%Y, %H:%M:%S"),
-                log.empId,
-                log.equipId,
-                tarnslateLogCode(log.logCode),
-                "-".join(log.notes)
-            ])
+            writer.writerow(_log_to_row(log))
+
+
+def append_logs_to_csv(logs: list[Log], filename):
+    """
+    Appends logs to the end of the file instead of rewriting it (logs never change once written).
+    The data is flushed to disk before returning so a crash won't lose the logs.
+    """
+    is_new = not fileExits(filename) or path.getsize(filename) == 0
+    with open(filename, 'a', newline='') as file:
+        writer = csv.writer(file)
+        if is_new:
+            writer.writerow(LOG_HEADER)
+        for log in logs:
+            writer.writerow(_log_to_row(log))
+        file.flush()
+        fsync(file.fileno())
+
+
+def logs_have_keys(filename) -> bool:  # False for files written before the key columns existed
+    with open(filename, 'r', newline='') as file:
+        header = next(csv.reader(file), None)
+    return header is None or len(header) >= len(LOG_HEADER)
 
 
 def read_logs_from_csv(filename):
-    logs = []
+    return list(stream_logs_from_csv(filename))
+
+
+def stream_logs_from_csv(filename, start_date: datetime|None=None, end_date: datetime|None=None, logCodes: list[LOG_CODES]|None=None):
+    """
+    Yields the logs in the file one at a time instead of loading them all.
+    Rows outside of start_date - end_date (inclusive) or without one of the logCodes are skipped before a Log is made for them.
+    """
+    with open(filename, 'r', newline='') as file:
+        reader = csv.reader(file)
+        next(reader)  # Skip the header row
+        yield from _logs_from_rows(reader, start_date, end_date, logCodes)
+
+
+def _logs_from_rows(rows, start_date: datetime|None=None, end_date: datetime|None=None, logCodes: list[LOG_CODES]|None=None):
+    raw_codes = None if logCodes is None else {str(tarnslateLogCode(code)) for code in logCodes}
+    start_text = None if start_date is None else start_date.isoformat(sep=" ")  # ISO dates can be compared as text
+    end_text = None if end_date is None else end_date.isoformat(sep=" ")
+    for row in rows:
+        date, empId, equipId, logCode, notes = row[:5]
+        if raw_codes is not None and logCode not in raw_codes: # cheap check first
+            continue
+        if date[2] != "/": # ISO date, check the range before parsing it
+            if (start_text is not None and date < start_text) or (end_text is not None and date > end_text):
+                continue
+            date = datetime.fromisoformat(date)
+        else:
+            date = decode_log_date(date)
+            if (start_date is not None and date < start_date) or (end_date is not None and date > end_date):
+                continue
+        empKey, equipKey = row[5:7] if len(row) >= 7 else ("", "")  # older files don't have the key columns
+        yield Log(
+            date=date,
+            empId=empId,
+            equipId=equipId,
+            logCode=tarnslateLogCode(int(logCode)),
+            notes=notes.split("-"),
+            empKey=int(empKey) if empKey else None,
+            equipKey=int(equipKey) if equipKey else None
+        )
+
+
+
+PARALLEL_MIN_BYTES = 4_000_000  # below this starting the worker processes takes longer than parsing
+
+
+def _worker_count(workers: int|None) -> int:
+    return workers if workers is not None else (os.cpu_count() or 1)
+
+
+def _read_log_chunk(filename, start: int, end: int) -> list[Log]:  # runs in a worker process
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        chunk = file.read(end - start)
+    return list(_logs_from_rows(csv.reader(io.TextIOWrapper(io.BytesIO(chunk), newline=''))))  # same encoding as open()
+
+
+def _count_quotes(filename, start: int, end: int) -> int:  # runs in a worker process
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        return file.read(end - start).count(b'"')
+
+
+def _next_row_start(file, pos: int, quoted: bool) -> int:
+    """
+    Where the first row starting after pos starts, quoted: pos is inside a quoted field.
+    A line break inside quotes is part of the field ('""' is an escaped quote, it flips twice so it doesn't matter).
+    """
+    file.seek(pos)
+    while len(block := file.read(1 << 16)) != 0:
+        i = 0
+        while True:
+            quote, line_end = block.find(b'"', i), block.find(b"\n", i)
+            if line_end == -1 and quote == -1:
+                break
+            if quote != -1 and (line_end == -1 or quote < line_end):
+                quoted, i = not quoted, quote + 1
+            elif quoted:
+                i = line_end + 1
+            else:
+                return pos + line_end + 1
+        pos += len(block)
+    return pos
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: forking would copy the saver thread and tkinter's state into the workers
+    return ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+
+
+def read_logs_from_csv_parallel(filename, workers: int|None=None, min_bytes=PARALLEL_MIN_BYTES) -> list[Log]:
+    """
+    Same as read_logs_from_csv, but big files are split into one block of rows per worker process and parsed at the same time.
+    The workers first count the quotes in their part of the file, so each block can start at a row that isn't in the
+    middle of a quoted field (notes with line breaks, older dates) without the file being read here.
+    """
+    workers = _worker_count(workers)
+    size = path.getsize(filename)
+    if workers < 2 or size < min_bytes:
+        return read_logs_from_csv(filename)
+
+    with open(filename, 'rb') as file:
+        start = _next_row_start(file, 0, False)  # after the header
+        step = (size - start) // workers
+        targets = [start + i * step for i in range(workers)] + [size]
+        with _process_pool(workers) as pool:
+            quotes = list(pool.map(_count_quotes, [filename] * workers, targets[:-1], targets[1:]))
+            bounds = [start]
+            for i in range(1, workers):  # an odd number of quotes before a target means it's inside quotes
+                bounds.append(max(_next_row_start(file, targets[i], sum(quotes[:i]) % 2 == 1), bounds[-1]))
+            bounds.append(size)
+            parts = pool.map(_read_log_chunk, [filename] * workers, bounds[:-1], bounds[1:])
+            return [log for part in parts for log in part]
+
+
+def read_tables_from_csv(filenames: dict[str, str], workers: int|None=None, min_bytes=PARALLEL_MIN_BYTES) -> dict[str, list]:
+    """
+    Reads the tables (ex: {"employees": "employees.csv"}, names from CSV_READERS), each in its own process when they're big enough.
+    """
+    workers = min(_worker_count(workers), len(filenames))
+    if workers < 2 or sum(path.getsize(filename) for filename in filenames.values()) < min_bytes:
+        return {name: CSV_READERS[name](filename) for name, filename in filenames.items()}
+    with _process_pool(workers) as pool:
+        futures = {name: pool.submit(CSV_READERS[name], filename) for name, filename in filenames.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+class CSVLogReader:
+    """
+    Logs in a csv file that can be looped over more than once (ex: by several Pipeline filters) without keeping them in memory.
+    filter() narrows it down, the checks are done while the file is read.
+    """
+    def __init__(self, filename, start_date: datetime|None=None, end_date: datetime|None=None, logCodes: list[LOG_CODES]|None=None) -> None:
+        self.filename = filename
+        self.start_date = start_date
+        self.end_date = end_date
+        self.logCodes = logCodes
+
+    def filter(self, start_date: datetime|None=None, end_date: datetime|None=None, logCodes: list[LOG_CODES]|None=None) -> 'CSVLogReader':
+        if self.start_date is not None and (start_date is None or self.start_date > start_date):
+            start_date = self.start_date
+        if self.end_date is not None and (end_date is None or self.end_date < end_date):
+            end_date = self.end_date
+        if self.logCodes is not None:
+            logCodes = self.logCodes if logCodes is None else [code for code in logCodes if code in self.logCodes]
+        return CSVLogReader(self.filename, start_date, end_date, logCodes)
+
+    def __iter__(self):
+        return stream_logs_from_csv(self.filename, self.start_date, self.end_date, self.logCodes)
+
+
+def write_keys_to_csv(tables: dict[str, KeyTable], filename):
+    with atomic_open(filename) as file:
+        writer = csv.writer(file)
+        writer.writerow(["Table", "Key", "ID", "Active"])
+        for table_name, table in tables.items():
+            for key, item_id, is_active in table.rows():
+                writer.writerow([table_name, key, item_id, is_active])
+
+
+def read_keys_from_csv(filename) -> dict[str, KeyTable]:
+    rows: dict[str, list] = {}
     with open(filename, 'r', newline='') as file:
         reader = csv.reader(file)
         next(reader)  # Skip the header row
         for row in reader:
-            date, empId, equipId, logCode, notes = row
-            logs.append(Log(
-                date=datetime.strptime(date, "%d/%m/%Y, %H:%M:%S"),
-                empId=empId,
-                equipId=equipId,
-                logCode=tarnslateLogCode(int(logCode)),
-                notes=notes.split("-")
-            ))
-    return logs
\ No newline at end of file
+            table_name, key, item_id, is_active = row
+            rows.setdefault(table_name, []).append((int(key), item_id, is_active == "True"))
+    return {table_name: KeyTable(table_rows) for table_name, table_rows in rows.items()}
+
+
+CSV_READERS = {  # table name -> function that reads its file
+    "employees": read_employees_from_csv,
+    "equipment": read_equipment_from_csv,
+    "skills": read_skills_from_csv,
+    "logs": read_logs_from_csv,
+    "keys": read_keys_from_csv,
+}
@@ -1,19 +1,359 @@
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+from collections.abc import MutableSequence
+from contextlib import contextmanager
+from sys import intern
+import heapq
 
-class Employee:
-    def __init__(self, name: str, password_hash: str, emp_id: str, contactInfo: str, borrowedEquipIds:list[str]|None=None, skillIds:list[str]|None=None, numLostEquips=0, isAdmin=False) -> None:
+class ChangeTracker:
+    """
+    Keeps track of which tables (ex: 'employees') have changed since the last save so only those get written, and
+    which of their rows (by key), so sqlite / mysql only write those rows and csv only copies those for the save.
+    A table marked without saying which rows has all of them saved.
+    """
+    def __init__(self) -> None:
+        self.dirty: set[str] = set()
+        self.rows: dict[str, set] = {}  # table -> keys of the rows changed or added
+        self.removed: dict[str, set] = {}  # table -> keys of the rows deleted
+        self.wholeTables: set[str] = set()  # marked without rows
+        self._paused = 0
+
+    def mark(self, *tables: str) -> None:
+        if self._paused == 0:
+            self.dirty.update(tables)
+            self.wholeTables.update(tables)
+
+    def markRow(self, table: str, key) -> None:
+        if self._paused == 0:
+            self.dirty.add(table)
+            self.rows.setdefault(table, set()).add(key)
+
+    def markRemoved(self, table: str, key) -> None:
+        if self._paused == 0:
+            self.dirty.add(table)
+            self.removed.setdefault(table, set()).add(key)
+            self.rows.get(table, set()).discard(key)
+
+    @contextmanager
+    def paused(self):
+        # changes made inside aren't marked (ex: a transaction already saved them)
+        self._paused += 1
+        try:
+            yield
+        finally:
+            self._paused -= 1
+
+    def isDirty(self, table: str) -> bool:
+        return table in self.dirty
+
+    def changedRows(self, table: str) -> set|None:  # keys of the rows to save, None if it's all of them
+        return None if table in self.wholeTables else self.rows.get(table, set())
+
+    def take(self) -> 'ChangeTracker':
+        # the marks so far in a new tracker, this one starts over
+        taken = ChangeTracker()
+        taken.dirty, taken.rows, taken.removed, taken.wholeTables = self.dirty, self.rows, self.removed, self.wholeTables
+        self.clear()
+        return taken
+
+    def merge(self, other: 'ChangeTracker') -> None:  # ex: the marks of a save that failed, so they're saved next time
+        self.dirty |= other.dirty
+        self.wholeTables |= other.wholeTables
+        for table, keys in other.rows.items():
+            self.rows.setdefault(table, set()).update(keys)
+        for table, keys in other.removed.items():
+            self.removed.setdefault(table, set()).update(keys)
+
+    def clear(self) -> None:
+        self.dirty, self.rows, self.removed, self.wholeTables = set(), {}, {}, set()
+
+
+def intern_id(itemId: str|None) -> str|None:
+    # IDs repeat across employees, equipment, logs and indexes, interning keeps one copy of each string
+    return None if itemId is None else intern(itemId)
+
+
+class IdSet(list):
+    """
+    List of unique IDs (skills, borrowed equipment) with a fast `in`, it's still a list so saving / indexing work the same.
+    Small ones are just checked in order (a few interned strings is as fast as hashing), a set is kept once there are
+    more than SMALL_SIZE. Every method that adds or removes IDs keeps the set up to date (sort() / reverse() only
+    reorder them), adding an ID that's already there does nothing and setting an item to one raises ValueError.
+    """
+    __slots__ = ("_index",)
+    SMALL_SIZE = 8
+
+    def __init__(self, ids=()) -> None:
+        super().__init__()
+        self._index: set[str]|None = None
+        for itemId in ids:
+            self.append(itemId)
+
+    def _reindex(self) -> None:
+        self._index = set(self) if len(self) > self.SMALL_SIZE else None
+
+    def _added(self, itemId: str) -> None:
+        if self._index is not None:
+            self._index.add(itemId)
+        elif len(self) > self.SMALL_SIZE:
+            self._reindex()
+
+    def _removed(self, itemId: str) -> None:
+        if self._index is not None:
+            if len(self) <= self.SMALL_SIZE:
+                self._index = None
+            else:
+                self._index.discard(itemId)
+
+    def __contains__(self, itemId) -> bool:
+        return super().__contains__(itemId) if self._index is None else itemId in self._index
+
+    # ------ adding ------
+    def append(self, itemId: str) -> None:
+        if itemId in self:
+            return
+        super().append(intern_id(itemId))
+        self._added(itemId)
+
+    def insert(self, i: int, itemId: str) -> None:
+        if itemId in self:
+            return
+        super().insert(i, intern_id(itemId))
+        self._added(itemId)
+
+    def extend(self, ids) -> None:
+        for itemId in ids:
+            self.append(itemId)
+
+    def __iadd__(self, ids) -> 'IdSet':
+        self.extend(ids)
+        return self
+
+    def __imul__(self, n: int) -> 'IdSet':
+        if n <= 0:
+            self.clear()
+        elif n > 1 and len(self) > 0:
+            raise ValueError("IDs in an IdSet can't repeat")
+        return self
+
+    def __setitem__(self, i, value) -> None:
+        if isinstance(i, slice):
+            ids = list(self)
+            ids[i] = value
+            if len(set(ids)) != len(ids):
+                raise ValueError("IDs in an IdSet can't repeat")
+            super().__setitem__(slice(None), [intern_id(itemId) for itemId in ids])
+            self._reindex()
+            return
+        oldId = self[i]
+        if value == oldId:
+            return
+        if value in self:
+            raise ValueError(f"{value} is already in the IdSet")
+        super().__setitem__(i, intern_id(value))
+        if self._index is not None:
+            self._index.discard(oldId)
+            self._index.add(value)
+
+    # ------ removing ------
+    def remove(self, itemId: str) -> None:
+        super().remove(itemId)
+        self._removed(itemId)
+
+    def pop(self, i: int=-1) -> str:
+        itemId = super().pop(i)
+        self._removed(itemId)
+        return itemId
+
+    def __delitem__(self, i) -> None:
+        if isinstance(i, slice):
+            super().__delitem__(i)
+            self._reindex()
+        else:
+            self._removed(super().pop(i))
+
+    def clear(self) -> None:
+        super().clear()
+        self._index = None
+
+    def discard(self, itemId: str) -> bool:  # True if it was there
+        if itemId not in self:
+            return False
+        self.remove(itemId)
+        return True
+
+    def replace(self, oldId: str, newId: str) -> bool:  # keeps the position, True if oldId was there
+        if oldId not in self:
+            return False
+        if newId in self:  # already has the new one, just drop the old one
+            self.remove(oldId)
+            return True
+        self[self.index(oldId)] = newId
+        return True
+
+    def copy(self) -> 'IdSet':
+        return IdSet(self)
+
+    def __reduce__(self):
+        return (IdSet, (list(self),))
+
+
+PRIORITY_SEPARATOR = "\x1f"  # can't be typed into an ID, unlike ':' which IDs can have
+
+
+class ReservationQueue:
+    """
+    Employees waiting for a piece of equipment, served by priority (higher first) then first come first served.
+    A heap of [-priority, order, empId] entries plus empId -> entry, so push / pop are O(log n) and cancel is O(1):
+    a cancelled entry is just blanked and skipped when it reaches the top. Looping over it gives the IDs in service order.
+    Saved as a list of strings, "empId" or empId + PRIORITY_SEPARATOR + priority when the priority isn't 0.
+    """
+    __slots__ = ("_heap", "_entries", "_order")
+
+    def __init__(self, items=()) -> None:
+        self._heap: list[list] = []
+        self._entries: dict[str, list] = {}  # empId -> its live heap entry
+        self._order = 0  # increases with every push, keeps equal priorities first come first served
+        for item in items:
+            empId, priority = self.parseItem(item)
+            self.push(empId, priority)
+
+    @staticmethod
+    def parseItem(item: str) -> tuple[str, int]:
+        empId, sep, priority = item.rpartition(PRIORITY_SEPARATOR)
+        if sep and priority.lstrip("-").isdigit():
+            return empId, int(priority)
+        return item, 0
+
+    def push(self, empId: str, priority: int=0) -> bool:  # False if the employee is already waiting
+        if empId in self._entries:
+            return False
+        entry = [-priority, self._order, intern_id(empId)]
+        self._order += 1
+        self._entries[empId] = entry
+        heapq.heappush(self._heap, entry)
+        return True
+
+    def cancel(self, empId: str) -> bool:  # True if they were waiting
+        entry = self._entries.pop(empId, None)
+        if entry is None:
+            return False
+        entry[2] = None
+        if len(self._heap) > 2 * len(self._entries) + 8:  # mostly cancelled entries, drop them
+            self._heap = [entry for entry in self._heap if entry[2] is not None]
+            heapq.heapify(self._heap)
+        return True
+
+    def _prune(self) -> None:  # removes cancelled entries from the top
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+
+    def peek(self) -> str|None:
+        self._prune()
+        return self._heap[0][2] if self._heap else None
+
+    def pop(self) -> str|None:  # next employee in line, None if nobody is waiting
+        self._prune()
+        if not self._heap:
+            return None
+        empId = heapq.heappop(self._heap)[2]
+        del self._entries[empId]
+        return empId
+
+    def priorityOf(self, empId: str) -> int|None:
+        entry = self._entries.get(empId)
+        return None if entry is None else -entry[0]
+
+    def rename(self, oldId: str, newId: str) -> bool:  # keeps their place in line
+        if oldId not in self._entries or newId in self._entries:
+            return False
+        entry = self._entries.pop(oldId)
+        entry[2] = intern_id(newId)
+        self._entries[newId] = entry
+        return True
+
+    def __contains__(self, empId) -> bool:
+        return empId in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        return (entry[2] for entry in sorted(self._entries.values()))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ReservationQueue) and self.savedItems() == other.savedItems()
+
+    def __repr__(self) -> str:
+        return f"ReservationQueue({self.savedItems()})"
+
+    def savedItems(self) -> list[str]:
+        return [empId if entry[0] == 0 else f"{empId}{PRIORITY_SEPARATOR}{-entry[0]}" for entry in sorted(self._entries.values()) if (empId := entry[2]) is not None]
+
+    def copy(self) -> 'ReservationQueue':
+        return ReservationQueue(self.savedItems())
+
+    def __reduce__(self):
+        return (ReservationQueue, (self.savedItems(),))
+
+
+class Tracked:
+    """
+    Base for objects that mark their table as changed in a ChangeTracker when one of their attributes is set.
+    Methods that change a list in place need to call _changed() themselves.
+    Subclasses use __slots__ (no per object __dict__), fieldNames() lists them.
+    """
+    __slots__ = ("_tracker",)
+    _table = ""
+
+    def __new__(cls, *args, **kwargs):
+        obj = super().__new__(cls)
+        object.__setattr__(obj, "_tracker", None)  # set before __init__ so setting attributes there can check it
+        return obj
+
+    def __setattr__(self, name, value) -> None:
+        super().__setattr__(name, value)
+        self._changed()
+
+    def _changed(self) -> None:
+        if self._tracker is not None:
+            if (key:=getattr(self, "key", None)) is None:
+                self._tracker.mark(self._table)
+            else:
+                self._tracker.markRow(self._table, key)
+
+    def track(self, tracker: ChangeTracker|None) -> None:
+        object.__setattr__(self, "_tracker", tracker)  # attaching the tracker isn't a change
+
+    @classmethod
+    def fieldNames(cls) -> list[str]:
+        return [name for klass in reversed(cls.__mro__) for name in getattr(klass, "__slots__", ()) if name != "_tracker"]
+
+    def fields(self) -> dict:
+        return {name: getattr(self, name) for name in self.fieldNames()}
+
+    def snapshot(self):
+        # untracked copy with its own lists, so it can be saved on another thread while this one keeps changing
+        copy = object.__new__(type(self))
+        object.__setattr__(copy, "_tracker", None)
+        for name, value in self.fields().items():
+            object.__setattr__(copy, name, value.copy() if isinstance(value, (list, IdSet, ReservationQueue)) else value)
+        return copy
+
+
+class Employee(Tracked):
+    __slots__ = ("key", "name", "password_hash", "emp_id", "contactInfo", "borrowedEquipIds", "skillIds", "numLostEquips", "isAdmin")
+    _table = "employees"
+
+    def __init__(self, name: str, password_hash: str, emp_id: str, contactInfo: str, borrowedEquipIds:list[str]|None=None, skillIds:list[str]|None=None, numLostEquips=0, isAdmin=False, key: int|None=None) -> None:
+        self.key: int|None = key  # internal key, doesn't change when the emp_id does
         self.name = name
         self.password_hash =password_hash
-        self.emp_id: str = emp_id
+        self.emp_id: str = intern_id(emp_id)
         self.contactInfo: str = contactInfo
-        if borrowedEquipIds is None:
-            borrowedEquipIds = []
-        if skillIds is None:
-            skillIds = []
-        self.borrowedEquipIds: list[str] = borrowedEquipIds
-        self.skillIds: list[str] = skillIds
+        self.borrowedEquipIds: IdSet = IdSet(borrowedEquipIds or ())
+        self.skillIds: IdSet = IdSet(skillIds or ())
         self.numLostEquips = numLostEquips
         self.isAdmin = isAdmin
     
@@ -21,24 +361,27 @@ class Employee:
         return self.name
     
     def alterSkill(self, oldSkillId: str, newSkillId: str):
-        for i, skill in enumerate(self.skillIds):
-            if skill == oldSkillId:
-                self.skillIds[i] = newSkillId
+        if self.skillIds.replace(oldSkillId, newSkillId):
+            self._changed()
     
     def hasSkillId(self, skillID: str):
         return skillID in self.skillIds
 
-class Equipment:
-    def __init__(self, equipId: str, name: str, borrower_id: None|str = None, skillRequirementsIDs: list[str]|None = None, queue: list[str]|None = None) -> None:
-        self.equipId: str = equipId
+    def removeSkill(self, skillId: str):
+        if self.skillIds.discard(skillId):
+            self._changed()
+
+class Equipment(Tracked):
+    __slots__ = ("key", "equipId", "name", "borrower_id", "skillRequirementsIDs", "queue", "isLost")
+    _table = "equipment"
+
+    def __init__(self, equipId: str, name: str, borrower_id: None|str = None, skillRequirementsIDs: list[str]|None = None, queue: list[str]|ReservationQueue|None = None, key: int|None = None) -> None:
+        self.key: int|None = key  # internal key, doesn't change when the equipId does
+        self.equipId: str = intern_id(equipId)
         self.name: str = name
-        self.borrower_id: str|None = borrower_id
-        if skillRequirementsIDs is None:
-            skillRequirementsIDs = []
-        self.skillRequirementsIDs: list[str] = skillRequirementsIDs
-        if queue is None:
-            queue = []
-        self.queue: list[str] = queue
+        self.borrower_id: str|None = intern_id(borrower_id)
+        self.skillRequirementsIDs: IdSet = IdSet(skillRequirementsIDs or ())
+        self.queue: ReservationQueue = queue if isinstance(queue, ReservationQueue) else ReservationQueue(queue or ())
         self.isLost = False
     
     def __repr__(self) -> str:
@@ -47,26 +390,27 @@ class Equipment:
         return self.name
     
     def getMissingSkills(self, emp: Employee) -> list[str]:
-        missing = []
-        for skill_id in self.skillRequirementsIDs:
-            if skill_id not in emp.skillIds:
-                missing.append(skill_id)
-        return missing
+        return [skill_id for skill_id in self.skillRequirementsIDs if skill_id not in emp.skillIds]  # set lookups, O(requirements)
     
     def alterSkill(self, oldSkillId: str, newSkillId: str):
-        for i, skill in enumerate(self.skillRequirementsIDs):
-            if skill == oldSkillId:
-                self.skillRequirementsIDs[i] = newSkillId
+        if self.skillRequirementsIDs.replace(oldSkillId, newSkillId):
+            self._changed()
     
     def hasSkillId(self, skillID: str):
         return skillID in self.skillRequirementsIDs
 
+    def removeSkill(self, skillId: str):
+        if self.skillRequirementsIDs.discard(skillId):
+            self._changed()
+
     
 
-@dataclass
-class Skill:
+@dataclass(slots=True)
+class Skill(Tracked):
+    _table = "skills"
     name: str
     skillId: str
+    key: int|None = field(default=None, compare=False, repr=False)  # internal key, doesn't change when the skillId does
 
 
 class LOG_CODES(Enum):
@@ -74,10 +418,304 @@ class LOG_CODES(Enum):
     CHECKOUT = 1
     CHECKIN = 2
 
-@dataclass
+@dataclass(slots=True)
 class Log:
     date: datetime
     logCode: int
-    empId: str
+    empId: str  # the IDs at the time of the event, use the keys to find the current ones
     equipId: str
     notes: list[str]
+    empKey: int|None = None
+    equipKey: int|None = None
+
+
+class IDRegistry:
+    """
+    Keeps objects keyed by one of their ID attributes (ex: 'emp_id') so lookups don't need to scan a list.
+    Every object holding an ID is kept (in the order they were registered), get() returns the first one, same as the
+    old linear search did. When it's removed or renamed the next holder of the ID takes over.
+    """
+    def __init__(self, idAttr: str, items: list|None=None) -> None:
+        self.idAttr = idAttr
+        self._byId: dict = {}  # ID -> objects with that ID
+        if items is not None:
+            self.rebuild(items)
+
+    def rebuild(self, items: list) -> None:
+        self._byId = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item) -> None:
+        holders = self._byId.setdefault(getattr(item, self.idAttr), [])
+        if not any(holder is item for holder in holders):
+            holders.append(item)
+
+    def remove(self, item) -> None:
+        key = getattr(item, self.idAttr)
+        holders = self._byId.get(key)
+        if holders is None:
+            return
+        for i, holder in enumerate(holders):  # by identity, two blank items compare equal
+            if holder is item:
+                del holders[i]
+                break
+        if len(holders) == 0:
+            del self._byId[key]
+
+    def get(self, itemId):
+        holders = self._byId.get(itemId)
+        return holders[0] if holders else None
+
+    def changeID(self, item, newId) -> None:
+        self.remove(item)
+        setattr(item, self.idAttr, newId)
+        self.add(item)
+
+    def __contains__(self, itemId) -> bool:
+        return itemId in self._byId
+
+    def __len__(self) -> int:
+        return len(self._byId)
+
+
+class AvailabilityIndex:
+    """
+    Tracks which equipment is available (not borrowed) and which is lost so screens don't have to filter the whole inventory.
+    dicts are used as insertion ordered sets so the order shown in the GUI stays stable.
+    """
+    def __init__(self, equipment: list[Equipment]|None=None) -> None:
+        self._available: dict[Equipment, None] = {}
+        self._lost: dict[Equipment, None] = {}
+        if equipment is not None:
+            self.rebuild(equipment)
+
+    def rebuild(self, equipment: list[Equipment]) -> None:
+        self._available = {}
+        self._lost = {}
+        for equip in equipment:
+            self.update(equip)
+
+    def update(self, equip: Equipment) -> None:  # call after an equipment's borrower or lost status changes
+        if equip.borrower_id in [None, '']:
+            self._available[equip] = None
+        else:
+            self._available.pop(equip, None)
+        if equip.isLost:
+            self._lost[equip] = None
+        else:
+            self._lost.pop(equip, None)
+
+    def remove(self, equip: Equipment) -> None:
+        self._available.pop(equip, None)
+        self._lost.pop(equip, None)
+
+    def isAvailable(self, equip: Equipment) -> bool:
+        return equip in self._available
+
+    def isLost(self, equip: Equipment) -> bool:
+        return equip in self._lost
+
+    def getAvailable(self) -> list[Equipment]:
+        return list(self._available)
+
+    def getLost(self) -> list[Equipment]:
+        return list(self._lost)
+
+
+class SkillIndex:
+    """
+    Reverse index of skill ID -> the employees that have it and the equipment that requires it.
+    Lets skill renames / deletes only touch the objects that actually reference the skill.
+    """
+    def __init__(self) -> None:
+        self._employees: dict[str, dict[Employee, None]] = {}
+        self._equipment: dict[str, dict[Equipment, None]] = {}
+
+    def rebuild(self, employees: list[Employee], equipment: list[Equipment]) -> None:
+        self._employees = {}
+        self._equipment = {}
+        for emp in employees:
+            self.addEmployee(emp)
+        for equip in equipment:
+            self.addEquipment(equip)
+
+    def addEmployee(self, emp: Employee) -> None:
+        for skillId in emp.skillIds:
+            self._employees.setdefault(skillId, {})[emp] = None
+
+    def removeEmployee(self, emp: Employee) -> None:
+        for skillId in emp.skillIds:
+            self._discard(self._employees, skillId, emp)
+
+    def addEquipment(self, equip: Equipment) -> None:
+        for skillId in equip.skillRequirementsIDs:
+            self._equipment.setdefault(skillId, {})[equip] = None
+
+    def removeEquipment(self, equip: Equipment) -> None:
+        for skillId in equip.skillRequirementsIDs:
+            self._discard(self._equipment, skillId, equip)
+
+    def addReference(self, obj: Employee|Equipment, skillId: str) -> None:
+        table = self._employees if isinstance(obj, Employee) else self._equipment
+        table.setdefault(skillId, {})[obj] = None
+
+    def removeReference(self, obj: Employee|Equipment, skillId: str) -> None:
+        table = self._employees if isinstance(obj, Employee) else self._equipment
+        self._discard(table, skillId, obj)
+
+    def getEmployees(self, skillId: str) -> list[Employee]:
+        return list(self._employees.get(skillId, {}))
+
+    def getEquipment(self, skillId: str) -> list[Equipment]:
+        return list(self._equipment.get(skillId, {}))
+
+    def renameSkill(self, oldSkillId: str, newSkillId: str) -> None:
+        for table in (self._employees, self._equipment):
+            if oldSkillId in table:
+                table.setdefault(newSkillId, {}).update(table.pop(oldSkillId))
+
+    def dropSkill(self, skillId: str) -> None:
+        self._employees.pop(skillId, None)
+        self._equipment.pop(skillId, None)
+
+    @staticmethod
+    def _discard(table: dict, skillId: str, obj) -> None:
+        refs = table.get(skillId)
+        if refs is None:
+            return
+        refs.pop(obj, None)
+        if len(refs) == 0:
+            del table[skillId]
+
+
+class ReservationIndex:
+    """
+    Employee ID -> the equipment they're waiting for, so an employee's reservations can be listed / cancelled without
+    going through every equipment's queue. Kept in sync by Manager like SkillIndex.
+    """
+    def __init__(self) -> None:
+        self._byEmployee: dict[str, dict[Equipment, None]] = {}
+
+    def rebuild(self, equipment: list[Equipment]) -> None:
+        self._byEmployee = {}
+        for equip in equipment:
+            for empId in equip.queue:
+                self.add(empId, equip)
+
+    def add(self, empId: str, equip: Equipment) -> None:
+        self._byEmployee.setdefault(empId, {})[equip] = None
+
+    def remove(self, empId: str, equip: Equipment) -> None:
+        reserved = self._byEmployee.get(empId)
+        if reserved is None:
+            return
+        reserved.pop(equip, None)
+        if len(reserved) == 0:
+            del self._byEmployee[empId]
+
+    def getEquipment(self, empId: str) -> list[Equipment]:
+        return list(self._byEmployee.get(empId, {}))
+
+    def renameEmployee(self, oldId: str, newId: str) -> None:
+        if oldId in self._byEmployee:
+            self._byEmployee.setdefault(newId, {}).update(self._byEmployee.pop(oldId))
+
+    def removeEmployee(self, empId: str) -> list[Equipment]:  # the equipment they were waiting for
+        return list(self._byEmployee.pop(empId, {}))
+
+    def removeEquipment(self, equip: Equipment) -> None:
+        for empId in list(equip.queue):
+            self.remove(empId, equip)
+
+
+class KeyTable:
+    """
+    Maps stable internal keys to the user visible IDs of one kind of object (employees, equipment or skills).
+    Changing an ID is a single update here, anything that stored the key (like logs) doesn't need rewriting.
+    Keys of deleted objects are kept so old logs can still be resolved.
+    """
+    def __init__(self, rows: list[tuple[int, str, bool]]|None=None) -> None:
+        self._ids: dict[int, str] = {}  # key -> current ID
+        self._keys: dict[str, int] = {}  # current ID -> key (only objects that still exist)
+        self.nextKey = 0
+        if rows is not None:
+            for key, itemId, isActive in rows:
+                self._ids[key] = itemId
+                if isActive:
+                    self._keys.setdefault(itemId, key)
+                self.nextKey = max(self.nextKey, key + 1)
+
+    def assign(self, itemId: str) -> int:
+        key = self.nextKey
+        self.nextKey += 1
+        self._ids[key] = itemId
+        self._keys.setdefault(itemId, key)
+        return key
+
+    def keyOf(self, itemId: str) -> int|None:
+        return self._keys.get(itemId)
+
+    def idOf(self, key: int) -> str|None:
+        return self._ids.get(key)
+
+    def rename(self, key: int, newId: str) -> None:
+        oldId = self._ids[key]
+        if self._keys.get(oldId) == key:
+            del self._keys[oldId]
+        self._ids[key] = newId
+        self._keys.setdefault(newId, key)
+
+    def retire(self, key: int) -> None:  # object was deleted, keep the key -> ID row for history
+        itemId = self._ids.get(key)
+        if self._keys.get(itemId) == key:
+            del self._keys[itemId]
+
+    def row(self, key: int) -> tuple[int, str, bool]:
+        itemId = self._ids[key]
+        return (key, itemId, self._keys.get(itemId) == key)
+
+    def rows(self) -> list[tuple[int, str, bool]]:
+        return [(key, itemId, self._keys.get(itemId) == key) for key, itemId in self._ids.items()]
+
+
+class LazyList(MutableSequence):
+    """
+    A list that's only read from storage (by calling loader()) the first time it's used, ex: the log history.
+    """
+    def __init__(self, loader: callable) -> None:
+        self._loader = loader
+        self._items: list|None = None
+
+    def isLoaded(self) -> bool:
+        return self._items is not None
+
+    def load(self) -> list:
+        if self._items is None:
+            self._items = list(self._loader())
+            self._loader = None
+        return self._items
+
+    def __len__(self) -> int:
+        return len(self.load())
+
+    def __getitem__(self, i):
+        return self.load()[i]
+
+    def __setitem__(self, i, value) -> None:
+        self.load()[i] = value
+
+    def __delitem__(self, i) -> None:
+        del self.load()[i]
+
+    def insert(self, i: int, value) -> None:
+        self.load().insert(i, value)
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __eq__(self, other) -> bool:
+        return self.load() == (other.load() if isinstance(other, LazyList) else other)
+
+    def __repr__(self) -> str:
+        return repr(self._items) if self.isLoaded() else "LazyList(<not loaded>)"
@@ -1,9 +1,23 @@
-import mysql.connector
-from mysql.connector import Error
+# database.py - MySQL storage, lets several kiosks share one database. csv_database.py / sqlite_database.py are used otherwise.
+
+from queue import Queue
+from contextlib import contextmanager
+from dataStructures import Employee, Equipment, Skill, Log, LOG_CODES, KeyTable
+from sql_rows import LOG_COLUMNS, log_row, row_to_log
+
+try:
+    import mysql.connector
+    from mysql.connector import Error
+    from mysql.connector.constants import ClientFlag
+except ImportError:  # only needed when actually connecting to MySQL
+    mysql = None
+    Error = Exception
+    ClientFlag = None
 
 
 # Credentials for my local MySQL environment, example code to reference in other files
 # connection = create_connection("localhost", "root", "Devry123", "ceis400")
+# pool = create_pool("localhost", "root", "Devry123", "ceis400")
 
 # Function to establish a connection to the MySQL database
 def create_connection(host_name, user_name, user_password, db_name):
@@ -22,11 +36,11 @@ def create_connection(host_name, user_name, user_password, db_name):
     return connection
 
 
-# Function to execute a query
-def execute_query(connection, query):
+# Function to execute a query, values are passed separately so they're escaped by the driver
+def execute_query(connection, query, params=()):
     cursor = connection.cursor()
     try:
-        cursor.execute(query)
+        cursor.execute(query, params)
         connection.commit()
         print("Query executed successfully")
     except Error as e:
@@ -34,11 +48,11 @@ def execute_query(connection, query):
 
 
 # Function to execute a read query and fetch results
-def execute_read_query(connection, query):
+def execute_read_query(connection, query, params=()):
     cursor = connection.cursor()
     result = None
     try:
-        cursor.execute(query)
+        cursor.execute(query, params)
         result = cursor.fetchall()
         return result
     except Error as e:
@@ -50,3 +64,318 @@ def close_connection(connection):
     if connection:
         connection.close()
         print("MySQL connection closed")
+
+
+class ConnectionPool:
+    """
+    Fixed number of connections shared between threads, connections are opened the first time they're needed.
+    connect can be any function that returns a DB-API connection (sqlite3.connect works as a local stand-in for MySQL).
+    """
+    def __init__(self, connect, size: int = 5) -> None:
+        self._connect = connect
+        self.size = size
+        self._idle: Queue = Queue(maxsize=size)
+        for _ in range(size):
+            self._idle.put(None)
+
+    @contextmanager
+    def connection(self):
+        connection = self._idle.get()  # waits if every connection is in use
+        try:
+            if connection is None:
+                connection = self._connect()
+            yield connection
+        finally:
+            if connection is not None:
+                try:
+                    connection.rollback()  # ends a read left open, so the next user doesn't get its old snapshot
+                except Exception:  # broken, a new one is opened next time
+                    close_connection(connection)
+                    connection = None
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            close_connection(self._idle.get_nowait())
+
+
+def create_pool(host_name, user_name, user_password, db_name, size=5) -> ConnectionPool:
+    # FOUND_ROWS: an UPDATE counts the rows it matched, not only the ones it changed (MySQLRepository inserts when it's 0)
+    return ConnectionPool(lambda: mysql.connector.connect(host=host_name, user=user_name, passwd=user_password, database=db_name, client_flags=[ClientFlag.FOUND_ROWS]), size=size)
+
+
+# same tables as sqlite_database.SCHEMA (also in 'SQL Database creation query.txt')
+MYSQL_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS employees (
+        emp_key INT PRIMARY KEY,
+        emp_id VARCHAR(255) NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        contact_info VARCHAR(255) NOT NULL,
+        num_lost_equips INT NOT NULL DEFAULT 0,
+        is_admin BOOLEAN NOT NULL DEFAULT FALSE,
+        INDEX idx_employees_emp_id (emp_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS employee_skills (
+        emp_key INT NOT NULL,
+        position INT NOT NULL,
+        skill_id VARCHAR(255) NOT NULL,
+        PRIMARY KEY (emp_key, position),
+        INDEX idx_employee_skills_skill_id (skill_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS employee_borrowed (
+        emp_key INT NOT NULL,
+        position INT NOT NULL,
+        equip_id VARCHAR(255) NOT NULL,
+        PRIMARY KEY (emp_key, position)
+    )""",
+    """CREATE TABLE IF NOT EXISTS equipment (
+        equip_key INT PRIMARY KEY,
+        equip_id VARCHAR(255) NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        borrower_id VARCHAR(255),
+        is_lost BOOLEAN NOT NULL DEFAULT FALSE,
+        INDEX idx_equipment_equip_id (equip_id),
+        INDEX idx_equipment_borrower_id (borrower_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS equipment_skills (
+        equip_key INT NOT NULL,
+        position INT NOT NULL,
+        skill_id VARCHAR(255) NOT NULL,
+        PRIMARY KEY (equip_key, position),
+        INDEX idx_equipment_skills_skill_id (skill_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS equipment_queue (
+        equip_key INT NOT NULL,
+        position INT NOT NULL,
+        emp_id VARCHAR(255) NOT NULL,
+        PRIMARY KEY (equip_key, position)
+    )""",
+    """CREATE TABLE IF NOT EXISTS skills (
+        skill_key INT PRIMARY KEY,
+        skill_id VARCHAR(255) NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        INDEX idx_skills_skill_id (skill_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS logs (
+        log_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        date VARCHAR(32) NOT NULL,
+        emp_id VARCHAR(255) NOT NULL,
+        equip_id VARCHAR(255) NOT NULL,
+        log_code TINYINT NOT NULL,
+        notes TEXT NOT NULL,
+        emp_key INT,
+        equip_key INT,
+        INDEX idx_logs_date (date),
+        INDEX idx_logs_code_date (log_code, date),
+        INDEX idx_logs_emp_key (emp_key),
+        INDEX idx_logs_equip_key (equip_key)
+    )""",
+    """CREATE TABLE IF NOT EXISTS id_keys (
+        table_name VARCHAR(32) NOT NULL,
+        item_key INT NOT NULL,
+        item_id VARCHAR(255) NOT NULL,
+        is_active BOOLEAN NOT NULL,
+        PRIMARY KEY (table_name, item_key)
+    )"""
+]
+
+class MySQLRepository:
+    """
+    Reads and writes the Manager's data through a ConnectionPool.
+    Queries are written with '?' and converted to the driver's placeholder ('%s' for mysql.connector, '?' for sqlite3).
+    locking_reads: reads that decide a write use SELECT ... FOR UPDATE (sqlite has no row locks, its writes lock the file).
+    """
+    def __init__(self, pool: ConnectionPool, placeholder: str = "%s", locking_reads: bool = True) -> None:
+        self.pool = pool
+        self.placeholder = placeholder
+        self.locking_reads = locking_reads
+
+    def _sql(self, query: str) -> str:
+        return query.replace("?", self.placeholder)
+
+    @contextmanager
+    def transaction(self):  # everything done with the cursor is committed together or not at all
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                yield cursor
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def _execute(self, cursor, query: str, params=()) -> None:
+        cursor.execute(self._sql(query), params)
+
+    def _executemany(self, cursor, query: str, rows: list) -> None:
+        if len(rows) != 0:
+            cursor.executemany(self._sql(query), rows)
+
+    def _fetchall(self, query: str, params=()) -> list:
+        with self.transaction() as cursor:
+            self._execute(cursor, query, params)
+            return cursor.fetchall()
+
+    def create_tables(self) -> None:
+        with self.transaction() as cursor:
+            for statement in MYSQL_SCHEMA:
+                cursor.execute(statement)
+
+    # ------ employees ------
+    def save_employees(self, employees: list[Employee], removed_keys=()) -> None:
+        """
+        Saves the employees given (the ones that changed) and deletes the removed ones, row by row so employees other
+        kiosks changed are left alone. Everything needs a key (given by Manager).
+        """
+        with self.transaction() as cursor:
+            self._delete_rows(cursor, ["employees", "employee_skills", "employee_borrowed"], "emp_key", removed_keys)
+            self._write_employees(cursor, employees)
+
+    def _write_employees(self, cursor, employees: list[Employee]) -> None:
+        rows = [(emp.emp_id, emp.name, emp.password_hash, emp.contactInfo, emp.numLostEquips, emp.isAdmin, emp.key) for emp in employees]
+        new = self._update_rows(cursor, "UPDATE employees SET emp_id = ?, name = ?, password_hash = ?, contact_info = ?, num_lost_equips = ?, is_admin = ? WHERE emp_key = ?", rows)
+        self._executemany(cursor, "INSERT INTO employees (emp_id, name, password_hash, contact_info, num_lost_equips, is_admin, emp_key) VALUES (?, ?, ?, ?, ?, ?, ?)", new)
+        self._delete_rows(cursor, ["employee_skills", "employee_borrowed"], "emp_key", [emp.key for emp in employees])
+        self._executemany(cursor, "INSERT INTO employee_skills (emp_key, position, skill_id) VALUES (?, ?, ?)", [(emp.key, i, skill_id) for emp in employees for i, skill_id in enumerate(emp.skillIds)])
+        self._executemany(cursor, "INSERT INTO employee_borrowed (emp_key, position, equip_id) VALUES (?, ?, ?)", [(emp.key, i, equip_id) for emp in employees for i, equip_id in enumerate(emp.borrowedEquipIds)])
+
+    def read_employees(self) -> list[Employee]:
+        skills = self._read_lists("employee_skills", "emp_key", "skill_id")
+        borrowed = self._read_lists("employee_borrowed", "emp_key", "equip_id")
+        employees = []
+        for key, emp_id, name, password_hash, contactInfo, numLostEquips, isAdmin in self._fetchall("SELECT emp_key, emp_id, name, password_hash, contact_info, num_lost_equips, is_admin FROM employees ORDER BY emp_key"):
+            employees.append(Employee(name, password_hash, emp_id, contactInfo, borrowed.get(key, []), skills.get(key, []), numLostEquips, isAdmin=bool(isAdmin), key=key))
+        return employees
+
+    # ------ equipment ------
+    def save_equipment(self, equipment: list[Equipment], removed_keys=()) -> None:  # like save_employees
+        with self.transaction() as cursor:
+            self._delete_rows(cursor, ["equipment", "equipment_skills", "equipment_queue"], "equip_key", removed_keys)
+            self._write_equipment(cursor, equipment)
+
+    def _write_equipment(self, cursor, equipment: list[Equipment]) -> None:
+        rows = [(equip.equipId, equip.name, equip.borrower_id, equip.isLost, equip.key) for equip in equipment]
+        new = self._update_rows(cursor, "UPDATE equipment SET equip_id = ?, name = ?, borrower_id = ?, is_lost = ? WHERE equip_key = ?", rows)
+        self._executemany(cursor, "INSERT INTO equipment (equip_id, name, borrower_id, is_lost, equip_key) VALUES (?, ?, ?, ?, ?)", new)
+        self._delete_rows(cursor, ["equipment_skills", "equipment_queue"], "equip_key", [equip.key for equip in equipment])
+        self._executemany(cursor, "INSERT INTO equipment_skills (equip_key, position, skill_id) VALUES (?, ?, ?)", [(equip.key, i, skill_id) for equip in equipment for i, skill_id in enumerate(equip.skillRequirementsIDs)])
+        self._executemany(cursor, "INSERT INTO equipment_queue (equip_key, position, emp_id) VALUES (?, ?, ?)", [(equip.key, i, emp_id) for equip in equipment for i, emp_id in enumerate(equip.queue.savedItems())])
+
+    def read_equipment(self) -> list[Equipment]:
+        skills = self._read_lists("equipment_skills", "equip_key", "skill_id")
+        queues = self._read_lists("equipment_queue", "equip_key", "emp_id")
+        equipment = []
+        for key, equip_id, name, borrower_id, is_lost in self._fetchall("SELECT equip_key, equip_id, name, borrower_id, is_lost FROM equipment ORDER BY equip_key"):
+            equip = Equipment(equipId=equip_id, name=name, borrower_id=borrower_id, skillRequirementsIDs=skills.get(key, []), queue=queues.get(key, []), key=key)
+            equip.isLost = bool(is_lost)
+            equipment.append(equip)
+        return equipment
+
+    # ------ skills ------
+    def save_skills(self, skills: list[Skill], removed_keys=()) -> None:  # like save_employees
+        with self.transaction() as cursor:
+            self._delete_rows(cursor, ["skills"], "skill_key", removed_keys)
+            new = self._update_rows(cursor, "UPDATE skills SET skill_id = ?, name = ? WHERE skill_key = ?", [(skill.skillId, skill.name, skill.key) for skill in skills])
+            self._executemany(cursor, "INSERT INTO skills (skill_id, name, skill_key) VALUES (?, ?, ?)", new)
+
+    def read_skills(self) -> list[Skill]:
+        return [Skill(name=name, skillId=skill_id, key=key) for key, skill_id, name in self._fetchall("SELECT skill_key, skill_id, name FROM skills ORDER BY skill_key")]
+
+    # ------ keys ------
+    def save_keys(self, rows: list[tuple[str, int, str, bool]]) -> None:
+        # (table name, key, ID, is active) rows that changed, keys are never deleted
+        with self.transaction() as cursor:
+            new = self._update_rows(cursor, "UPDATE id_keys SET item_id = ?, is_active = ? WHERE table_name = ? AND item_key = ?", [(item_id, is_active, table_name, key) for table_name, key, item_id, is_active in rows])
+            self._executemany(cursor, "INSERT INTO id_keys (item_id, is_active, table_name, item_key) VALUES (?, ?, ?, ?)", new)
+
+    def read_keys(self) -> dict[str, KeyTable]:
+        rows: dict[str, list] = {}
+        for table_name, key, item_id, is_active in self._fetchall("SELECT table_name, item_key, item_id, is_active FROM id_keys ORDER BY table_name, item_key"):
+            rows.setdefault(table_name, []).append((key, item_id, bool(is_active)))
+        return {table_name: KeyTable(table_rows) for table_name, table_rows in rows.items()}
+
+    # ------ logs ------
+    def append_logs(self, logs: list[Log]) -> None:
+        with self.transaction() as cursor:
+            self._executemany(cursor, f"INSERT INTO logs ({LOG_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", [log_row(log) for log in logs])
+
+    def stream_logs(self, batch_size: int = 1000):
+        """
+        Yields the logs oldest first without loading them all at once.
+        mysql.connector cursors are unbuffered by default, so rows come from the server batch_size at a time.
+        """
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(f"SELECT {LOG_COLUMNS} FROM logs ORDER BY log_id")
+                while len(rows := cursor.fetchmany(batch_size)) != 0:
+                    for row in rows:
+                        yield row_to_log(row)
+            finally:
+                while len(cursor.fetchmany(batch_size)) != 0:  # stopped early, the unbuffered rows have to be read off first
+                    pass
+                cursor.close()
+                connection.rollback()  # only read, ends the snapshot before the connection goes back to the pool
+
+    def read_logs(self) -> list[Log]:
+        return list(self.stream_logs())
+
+    def save_transaction(self, log: Log, equip: Equipment, emp: Employee) -> bool:
+        """
+        Saves a check-in / check-out / lost report as one transaction: the equipment row, the employee row and the log.
+        Returns False (and saves nothing) if it's a check-out and another kiosk already checked the equipment out.
+        """
+        with self.transaction() as cursor:
+            if log.logCode == LOG_CODES.CHECKOUT:
+                self._execute(cursor, "UPDATE equipment SET borrower_id = ?, is_lost = ? WHERE equip_key = ? AND (borrower_id IS NULL OR borrower_id = '')", (equip.borrower_id, equip.isLost, equip.key))
+                if cursor.rowcount == 0:
+                    if (row:=self._fetch_equipment_row(cursor, equip)) is None:  # added since the last save
+                        self._write_equipment(cursor, [equip])
+                    elif row[0] not in [None, '', equip.borrower_id]:
+                        return False  # leaving the with block without an error commits nothing since nothing changed
+            else:
+                self._execute(cursor, "UPDATE equipment SET borrower_id = ?, is_lost = ? WHERE equip_key = ?", (equip.borrower_id, equip.isLost, equip.key))
+                if cursor.rowcount == 0:
+                    self._write_equipment(cursor, [equip])
+            self._execute(cursor, "UPDATE employees SET num_lost_equips = ? WHERE emp_key = ?", (emp.numLostEquips, emp.key))
+            if cursor.rowcount == 0:
+                self._write_employees(cursor, [emp])
+            else:
+                self._execute(cursor, "DELETE FROM employee_borrowed WHERE emp_key = ?", (emp.key,))
+                self._executemany(cursor, "INSERT INTO employee_borrowed (emp_key, position, equip_id) VALUES (?, ?, ?)", [(emp.key, i, equip_id) for i, equip_id in enumerate(emp.borrowedEquipIds)])
+            self._execute(cursor, f"INSERT INTO logs ({LOG_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", log_row(log))
+        return True
+
+    def read_equipment_status(self, equip: Equipment) -> tuple[str|None, bool]:
+        # (borrower ID, is lost) as saved right now, ex: after another kiosk checked it out first
+        with self.transaction() as cursor:
+            row = self._fetch_equipment_row(cursor, equip)
+        return (equip.borrower_id, equip.isLost) if row is None else (row[0], bool(row[1]))
+
+    def _update_rows(self, cursor, query: str, rows: list) -> list:  # the rows that matched nothing, to be inserted
+        missing = []
+        for row in rows:
+            self._execute(cursor, query, row)
+            if cursor.rowcount == 0:
+                missing.append(row)
+        return missing
+
+    def _delete_rows(self, cursor, tables: list[str], key_column: str, keys) -> None:
+        keys = [(key,) for key in keys]
+        for table in tables:
+            self._executemany(cursor, f"DELETE FROM {table} WHERE {key_column} = ?", keys)
+
+    def _fetch_equipment_row(self, cursor, equip: Equipment) -> tuple|None:  # (borrower ID, is lost), None if it isn't saved
+        # locked, so it sees the row as saved right now (not an older snapshot) and no one changes it before the commit
+        self._execute(cursor, "SELECT borrower_id, is_lost FROM equipment WHERE equip_key = ?" + (" FOR UPDATE" if self.locking_reads else ""), (equip.key,))
+        return cursor.fetchone()
+
+    def _read_lists(self, table: str, key_column: str, value_column: str) -> dict[int, list[str]]:
+        lists: dict[int, list[str]] = {}
+        for key, value in self._fetchall(f"SELECT {key_column}, {value_column} FROM {table} ORDER BY {key_column}, position"):
+            lists.setdefault(key, []).append(value)
+        return lists
+
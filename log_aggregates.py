@@ -0,0 +1,41 @@
+# log_aggregates.py - report numbers kept up to date as each log is added, so reports don't have to go through the logs.
+
+from datetime import datetime
+from dataStructures import Log, LOG_CODES
+from log_index import LogTimeIndex
+
+
+class LogAggregates:
+    """
+    Number of logs per log code, updated by add() in O(1), plus a LogTimeIndex for date ranges. Reports read them with
+    countCode() / datesOf() like they would LogArrays.
+    """
+    def __init__(self, logs=()) -> None:
+        self.codeCounts: dict[LOG_CODES, int] = {}
+        self.timeIndex = LogTimeIndex()
+        logs = list(logs)
+        for log in logs:
+            self._tally(log)
+        self.timeIndex.extend(logs)  # looks up each code once instead of once per log
+
+    def __len__(self) -> int:
+        return sum(self.codeCounts.values())
+
+    def add(self, log: Log) -> None:
+        self._tally(log)
+        self.timeIndex.add(log)
+
+    def _tally(self, log: Log) -> None:
+        code = log.logCode
+        self.codeCounts[code] = self.codeCounts.get(code, 0) + 1
+
+    # ------ reports ------
+    def countCode(self, logCode: LOG_CODES) -> int:
+        return self.codeCounts.get(logCode, 0)
+
+    def datesOf(self, logCode: LOG_CODES, start_date: datetime|None=None, end_date: datetime|None=None) -> list[datetime]:
+        # in the order the logs were added, like filtering the logs would give
+        return self.timeIndex.datesOf(logCode, start_date, end_date)
+
+    def countBetween(self, logCode: LOG_CODES, start_date: datetime|None=None, end_date: datetime|None=None) -> int:
+        return self.timeIndex.countBetween(logCode, start_date, end_date)
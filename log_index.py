@@ -0,0 +1,105 @@
+# log_index.py - log dates of each code kept in date order so date range queries are a couple of bisects.
+
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from operator import itemgetter
+from datetime import datetime
+from dataStructures import Log, LOG_CODES
+
+_ADDED = itemgetter(0)
+
+
+class LogTimeIndex:
+    """
+    For each log code, its log dates sorted to bisect, and the order they were added in. datesOf() / countBetween()
+    find a date range in O(log n), datesOf() returns its k dates in the order they were added.
+    Logs that come in date order (the normal case, each is newer than the last of its code) are appended, so their
+    ranges are already in the order they were added, O(k).
+    Logs older than the newest of their code (ex: imported) are put aside in O(1) and sorted in with the code's other
+    late logs at its next query. Ranges merge in the late dates they contain by when they were added, so only those get
+    sorted (O(k + j log j) for j late logs).
+    """
+    def __init__(self, logs=()) -> None:
+        # code -> (dates, when each was added (0, 1, 2, ...)), same positions in both
+        self._runs: dict[LOG_CODES, tuple[list[datetime], array]] = {}  # in date order and added order
+        self._late: dict[LOG_CODES, tuple[list[datetime], array]] = {}  # in date order
+        self._pending: dict[LOG_CODES, list[tuple[datetime, int]]] = {}  # late dates not sorted into _late yet
+        self._count = 0
+        self.extend(logs)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _run(self, code: LOG_CODES) -> tuple[list, array]:
+        if code not in self._runs:
+            self._runs[code] = ([], array("q"))
+        return self._runs[code]
+
+    def add(self, log: Log) -> None:
+        dates, added = self._run(log.logCode)
+        if len(dates) == 0 or dates[-1] <= log.date:
+            dates.append(log.date)
+            added.append(self._count)
+        else:  # older than the newest log of its code
+            self._pending.setdefault(log.logCode, []).append((log.date, self._count))
+        self._count += 1
+
+    def extend(self, logs) -> None:
+        # same as add() for each, with each code's lists looked up once
+        count = self._count
+        runs = {}  # code -> [its lists, its newest date]
+        for log in logs:
+            code, date = log.logCode, log.date
+            if (entry:=runs.get(code)) is None:
+                run = self._run(code)
+                entry = runs[code] = [run, run[0][-1] if run[0] else None]
+            if entry[1] is not None and date < entry[1]:
+                self._pending.setdefault(code, []).append((date, count))
+            else:
+                dates, added = entry[0]
+                dates.append(date)
+                added.append(count)
+                entry[1] = date
+            count += 1
+        self._count = count
+
+    def _lateRun(self, code: LOG_CODES) -> tuple[list, array]|None:
+        # the code's late dates, with the pending ones merged in (same dates keep the order they were added)
+        if (pending:=self._pending.pop(code, None)) is not None:
+            pending.sort()
+            dates, added = self._late.get(code, ([], array("q")))
+            merged = list(merge(zip(dates, added), pending))
+            self._late[code] = ([entry[0] for entry in merged], array("q", (entry[1] for entry in merged)))
+        return self._late.get(code)
+
+    # ------ queries ------
+    @staticmethod
+    def _range(dates: list[datetime], start_date: datetime|None, end_date: datetime|None) -> tuple[int, int]:
+        start = 0 if start_date is None else bisect_left(dates, start_date)
+        end = len(dates) if end_date is None else bisect_right(dates, end_date)
+        return start, max(start, end)
+
+    def countBetween(self, logCode: LOG_CODES, start_date: datetime|None=None, end_date: datetime|None=None) -> int:
+        if logCode not in self._runs:
+            return 0
+        start, end = self._range(self._runs[logCode][0], start_date, end_date)
+        if (late:=self._lateRun(logCode)) is not None:
+            lateStart, lateEnd = self._range(late[0], start_date, end_date)
+            end += lateEnd - lateStart
+        return end - start
+
+    def datesOf(self, logCode: LOG_CODES, start_date: datetime|None=None, end_date: datetime|None=None) -> list[datetime]:
+        """
+        Dates of the logs with the code from start_date to end_date (inclusive, None = no limit), in the order they
+        were added.
+        """
+        if logCode not in self._runs:
+            return []
+        dates, added = self._runs[logCode]
+        start, end = self._range(dates, start_date, end_date)
+        if (late:=self._lateRun(logCode)) is None or (lateRange:=self._range(late[0], start_date, end_date))[0] == lateRange[1]:
+            return dates[start:end]
+        lateStart, lateEnd = lateRange  # only the late ones need sorting, the rest are in order already
+        lateDates = sorted(zip(late[1][lateStart:lateEnd], late[0][lateStart:lateEnd]))
+        return [date for _, date in merge(zip(added[start:end], dates[start:end]), lateDates, key=_ADDED)]
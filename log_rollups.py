@@ -0,0 +1,183 @@
+# log_rollups.py - old logs folded into per day counts so reports don't have to go through every log ever made.
+
+import csv
+import gzip
+import shutil
+from os import path, remove, fsync
+from datetime import datetime
+from dataStructures import Log, LOG_CODES, LazyList
+from csv_database import LOG_HEADER, _log_to_row, atomic_open, encode_log_date, decode_log_date, fileExits, stream_logs_from_csv, tarnslateLogCode
+
+ROLLUP_HEADER = ["Day", "Emp ID", "Equip ID", "Logcode", "Emp Key", "Equip Key", "Count"]
+
+
+def day_of(date: datetime) -> datetime:
+    return datetime(date.year, date.month, date.day)
+
+
+class LogRollups:
+    """
+    Number of logs per (day, employee, equipment, log code) for every log before `horizon`.
+    A rolled up log only keeps its day, so it counts as happening at midnight of that day.
+    """
+    def __init__(self, horizon: datetime|None=None, archiveEnd: int|None=None) -> None:
+        self.horizon = horizon  # logs before this are in here, newer ones are still raw logs (None = nothing rolled up)
+        self.archiveEnd = archiveEnd  # size of the archive once the logs before horizon were added to it (None = unknown)
+        self.counts: dict[tuple, int] = {}  # (day, empId, equipId, logCode, empKey, equipKey) -> count
+        self._size = 0
+
+    def add(self, log: Log, count: int=1) -> None:
+        self._addCount((day_of(log.date), log.empId, log.equipId, log.logCode, log.empKey, log.equipKey), count)
+
+    def _addCount(self, key: tuple, count: int) -> None:
+        self.counts[key] = self.counts.get(key, 0) + count
+        self._size += count
+
+    def _buckets(self, start_date: datetime|None=None, end_date: datetime|None=None, logCodes: list[LOG_CODES]|None=None):
+        for key, count in self.counts.items():
+            day, _, _, logCode = key[:4]
+            if (start_date is None or day >= start_date) and (end_date is None or day <= end_date) and (logCodes is None or logCode in logCodes):
+                yield key, count
+
+    def countCode(self, logCode: LOG_CODES, start_date: datetime|None=None, end_date: datetime|None=None) -> int:
+        return sum(count for _, count in self._buckets(start_date, end_date, [logCode]))
+
+    def logs(self, start_date: datetime|None=None, end_date: datetime|None=None, logCodes: list[LOG_CODES]|None=None):
+        # Log objects standing in for the rolled up ones, in day order
+        for (day, empId, equipId, logCode, empKey, equipKey), count in sorted(self._buckets(start_date, end_date, logCodes), key=lambda item: item[0][0]):
+            for _ in range(count):
+                yield Log(date=day, empId=empId, equipId=equipId, logCode=logCode, notes=[], empKey=empKey, equipKey=equipKey)
+
+    def __len__(self) -> int:
+        return self._size
+
+
+def write_rollups_to_csv(rollups: LogRollups, filename):
+    with atomic_open(filename) as file:
+        writer = csv.writer(file)
+        writer.writerow(["Horizon", encode_log_date(rollups.horizon) if rollups.horizon else "", "Archive End", "" if rollups.archiveEnd is None else rollups.archiveEnd])
+        writer.writerow(ROLLUP_HEADER)
+        for (day, empId, equipId, logCode, empKey, equipKey), count in rollups.counts.items():
+            writer.writerow([encode_log_date(day), empId, equipId, tarnslateLogCode(logCode), "" if empKey is None else empKey, "" if equipKey is None else equipKey, count])
+
+
+def read_rollups_from_csv(filename) -> LogRollups:
+    if not fileExits(filename):
+        return LogRollups()
+    with open(filename, 'r', newline='') as file:
+        reader = csv.reader(file)
+        row = next(reader) + ["", "", ""]  # older files don't have the archive end
+        horizon, archive_end = row[1], row[3]
+        rollups = LogRollups(decode_log_date(horizon) if horizon else None, int(archive_end) if archive_end else None)
+        next(reader)  # Skip the header row
+        for day, empId, equipId, logCode, empKey, equipKey, count in reader:
+            rollups._addCount((decode_log_date(day), empId, equipId, tarnslateLogCode(int(logCode)), int(empKey) if empKey else None, int(equipKey) if equipKey else None), int(count))
+    return rollups
+
+
+def compact_logs(logs_filename, rollups_filename, horizon: datetime, archive_filename=None) -> int:
+    """
+    Folds the logs before horizon (rounded down to a day) into the rollups file and rewrites the logs file with the rest.
+    The raw logs that were folded are appended to archive_filename (gzipped csv) if given. Returns how many were folded.
+    Steps, so a crash part way through doesn't count or archive anything twice:
+    the archive is cut back to the size saved in the rollups and the folded logs are added as a new gzip member, then
+    the rollups (with the new horizon and archive size) are saved, then the logs file is replaced. Logs older than the
+    rollups' horizon are ignored when reading.
+    """
+    horizon = day_of(horizon)
+    rollups = read_rollups_from_csv(rollups_filename)
+    if rollups.horizon is not None and rollups.horizon >= horizon:
+        return 0
+    compacted = 0
+    part_filename = f"{archive_filename}.part"
+    archive = gzip.open(part_filename, 'wt', newline='') if archive_filename is not None else None  # this compaction's gzip member
+    try:
+        with atomic_open(logs_filename) as tail:
+            writer = csv.writer(tail)
+            writer.writerow(LOG_HEADER)
+            archive_start = None
+            if archive is not None:  # a compaction that crashed before saving its rollups may have added to it already
+                archive_start = rollups.archiveEnd if rollups.archiveEnd is not None else (path.getsize(archive_filename) if fileExits(archive_filename) else 0)
+                if archive_start == 0:
+                    csv.writer(archive).writerow(LOG_HEADER)
+            for log in stream_logs_from_csv(logs_filename):
+                if rollups.horizon is not None and log.date < rollups.horizon:  # already rolled up (crash after saving the rollups)
+                    continue
+                if log.date < horizon:
+                    rollups.add(log)
+                    compacted += 1
+                    if archive is not None:
+                        csv.writer(archive).writerow(_log_to_row(log))
+                else:
+                    writer.writerow(_log_to_row(log))
+            if archive is not None:
+                archive.close()
+                archive = None
+                rollups.archiveEnd = _append_member(archive_filename, part_filename, archive_start)
+            rollups.horizon = horizon
+            write_rollups_to_csv(rollups, rollups_filename)  # then the logs file is replaced when the with block ends
+    finally:
+        if archive is not None:
+            archive.close()
+        if archive_filename is not None and fileExits(part_filename):
+            remove(part_filename)
+    return compacted
+
+
+def _append_member(archive_filename, part_filename, start: int) -> int:
+    # archive_filename cut to start bytes then part_filename added to it, returns the new size
+    with open(archive_filename, 'ab') as archive:
+        archive.truncate(start)
+        with open(part_filename, 'rb') as part:
+            shutil.copyfileobj(part, archive)
+        archive.flush()
+        fsync(archive.fileno())
+        return archive.tell()
+
+
+class CompactedLogs:
+    """
+    Rollups of the old logs plus the recent raw logs (the tail), looped over / counted / filtered like one list of logs.
+    countCode() goes through the rollup buckets instead of every old log.
+    """
+    def __init__(self, rollups: LogRollups, tail, start_date: datetime|None=None, end_date: datetime|None=None, logCodes: list[LOG_CODES]|None=None) -> None:
+        self.rollups = rollups
+        self.tail = tail  # list (or LazyList) of the logs that aren't rolled up
+        self.start_date = start_date
+        self.end_date = end_date
+        self.logCodes = logCodes
+
+    def _tail(self, logCodes: list[LOG_CODES]|None):
+        horizon = self.rollups.horizon
+        for log in self.tail:
+            if horizon is not None and log.date < horizon:  # left over from a compaction that didn't finish, already counted
+                continue
+            if (self.start_date is None or log.date >= self.start_date) and (self.end_date is None or log.date <= self.end_date) and (logCodes is None or log.logCode in logCodes):
+                yield log
+
+    def __iter__(self):
+        yield from self.rollups.logs(self.start_date, self.end_date, self.logCodes)
+        yield from self._tail(self.logCodes)
+
+    def __len__(self) -> int:
+        if self.start_date is None and self.end_date is None and self.logCodes is None:
+            return len(self.rollups) + len(self.tail)  # the tail doesn't have logs from before the horizon (see Manager)
+        return sum(count for _, count in self.rollups._buckets(self.start_date, self.end_date, self.logCodes)) + sum(1 for _ in self._tail(self.logCodes))
+
+    def filter(self, start_date: datetime|None=None, end_date: datetime|None=None, logCodes: list[LOG_CODES]|None=None) -> 'CompactedLogs':
+        if self.start_date is not None and (start_date is None or self.start_date > start_date):
+            start_date = self.start_date
+        if self.end_date is not None and (end_date is None or self.end_date < end_date):
+            end_date = self.end_date
+        if self.logCodes is not None:
+            logCodes = self.logCodes if logCodes is None else [code for code in logCodes if code in self.logCodes]
+        return CompactedLogs(self.rollups, self.tail, start_date, end_date, logCodes)
+
+    def countCode(self, logCode: LOG_CODES) -> int:
+        if self.logCodes is not None and logCode not in self.logCodes:
+            return 0
+        return self.rollups.countCode(logCode, self.start_date, self.end_date) + sum(1 for _ in self._tail([logCode]))
+
+    def append(self, log: Log) -> None:
+        if not isinstance(self.tail, LazyList) or self.tail.isLoaded():  # otherwise it's read from storage with the rest
+            self.tail.append(log)
@@ -1,15 +1,39 @@
 from GUI import GUI
 from hashlib import sha256
-from dataStructures import Employee, Equipment, Skill, Log, LOG_CODES
-from datetime import datetime
+from dataStructures import Employee, Equipment, Skill, Log, LOG_CODES, IDRegistry, AvailabilityIndex, SkillIndex, ReservationIndex, KeyTable, ChangeTracker, LazyList
+from datetime import datetime, timedelta
+from contextlib import nullcontext
 from csv_database import *
+from sqlite_database import *
+from database import MySQLRepository, ConnectionPool, create_pool
+from columnar_logs import ColumnarLogs, open_columnar_logs
+from partitioned_logs import PartitionedLogs, open_partitioned_logs
+from log_rollups import CompactedLogs, compact_logs, read_rollups_from_csv
+from background_saver import BackgroundSaver, AutosaveSchedule
+from skill_bitmasks import SkillBitmasks
+from log_aggregates import LogAggregates
+from snapshot_cache import read_snapshot_cache, write_snapshot_cache, is_snapshot_cache_valid
+
+CSV_FILES = {"employees": "employees.csv", "equipment": "equipment.csv", "skills": "skills.csv", "logs": "logs.csv", "keys": "keys.csv"}
+CACHED_TABLES = ["employees", "equipment", "skills", "keys"]  # the logs are loaded lazily so they aren't cached
+SNAPSHOT_CACHE_FILE = "tables.cache"
 
 def hash(text):
     return sha256(text.encode('utf-8')).hexdigest()
 
 class Manager:
-    def __init__(self, checkoutLimit=1, lostLimit=3, equipment=None, employees=None, termEmployees=None, skills=None, logs=None) -> None:
+    def __init__(self, checkoutLimit=1, lostLimit=3, equipment=None, employees=None, termEmployees=None, skills=None, logs=None, storage="csv", db_filename="equipment_checkout.db", mysql_config: dict|None=None, columnar_logs=False, autosave_interval: float|None=120, autosave_every: int|None=10, load_workers: int|None=None, log_partitions: str|None=None, compress_logs_after_days: int|None=None, compact_logs_after_days: int|None=None, archive_compacted_logs=True) -> None:
         self.window = GUI(self)
+        self.storage = storage  # "csv", "sqlite" or "mysql" (mysql_config has the create_pool arguments)
+        self.columnar_logs = columnar_logs  # csv storage only: keep the logs in the binary columnar store (needs numpy)
+        self.log_partitions = log_partitions  # csv storage only: "month" or "day" to split the logs into one file per month / day
+        self.compress_logs_after_days = compress_logs_after_days  # gzip log partitions older than this (None = never)
+        self.compact_logs_after_days = compact_logs_after_days  # logs.csv only: fold older logs into per day counts (None = never)
+        self.archive_compacted_logs = archive_compacted_logs  # keep the folded logs in logs_archive.csv.gz
+        self.load_workers = load_workers  # processes used to parse big csv files, None = one per cpu
+        self._db = None
+        self._repository: MySQLRepository|None = None
+        self._sqliteRows: MySQLRepository|None = None  # sqlite storage: writes the changed rows on the save thread
 
         self.checkoutLimit = checkoutLimit
         self.lostLimit = lostLimit
@@ -34,38 +58,318 @@ class Manager:
             logs: list[Log] = []
         self.logs = logs
 
+        # ID -> object lookups, kept in sync with the lists above
+        self._employeeRegistry = IDRegistry("emp_id")
+        self._equipmentRegistry = IDRegistry("equipId")
+        self._skillRegistry = IDRegistry("skillId")
+        self._availability = AvailabilityIndex()  # available / lost equipment, updated on every checkout, check in, etc.
+        self._skillIndex = SkillIndex()  # skill ID -> employees / equipment referencing it
+        self._skillBits = SkillBitmasks()  # skills as bits for eligibility checks
+        self._reservations = ReservationIndex()  # employee ID -> equipment they're in the queue for
+        # internal key <-> user visible ID, so ID changes don't have to rewrite the logs
+        self._keyTables = {"employees": KeyTable(), "equipment": KeyTable(), "skills": KeyTable()}
+        self._changes = ChangeTracker()  # tables that need saving
+        self._saver = BackgroundSaver()  # writes the saves so the window doesn't freeze
+        self._autosave = AutosaveSchedule(interval=autosave_interval, every=autosave_every)  # seconds / transactions, None = off
+        self._rowCopies: dict[str, dict] = {}  # table -> key -> copy of the row from the last csv save
+        self._logAggregates: LogAggregates|None = None  # report counts, made the first time a report is run then kept up to date
+
         self.current_user = None
 
-        if any([not fileExits(x) for x in ["employees.csv", 'equipment.csv', 'skills.csv', 'logs.csv']]):
+        if self.storage == "sqlite":
+            self._db = create_connection(db_filename)  # creates the tables if needed
+            # same tables as mysql, with its own connection (the pool only hands it to one thread at a time)
+            self._sqliteRows = MySQLRepository(ConnectionPool(lambda: sqlite3.connect(db_filename, check_same_thread=False), size=1), placeholder="?", locking_reads=False)
+        elif self.storage == "mysql":
+            self._repository = MySQLRepository(create_pool(**mysql_config))
+            self._repository.create_tables()
+        elif any([not fileExits(x) for x in ["employees.csv", 'equipment.csv', 'skills.csv', 'logs.csv']]):
             self.save_data_to_csv()
-        self.load_data_from_csv()  # Load data from CSV files when the Manager instance is created/called
+        self.load_data()  # Load data from storage when the Manager instance is created/called
         if len(self.employees) == 0:
-            self.employees = [Employee(name="admin", password_hash=hash("admin"), emp_id="admin", contactInfo="", isAdmin=True)] # default user
+            self.addEmployee(Employee(name="admin", password_hash=hash("admin"), emp_id="admin", contactInfo="", isAdmin=True)) # default user
 
+        if self._autosave.intervalMs() is not None:
+            self.window.after(self._autosave.intervalMs(), self._autosave_tick)
         self.window.mainloop()
+        self._saver.wait()  # the window waits for saves before closing, this is just in case
+        self._saver.close()
+        self.compactLogs()  # not while loading, it reads all of logs.csv
+        close_connection(self._db)
+        for repository in (self._repository, self._sqliteRows):
+            if repository is not None:
+                repository.pool.close()
+
+    def load_data(self):
+        if self.storage == "sqlite":
+            self.load_data_from_sqlite()
+        elif self.storage == "mysql":
+            self.load_data_from_mysql()
+        else:
+            self.load_data_from_csv()
+
+    def save_data(self, cache: bool=False):
+        """
+        Copies the changed tables and writes them on the background thread, the GUI polls finishSaves() for the result.
+        cache: also update the csv snapshot cache afterwards (done when closing) so the next startup can skip parsing.
+        """
+        self._autosave.saved()
+        tables = self._tables_to_save()
+        cache = cache and self.storage == "csv" and (len(tables) > 0 or not is_snapshot_cache_valid(SNAPSHOT_CACHE_FILE, self._cache_sources()))
+        if len(tables) == 0 and not cache:
+            return
+        snapshot = self._row_snapshot(tables, self._changes) if self.storage in ("sqlite", "mysql") else self._snapshot(tables, self._changes)
+        cached = self._snapshot(set(CACHED_TABLES) - tables, self._changes) | {table: snapshot[table] for table in CACHED_TABLES if table in snapshot} if cache else None
+        changes = self._changes.take()
+        write = {"sqlite": self.write_snapshot_to_sqlite, "mysql": self.write_snapshot_to_mysql}.get(self.storage, self.write_snapshot_to_csv)
+
+        def job():
+            write(snapshot)
+            if cached is not None:  # after the csv files so it's keyed to the new versions of them
+                write_snapshot_cache(SNAPSHOT_CACHE_FILE, self._cache_sources(), cached)
+        self._saver.submit(job, tag=(tables, changes))
+
+    @staticmethod
+    def _cache_sources() -> list[str]:
+        return [CSV_FILES[table] for table in CACHED_TABLES]
+
+    def autosave(self) -> None:
+        # only copies the tables that changed, the writing happens in the background so checkouts aren't held up
+        if self.isSaving() or not self.hasUnsavedChanges():  # the last save is still being written, try again later
+            return
+        self.save_data()
+
+    def _deferred_autosave(self):
+        self._autosave.ran()
+        self.autosave()
+
+    def _autosave_tick(self):
+        self.autosave()
+        self.window.after(self._autosave.intervalMs(), self._autosave_tick)
+
+    def finishSaves(self) -> list[str]:
+        # called from the GUI thread, returns an error message for each background save that failed
+        errors = []
+        for (tables, changes), error in self._saver.poll():
+            if error is not None:
+                self._changes.merge(changes)  # saved again next time
+                errors.append(f"Saving {', '.join(sorted(tables))} failed:\n{error}")
+        return errors
+
+    def isSaving(self) -> bool:
+        return self._saver.isBusy()
+
+    def hasUnsavedChanges(self) -> bool:
+        return len(self._changes.dirty) > 0
+
+    def _tables_to_save(self) -> set[str]:
+        tables = set(self._changes.dirty)
+        if self.storage == "csv":  # and files that don't exist yet
+            tables.update(table for table, filename in CSV_FILES.items() if not fileExits(filename))
+        if self.storage != "csv" or self._has_log_store():  # the logs are already saved as they happen
+            tables.discard("logs")
+        return tables
+
+    def _snapshot(self, tables: set[str], changes: ChangeTracker) -> dict:
+        # copies taken on the GUI thread, so the save thread never reads objects that are being changed
+        snapshot = {}
+        for table, items in (("employees", self.employees), ("equipment", self.equipment), ("skills", self.skills)):
+            if table in tables:
+                snapshot[table] = self._copy_rows(table, items, changes)
+        if "logs" in tables:
+            snapshot["logs"] = list(self.logs)
+        if "keys" in tables:
+            snapshot["keys"] = {name: KeyTable(table.rows()) for name, table in self._keyTables.items()}
+        return snapshot
+
+    def _copy_rows(self, table: str, items: list, changes: ChangeTracker) -> list:
+        # csv writes whole tables, but only the rows changed since the last save are copied again, the rest reuse the
+        # copies made then (they're never changed, the save thread can keep reading them)
+        keys = changes.changedRows(table)
+        if keys is None or table not in self._rowCopies:
+            self._rowCopies[table] = {}
+        copies = self._rowCopies[table]
+        for key in changes.removed.get(table, ()):
+            copies.pop(key, None)
+        rows = []
+        for item in items:
+            if keys is not None and item.key is not None and item.key not in keys and (copy:=copies.get(item.key)) is not None:
+                rows.append(copy)
+            else:
+                rows.append(copy:=item.snapshot())
+                if item.key is not None:
+                    copies[item.key] = copy
+        return rows
+
+    def _row_snapshot(self, tables: set[str], changes: ChangeTracker) -> dict:
+        # like _snapshot, but only the rows that changed and the keys of the deleted ones (sqlite / mysql save row by row)
+        snapshot = {"removed": {table: set(keys) for table, keys in changes.removed.items()}}
+        for table, items in (("employees", self.employees), ("equipment", self.equipment), ("skills", self.skills)):
+            if table in tables:
+                keys = changes.changedRows(table)
+                snapshot[table] = [item.snapshot() for item in items if keys is None or item.key in keys]
+        if "keys" in tables:
+            keys = changes.changedRows("keys")  # (table name, key)
+            snapshot["keys"] = [(name, *row) for name, table in self._keyTables.items() for row in table.rows() if keys is None or (name, row[0]) in keys]
+        return snapshot
 
 
     def load_data_from_csv(self):
-        self.employees = read_employees_from_csv("employees.csv")
-        self.equipment = read_equipment_from_csv("equipment.csv")
-        self.skills = read_skills_from_csv("skills.csv")
-        self.logs = read_logs_from_csv('logs.csv')
+        self._changes.clear()
+        tables = read_snapshot_cache(SNAPSHOT_CACHE_FILE, self._cache_sources())  # None if the csv files changed since
+        if tables is None:  # the tables don't depend on each other, big ones are parsed at the same time
+            tables = read_tables_from_csv({table: CSV_FILES[table] for table in CACHED_TABLES if fileExits(CSV_FILES[table])}, workers=self.load_workers)
+        self.employees, self.equipment, self.skills = tables["employees"], tables["equipment"], tables["skills"]
+        self._keyTables.update(tables.get("keys", {}))  # older data doesn't have keys.csv
+        self._attach_keys()
+        if fileExits('logs.csv') and not logs_have_keys('logs.csv'):
+            self._migrate_csv_logs('logs.csv')
+        if self.columnar_logs:
+            self.logs = open_columnar_logs('logs_store', import_from='logs.csv', backfill=self._backfill_log_keys)  # memory mapped, nothing is read yet
+        elif self.log_partitions is not None:
+            self.logs = open_partitioned_logs('logs_partitions', self.log_partitions, import_from='logs.csv', backfill=self._backfill_log_keys)  # streamed, only the partitions a report needs
+            if self.compress_logs_after_days is not None:
+                self.logs.compress(older_than=datetime.now() - timedelta(days=self.compress_logs_after_days))
+        else:
+            rollups = read_rollups_from_csv('rollups.csv') if fileExits('rollups.csv') else None
+            self.logs = LazyList(lambda: self._read_csv_logs(None if rollups is None else rollups.horizon))  # read the first time a report needs them
+            if rollups is not None:  # reports see the rollups and the raw logs as one list
+                self.logs = CompactedLogs(rollups, self.logs)
         # Load other data from CSV files if and as needed
+        self._finish_loading()
+
+    def _read_csv_logs(self, horizon: datetime|None) -> list[Log]:
+        logs = read_logs_from_csv_parallel('logs.csv', workers=self.load_workers)
+        if horizon is not None and any(log.date < horizon for log in logs):  # left over from a compaction that didn't finish
+            logs = [log for log in logs if log.date >= horizon]
+        return self._backfill_log_keys(logs)
+
+    def compactLogs(self) -> int:
+        """
+        Folds the csv logs older than compact_logs_after_days into rollups.csv. Rewrites logs.csv, so it runs when
+        nothing can be appending to it (after the window is closed). At most once a day, the horizon moves a day at a time.
+        """
+        if self.storage != "csv" or self._has_log_store() or self.compact_logs_after_days is None or not fileExits('logs.csv'):
+            return 0
+        return compact_logs('logs.csv', 'rollups.csv', datetime.now() - timedelta(days=self.compact_logs_after_days), 'logs_archive.csv.gz' if self.archive_compacted_logs else None)
+
+    def _migrate_csv_logs(self, filename):
+        # once, for files from before the key columns: the keys are matched by ID now, before any ID can be changed
+        write_logs_to_csv(self._backfill_log_keys(read_logs_from_csv(filename)), filename)
+
+    def load_data_from_sqlite(self):
+        self._changes.clear()
+        self.employees = read_employees_from_sqlite(self._db)
+        self.equipment = read_equipment_from_sqlite(self._db)
+        self.skills = read_skills_from_sqlite(self._db)
+        self.logs = LazyList(lambda: self._backfill_log_keys(read_logs_from_sqlite(self._db)))
+        self._keyTables.update(read_keys_from_sqlite(self._db))
+        self._attach_keys()
+        self._finish_loading()
+
+    def load_data_from_mysql(self):
+        self._changes.clear()
+        self.employees = self._repository.read_employees()
+        self.equipment = self._repository.read_equipment()
+        self.skills = self._repository.read_skills()
+        self.logs = LazyList(lambda: self._backfill_log_keys(self._repository.read_logs()))
+        self._keyTables.update(self._repository.read_keys())
+        self._attach_keys()
+        self._finish_loading()
+
+    def _finish_loading(self):  # after _attach_keys()
+        self._rebuild_registries()
+        for item in self.employees + self.equipment + self.skills:
+            item.track(self._changes)
+
+    def _attach_keys(self):
+        for items, table_name, id_attr in ((self.employees, "employees", "emp_id"),
+                                           (self.equipment, "equipment", "equipId"),
+                                           (self.skills, "skills", "skillId")):
+            table = self._keyTables[table_name]
+            claimed = set()
+            for item in items:
+                item_id = getattr(item, id_attr)
+                if item.key is not None and table.idOf(item.key) == item_id: # already has its key (sqlite rows store it)
+                    key = item.key
+                else:
+                    key = table.keyOf(item_id)
+                if key is None or key in claimed: # new to the table (or a duplicate ID)
+                    key = table.assign(item_id)
+                    self._changes.markRow(table_name, key)
+                    self._changes.markRow("keys", (table_name, key))
+                item.key = key
+                claimed.add(key)
+        # the logs are loaded later, they're matched up with the IDs as they were when loading
+        self._logKeyTables = {name: KeyTable(self._keyTables[name].rows()) for name in ["employees", "equipment"]}
+
+    def _backfill_log_keys(self, logs: list[Log]) -> list[Log]:
+        for log in logs:  # logs saved before keys existed
+            if log.empKey is None:
+                log.empKey = self._logKeyTables["employees"].keyOf(log.empId)
+            if log.equipKey is None:
+                log.equipKey = self._logKeyTables["equipment"].keyOf(log.equipId)
+        return logs
+
+    def _rebuild_registries(self):
+        self._employeeRegistry.rebuild(self.employees)
+        self._equipmentRegistry.rebuild(self.equipment)
+        self._skillRegistry.rebuild(self.skills)
+        self._availability.rebuild(self.equipment)
+        self._skillIndex.rebuild(self.employees, self.equipment)
+        self._skillBits.rebuild(self.employees, self.equipment)
+        self._reservations.rebuild(self.equipment)
 
     def save_data_to_csv(self):
-        write_employees_to_csv(self.employees, "employees.csv")
-        write_equipment_to_csv(self.equipment, "equipment.csv")
-        write_skills_to_csv(self.skills, "skills.csv")
-        write_logs_to_csv(self.logs, 'logs.csv')
+        # saves right away on this thread (save_data() is the one that doesn't block)
+        self.write_snapshot_to_csv(self._snapshot(self._tables_to_save(), self._changes))
+        self._changes.clear()
+
+    def write_snapshot_to_csv(self, snapshot: dict):
+        # only the tables that changed since the last save (or that don't have a file yet) are in the snapshot
+        if "employees" in snapshot:
+            write_employees_to_csv(snapshot["employees"], CSV_FILES["employees"])
+        if "equipment" in snapshot:
+            write_equipment_to_csv(snapshot["equipment"], CSV_FILES["equipment"])
+        if "skills" in snapshot:
+            write_skills_to_csv(snapshot["skills"], CSV_FILES["skills"])
+        if "logs" in snapshot:  # only when logs.csv is missing, after that logs are appended as they happen (see _add_log)
+            write_logs_to_csv(snapshot["logs"], CSV_FILES["logs"])
+        if "keys" in snapshot:
+            write_keys_to_csv(snapshot["keys"], CSV_FILES["keys"])
         # Save other data to CSV files if and as needed
 
+    def save_data_to_mysql(self):
+        self.write_snapshot_to_mysql(self._row_snapshot(self._tables_to_save(), self._changes))
+        self._changes.clear()
+
+    def write_snapshot_to_mysql(self, snapshot: dict):
+        # the database is shared so rows other kiosks changed must be left alone
+        self._write_rows(self._repository, snapshot)
+
+    def write_snapshot_to_sqlite(self, snapshot: dict):
+        self._write_rows(self._sqliteRows, snapshot)
+
+    @staticmethod
+    def _write_rows(repository: MySQLRepository, snapshot: dict):
+        # logs are saved as they happen, so only the changed rows need writing (each table is one transaction)
+        removed = snapshot["removed"]
+        if "employees" in snapshot:
+            repository.save_employees(snapshot["employees"], removed.get("employees", ()))
+        if "equipment" in snapshot:
+            repository.save_equipment(snapshot["equipment"], removed.get("equipment", ()))
+        if "skills" in snapshot:
+            repository.save_skills(snapshot["skills"], removed.get("skills", ()))
+        if "keys" in snapshot:
+            repository.save_keys(snapshot["keys"])
+
     def _set_current_user(self, user_id: str, pwd_hash: str) -> bool:
         if len(self.employees) == 0:
             return False
-        for emp in self.employees:
-            if emp.emp_id == user_id and emp.password_hash == pwd_hash:
-                self.current_user = emp
-                return True
+        emp = self.getEmployeeByID(user_id)
+        if emp is not None and emp.password_hash == pwd_hash:
+            self.current_user = emp
+            return True
         return False
 
     def login(self, user_id: str, pwd: str) -> None:
@@ -79,22 +383,124 @@ class Manager:
         self.window.popup(text="Invalid Username or Password")
 
     def getSkillByID(self, skill_id: str) -> Skill|None:
-        for skill in self.skills:
-            if skill.skillId == skill_id:
-                return skill
-        return None
+        return self._skillRegistry.get(skill_id)
 
     def getEmployeeByID(self, emp_id: str) -> Employee|None:
-        for emp in self.employees:
-            if emp.emp_id == emp_id:
-                return emp
-        return None
+        return self._employeeRegistry.get(emp_id)
 
     def getEquipmentByID(self, equip_id: str) -> Equipment|None:
-        for equip in self.equipment:
-            if equip.equipId == equip_id:
-                return equip
-        return None
+        return self._equipmentRegistry.get(equip_id)
+
+    def addEmployee(self, emp: Employee) -> None:
+        emp.key = self._keyTables["employees"].assign(emp.emp_id)
+        emp.track(self._changes)
+        self._changes.markRow("employees", emp.key)
+        self._changes.markRow("keys", ("employees", emp.key))
+        self.employees.append(emp)
+        self._employeeRegistry.add(emp)
+        self._skillIndex.addEmployee(emp)
+        self._skillBits.updateEmployee(emp)
+
+    def addEquipment(self, equip: Equipment) -> None:
+        equip.key = self._keyTables["equipment"].assign(equip.equipId)
+        equip.track(self._changes)
+        self._changes.markRow("equipment", equip.key)
+        self._changes.markRow("keys", ("equipment", equip.key))
+        self.equipment.append(equip)
+        self._equipmentRegistry.add(equip)
+        self._availability.update(equip)
+        self._skillIndex.addEquipment(equip)
+        self._skillBits.updateEquipment(equip)
+
+    def getAvailableEquipment(self) -> list[Equipment]:
+        return self._availability.getAvailable()
+
+    def getLostEquipment(self) -> list[Equipment]:
+        return self._availability.getLost()
+
+    def isEquipmentLost(self, equip: Equipment) -> bool:
+        return self._availability.isLost(equip)
+
+    def addSkill(self, skill: Skill) -> None:
+        skill.key = self._keyTables["skills"].assign(skill.skillId)
+        skill.track(self._changes)
+        self._changes.markRow("skills", skill.key)
+        self._changes.markRow("keys", ("skills", skill.key))
+        self.skills.append(skill)
+        self._skillRegistry.add(skill)
+
+    def changeEmployeeID(self, emp: Employee, new_id: str) -> None:
+        old_id = emp.emp_id
+        if old_id != "" and old_id != new_id: # not a new employee so need to update references
+            for equipID in emp.borrowedEquipIds: # only the equipment this employee has can reference them
+                if (equip:=self.getEquipmentByID(equipID)) is not None and equip.borrower_id == old_id:
+                    equip.borrower_id = new_id
+            for equip in self._reservations.getEquipment(old_id):  # keeps their place in line
+                equip.queue.rename(old_id, new_id)
+                self._changes.markRow("equipment", equip.key)
+            self._reservations.renameEmployee(old_id, new_id)
+            # logs reference the key so they don't need updating
+        self._employeeRegistry.changeID(emp, new_id)
+        self._keyTables["employees"].rename(emp.key, new_id)
+        self._changes.markRow("keys", ("employees", emp.key))
+
+    def changeEquipmentID(self, equip: Equipment, new_id: str) -> None:
+        old_id = equip.equipId
+        if old_id != "" and old_id != new_id and (emp:=self.getEmployeeByID(equip.borrower_id)) is not None:
+            emp.borrowedEquipIds.replace(old_id, new_id)
+            self._changes.markRow("employees", emp.key)
+        self._equipmentRegistry.changeID(equip, new_id)
+        self._keyTables["equipment"].rename(equip.key, new_id)
+        self._changes.markRow("keys", ("equipment", equip.key))
+
+    def changeSkillID(self, skill: Skill, new_id: str) -> None:
+        old_id = skill.skillId
+        if old_id != "" and old_id != new_id: # not a new skill so need to update references
+            for emp in self._skillIndex.getEmployees(old_id):
+                emp.alterSkill(old_id, new_id)
+            for equip in self._skillIndex.getEquipment(old_id):
+                equip.alterSkill(old_id, new_id)
+            self._skillIndex.renameSkill(old_id, new_id)
+            self._skillBits.renameSkill(old_id, new_id)
+            # skills don't need to update logs
+        self._skillRegistry.changeID(skill, new_id)
+        self._keyTables["skills"].rename(skill.key, new_id)
+        self._changes.markRow("keys", ("skills", skill.key))
+
+    def getEmployeesWithSkill(self, skill_id: str) -> list[Employee]:
+        return self._skillIndex.getEmployees(skill_id)
+
+    def getEquipmentRequiringSkill(self, skill_id: str) -> list[Equipment]:
+        return self._skillIndex.getEquipment(skill_id)
+
+    def getEligibleEquipment(self, emp: Employee, equipment: list[Equipment]|None=None) -> list[Equipment]:
+        # equipment (all of it, or out of the list given) the employee has the skills for
+        return self._skillBits.eligibleEquipment(emp, equipment)
+
+    def getQualifiedEmployees(self, equip: Equipment) -> list[Employee]:
+        return self._skillBits.qualifiedEmployees(equip)
+
+    def addEmployeeSkill(self, emp: Employee, skill_id: str) -> None:
+        emp.skillIds.append(skill_id)
+        self._changes.markRow("employees", emp.key)
+        self._skillIndex.addReference(emp, skill_id)
+        self._skillBits.updateEmployee(emp)
+
+    def removeEmployeeSkill(self, emp: Employee, skill_id: str) -> None:
+        emp.removeSkill(skill_id)
+        self._skillIndex.removeReference(emp, skill_id)
+        self._skillBits.updateEmployee(emp)
+
+    def addEquipmentSkill(self, equip: Equipment, skill_id: str) -> None:
+        equip.skillRequirementsIDs.append(skill_id)
+        self._changes.markRow("equipment", equip.key)
+        self._skillIndex.addReference(equip, skill_id)
+        self._skillBits.updateEquipment(equip)
+
+    def removeEquipmentSkill(self, equip: Equipment, skill_id: str) -> None:
+        equip.removeSkill(skill_id)
+        self._skillIndex.removeReference(equip, skill_id)
+        self._skillBits.updateEquipment(equip)
 
     def checkIn(self, equip: Equipment, emp:Employee|None=None, notes: list[str]=[]) -> None:
         if emp is None:
@@ -111,18 +517,22 @@ class Manager:
             self.window.popup(error_msg)
             return
 
-        # logs
-        self.logs.append(Log(date=datetime.now(), logCode=LOG_CODES.CHECKIN, empId=emp.emp_id, equipId=equip.equipId, notes=notes))
-
         # finish
-        equip.borrower_id = None
-        emp.borrowedEquipIds.remove(equip.equipId)
+        with self._transaction_changes():
+            equip.borrower_id = None
+            emp.borrowedEquipIds.remove(equip.equipId)
+            self._changes.markRow("employees", emp.key)
 
-        if equip.isLost:  # TODO: only user that checkouts and loses it can check it in to get it unmarked as lost -> needs fixed
-            equip.isLost = False  
+            if equip.isLost:  # TODO: only user that checkouts and loses it can check it in to get it unmarked as lost -> needs fixed
+                equip.isLost = False  
+            self._availability.update(equip)
+
+            # logs (after the changes so they get saved along with the log)
+            self._add_log(Log(date=datetime.now(), logCode=LOG_CODES.CHECKIN, empId=emp.emp_id, equipId=equip.equipId, notes=notes, empKey=emp.key, equipKey=equip.key), equip, emp)
+        reserver = self._hand_off(equip)
 
         self.window.checkIn()
-        self.window.popup(text="Check In Successful", isError=False)
+        self.window.popup(text="Check In Successful" + (f"\nChecked out to {reserver.name} (reserved)" if reserver is not None else ""), isError=False)
 
     def checkout(self, equip: Equipment, emp: Employee|None=None, notes: list[str]=[]) -> None:
         """
@@ -132,6 +542,19 @@ class Manager:
             emp = self.current_user
 
         # handle errors
+        error_msg = self._checkout_errors(equip, emp)
+        if error_msg != "":
+            self.window.popup(text=error_msg)
+            return
+
+        if not self._checkout(equip, emp, notes):
+            self.window.popup(text="Equipment was checked out from another kiosk.")
+            return
+
+        self.window.checkOut()
+        self.window.popup(text="Check Out Successful", isError=False)
+
+    def _checkout_errors(self, equip: Equipment, emp: Employee) -> str:  # why emp can't check out equip, "" if they can
         error_msg = ""
         if equip.borrower_id not in [None, '']:
             error_msg += "Equipment is not available.\n"
@@ -140,29 +563,130 @@ class Manager:
                 error_msg += "Employee cannot checkout due to lost limitations.\n"
             if len(emp.borrowedEquipIds) > self.checkoutLimit:
                 error_msg += "Employee cannot checkout due to checkout limitations.\n"
-        missing_skills = equip.getMissingSkills(emp=emp)
+        missing_skills = self._skillBits.missingSkills(emp, equip)
         if len(missing_skills) != 0:
             error_msg += f"Missing skills for Equipment: \n {'\n'.join(['   ' + self.getSkillByID(skillID).name for skillID in missing_skills])}"
+        return error_msg
+
+    def _checkout(self, equip: Equipment, emp: Employee, notes: list[str]) -> bool:  # False if another kiosk got it first
+        with self._transaction_changes():
+            equip.borrower_id = emp.emp_id
+            emp.borrowedEquipIds.append(equip.equipId)
+            self._changes.markRow("employees", emp.key)
+            self._availability.update(equip)
+
+            #logs (after the changes so they get saved along with the log)
+            if not self._add_log(Log(date=datetime.now(), logCode=LOG_CODES.CHECKOUT, empId=emp.emp_id, equipId=equip.equipId, notes=notes, empKey=emp.key, equipKey=equip.key), equip, emp):
+                # another kiosk checked it out first, undo and show it the way it's saved now
+                emp.borrowedEquipIds.remove(equip.equipId)
+                equip.borrower_id, equip.isLost = self._repository.read_equipment_status(equip)
+                if (borrower:=self.getEmployeeByID(equip.borrower_id)) is not None and equip.equipId not in borrower.borrowedEquipIds:
+                    borrower.borrowedEquipIds.append(equip.equipId)
+                self._availability.update(equip)
+                return False
+        if equip.queue.cancel(emp.emp_id):  # got it without waiting
+            self._reservations.remove(emp.emp_id, equip)
+            self._changes.markRow("equipment", equip.key)
+        return True
+
+    # ------ reservations ------
+    def reserve(self, equip: Equipment, emp: Employee|None=None, priority: int=0) -> None:
+        """
+        Puts emp in line for equip, it's checked out to them when it's their turn and it's checked in.
+        Higher priorities go first, otherwise first come first served.
+        """
+        if emp is None:
+            emp = self.current_user
 
+        error_msg = ""
+        if equip.borrower_id in [None, '']:
+            error_msg += "Equipment is available, check it out instead.\n"
+        elif equip.borrower_id == emp.emp_id:
+            error_msg += "Employee already has the equipment checked out.\n"
+        if emp.emp_id in equip.queue:
+            error_msg += "Employee already reserved the equipment.\n"
+        if not self._skillBits.canUse(emp, equip):
+            error_msg += "Missing skills for Equipment.\n"
         if error_msg != "":
             self.window.popup(text=error_msg)
             return
 
-        #logs
-        self.logs.append(Log(date=datetime.now(), logCode=LOG_CODES.CHECKOUT, empId=emp.emp_id, equipId=equip.equipId, notes=notes))
+        equip.queue.push(emp.emp_id, priority)
+        self._reservations.add(emp.emp_id, equip)
+        self._changes.markRow("equipment", equip.key)
+        self.window.reserve()
+        self.window.popup(text=f"Reserved, #{list(equip.queue).index(emp.emp_id) + 1} in line", isError=False)
 
-        # finish
-        equip.borrower_id = emp.emp_id
-        emp.borrowedEquipIds.append(equip.equipId)
+    def cancelReservation(self, equip: Equipment, emp: Employee|None=None) -> None:
+        if emp is None:
+            emp = self.current_user
+        if equip.queue.cancel(emp.emp_id):
+            self._reservations.remove(emp.emp_id, equip)
+            self._changes.markRow("equipment", equip.key)
+        self.window.reserve()
+        self.window.popup(text="Reservation Cancelled", isError=False)
 
-        self.window.checkOut()
-        self.window.popup(text="Check Out Successful", isError=False)
+    def getReservedEquipment(self, emp: Employee|None=None) -> list[Equipment]:
+        if emp is None:
+            emp = self.current_user
+        return self._reservations.getEquipment(emp.emp_id)
+
+    def _hand_off(self, equip: Equipment) -> Employee|None:
+        """
+        Checks equip out to the next employee in its queue, returns them (None if nobody could take it).
+        Only the front of the queue is looked at, anyone there who can't take it anymore (missing skills, over their
+        limits, no longer employed) loses their reservation and the next one is tried.
+        """
+        while (emp_id := equip.queue.peek()) is not None:
+            emp = self.getEmployeeByID(emp_id)
+            if emp is not None and self._checkout_errors(equip, emp) == "":
+                return emp if self._checkout(equip, emp, ["Reserved"]) else None  # the reservation is used up by _checkout
+            equip.queue.pop()
+            self._reservations.remove(emp_id, equip)
+            self._changes.markRow("equipment", equip.key)
+        return None
 
     def logLost(self, equip: Equipment, emp:Employee|None, notes: list[str]=[]):
-        self.logs.append(Log(date=datetime.now(), logCode=LOG_CODES.LOST, empId=emp.emp_id, equipId=equip.equipId, notes=notes))
+        with self._transaction_changes():
+            equip.isLost = True
+            self._availability.update(equip)
+            self._add_log(Log(date=datetime.now(), logCode=LOG_CODES.LOST, empId=emp.emp_id, equipId=equip.equipId, notes=notes, empKey=emp.key, equipKey=equip.key), equip, emp)
+
+    def _transaction_changes(self):
+        # sqlite / mysql save the rows a transaction changes along with its log, the next save doesn't write them again
+        return self._changes.paused() if self.storage in ("sqlite", "mysql") else nullcontext()
+
+    def _add_log(self, log: Log, equip: Equipment, emp: Employee) -> bool:
+        # written right away so a crash doesn't lose the transaction
+        if self.storage == "sqlite":
+            save_transaction_to_sqlite(log, equip, emp, self._db)  # equipment, employee and log in one transaction
+        elif self.storage == "mysql":
+            if not self._repository.save_transaction(log, equip, emp):  # shared database, someone else may have changed it
+                return False
+        elif not self._has_log_store():
+            append_logs_to_csv([log], 'logs.csv')
+        if not isinstance(self.logs, LazyList) or self.logs.isLoaded():  # otherwise it's read from storage with the rest
+            self.logs.append(log)  # the columnar / partitioned stores save it here
+        if self._logAggregates is not None:
+            self._logAggregates.add(log)
+        if self._autosave.transaction():  # once the checkout is done, copying the tables shouldn't hold it up
+            self.window.after(0, self._deferred_autosave)
+        return True
+
+    def _has_log_store(self) -> bool:  # csv storage keeping the logs somewhere other than logs.csv
+        return self.columnar_logs or self.log_partitions is not None
 
     def getLogs(self) -> list[Log]:
         return self.logs
+
+    def getLogAggregates(self) -> LogAggregates|None:
+        # only for logs kept in memory, the other log stores count from their columns / manifest / rollups
+        if not isinstance(self.logs, (list, LazyList)):
+            return None
+        if self._logAggregates is None:
+            self._logAggregates = LogAggregates(self.logs)  # one pass, then add() on every transaction
+        return self._logAggregates
+
     
     def getNumEquipment(self) -> int:
         return len(self.equipment)
@@ -186,16 +710,44 @@ class Manager:
             return
 
         self.employees.remove(emp)
+        self._employeeRegistry.remove(emp)
+        self._keyTables["employees"].retire(emp.key)
+        self._changes.markRemoved("employees", emp.key)
+        self._changes.markRow("keys", ("employees", emp.key))
+        self._skillIndex.removeEmployee(emp)
+        self._skillBits.removeEmployee(emp)
+        for equip in self._reservations.removeEmployee(emp.emp_id):
+            equip.queue.cancel(emp.emp_id)
+            self._changes.markRow("equipment", equip.key)
         self.window.ManageItems(t=Employee, items=items)
         self.window.popup(text="Successfully Deleted the User", isError=False)
 
     def removeEquipment(self, equip, items):
         self.equipment.remove(equip)
+        self._equipmentRegistry.remove(equip)
+        self._keyTables["equipment"].retire(equip.key)
+        self._changes.markRemoved("equipment", equip.key)
+        self._changes.markRow("keys", ("equipment", equip.key))
+        self._availability.remove(equip)
+        self._skillIndex.removeEquipment(equip)
+        self._skillBits.removeEquipment(equip)
+        self._reservations.removeEquipment(equip)
         self.window.ManageItems(t=Equipment, items=items)
         self.window.popup(text="Successfully Deleted the Equipment", isError=False)
 
     def removeSkill(self, skill, skills: list[Skill], items, selection_index, t):
         self.skills.remove(skill)
+        self._skillRegistry.remove(skill)
+        self._keyTables["skills"].retire(skill.key)
+        self._changes.markRemoved("skills", skill.key)
+        self._changes.markRow("keys", ("skills", skill.key))
+        # drop the references to the deleted skill so nothing is left pointing at it
+        for emp in self._skillIndex.getEmployees(skill.skillId):
+            emp.removeSkill(skill.skillId)
+        for equip in self._skillIndex.getEquipment(skill.skillId):
+            equip.removeSkill(skill.skillId)
+        self._skillIndex.dropSkill(skill.skillId)
+        self._skillBits.dropSkill(skill.skillId)
         if skill in skills:
             skills.remove(skill)
         self.window.manageSkills(skills=skills, items=items, selection_index=selection_index, t=t)
\ No newline at end of file
@@ -0,0 +1,240 @@
+# partitioned_logs.py - logs split into one csv file per month (or day) so date range reads only open the files they need.
+
+import csv
+import gzip
+import io
+from os import path, makedirs, listdir, remove
+from dataclasses import dataclass, field
+from datetime import datetime
+from dataStructures import Log, LOG_CODES
+from csv_database import _log_to_row, _logs_from_rows, append_logs_to_csv, atomic_open, encode_log_date, decode_log_date, fileExits, read_logs_from_csv, tarnslateLogCode
+
+PARTITION_FORMATS = {"month": "%Y-%m", "day": "%Y-%m-%d"}  # partition name of a log's date
+MANIFEST_FILE = "manifest.csv"
+MANIFEST_HEADER = ["Partition", "First Date", "Last Date", "Rows", "Code Counts", "Bytes", "Compressed"]
+
+
+@dataclass
+class Partition:  # one file of logs, a row in the manifest
+    name: str
+    first: datetime|None = None
+    last: datetime|None = None
+    rows: int = 0
+    codeCounts: list[int] = field(default_factory=lambda: [0, 0, 0])  # by tarnslateLogCode value
+    size: int = 0  # bytes the counts are for, a file bigger than the manifest says has appends it hasn't counted yet
+    compressed: bool = False
+
+    @property
+    def filename(self) -> str:
+        return f"logs-{self.name}.csv" + (".gz" if self.compressed else "")
+
+    def add(self, logs: list[Log]) -> None:
+        for log in logs:
+            self.first = log.date if self.first is None else min(self.first, log.date)
+            self.last = log.date if self.last is None else max(self.last, log.date)
+            self.codeCounts[tarnslateLogCode(log.logCode)] += 1
+        self.rows += len(logs)
+
+    def overlaps(self, start_date: datetime|None, end_date: datetime|None) -> bool:
+        if self.rows == 0:
+            return False
+        return (start_date is None or self.last >= start_date) and (end_date is None or self.first <= end_date)
+
+    def within(self, start_date: datetime|None, end_date: datetime|None) -> bool:  # every log is in the range
+        return (start_date is None or self.first >= start_date) and (end_date is None or self.last <= end_date)
+
+
+class PartitionedLogs:
+    """
+    Logs stored in <directory>/logs-<month or day>.csv with a manifest of each file's date range, row count and log code counts.
+    Looping over it streams the files in order, filter() / countCode() skip files outside the date range (and use the
+    manifest counts for files fully inside it). Old files can be gzipped with compress(), they're still read the same way.
+    """
+    def __init__(self, directory: str, granularity: str="month", start_date: datetime|None=None, end_date: datetime|None=None, logCodes: list[LOG_CODES]|None=None, root: 'PartitionedLogs|None'=None) -> None:
+        self.directory = directory
+        self.granularity = granularity
+        self.start_date = start_date
+        self.end_date = end_date
+        self.logCodes = logCodes
+        self._root = root
+        if root is None:
+            makedirs(directory, exist_ok=True)
+            self._partitions: dict[str, Partition] = self._read_manifest()
+            self._reconcile()
+
+    # ------ files ------
+    def _file(self, name: str) -> str:
+        return path.join(self.directory, name)
+
+    def partitions(self) -> list[Partition]:  # in date order
+        partitions = (self._root or self)._partitions
+        return [partitions[name] for name in sorted(partitions)]
+
+    def _read_manifest(self) -> dict[str, Partition]:
+        partitions = {}
+        if not fileExits(fn := self._file(MANIFEST_FILE)):
+            return partitions
+        with open(fn, 'r', newline='') as file:
+            reader = csv.reader(file)
+            next(reader)  # Skip the header row
+            for name, first, last, rows, codeCounts, size, compressed in reader:
+                partitions[name] = Partition(name, decode_log_date(first) if first else None, decode_log_date(last) if last else None,
+                                             int(rows), [int(x) for x in codeCounts.split("-")], int(size), compressed == "True")
+        return partitions
+
+    def _write_manifest(self) -> None:
+        with atomic_open(self._file(MANIFEST_FILE)) as file:
+            writer = csv.writer(file)
+            writer.writerow(MANIFEST_HEADER)
+            for p in self.partitions():
+                writer.writerow([p.name, encode_log_date(p.first) if p.first else "", encode_log_date(p.last) if p.last else "",
+                                 p.rows, "-".join(map(str, p.codeCounts)), p.size, p.compressed])
+
+    def _reconcile(self) -> None:
+        """
+        Brings the manifest up to date: appends aren't written to it, the rows past a file's listed size are counted here.
+        Also fixes it after a crash: rescans files that shrank or aren't listed, removes leftovers from compress().
+        """
+        changed = False
+        for p in list(self._partitions.values()):
+            leftover = Partition(p.name, compressed=not p.compressed).filename
+            if fileExits(fn := self._file(leftover)):  # the other version of a file that was being compressed
+                remove(fn)
+            if not fileExits(self._file(p.filename)):
+                del self._partitions[p.name]
+                changed = True
+            elif (size:=path.getsize(self._file(p.filename))) > p.size:  # appended to since, only the new rows are read
+                p.add(self._read_tail(p))
+                p.size = size
+                changed = True
+            elif size != p.size:
+                self._partitions[p.name] = self._scan(p.name, p.compressed)
+                changed = True
+        for filename in listdir(self.directory):
+            if filename.startswith("logs-") and (filename.endswith(".csv") or filename.endswith(".csv.gz")):
+                compressed = filename.endswith(".gz")
+                name = filename[len("logs-"):-len(".csv.gz" if compressed else ".csv")]
+                if name not in self._partitions:
+                    self._partitions[name] = self._scan(name, compressed)
+                    changed = True
+        if changed:
+            self._write_manifest()
+
+    def _scan(self, name: str, compressed: bool) -> Partition:
+        partition = Partition(name, compressed=compressed)
+        partition.add(list(self._stream(partition)))
+        partition.size = path.getsize(self._file(partition.filename))
+        return partition
+
+    def _read_tail(self, partition: Partition) -> list[Log]:
+        # the rows after partition.size, no header (appends to a gzip file are a gzip member of their own)
+        with open(self._file(partition.filename), 'rb') as file:
+            file.seek(partition.size)
+            data = file.read()
+        return list(_logs_from_rows(csv.reader(io.StringIO((gzip.decompress(data) if partition.compressed else data).decode('utf-8'), newline=''))))
+
+    def _stream(self, partition: Partition, start_date: datetime|None=None, end_date: datetime|None=None, logCodes: list[LOG_CODES]|None=None):
+        fn = self._file(partition.filename)
+        with (gzip.open(fn, 'rt', newline='') if partition.compressed else open(fn, 'r', newline='')) as file:
+            reader = csv.reader(file)
+            next(reader)  # Skip the header row
+            yield from _logs_from_rows(reader, start_date, end_date, logCodes)
+
+    # ------ reading ------
+    def __iter__(self):
+        for partition in self.partitions():
+            if partition.overlaps(self.start_date, self.end_date):
+                yield from self._stream(partition, self.start_date, self.end_date, self.logCodes)
+
+    def __len__(self) -> int:
+        if self.start_date is None and self.end_date is None and self.logCodes is None:
+            return sum(p.rows for p in self.partitions())
+        return sum(1 for _ in self)
+
+    def filter(self, start_date: datetime|None=None, end_date: datetime|None=None, logCodes: list[LOG_CODES]|None=None) -> 'PartitionedLogs':
+        if self.start_date is not None and (start_date is None or self.start_date > start_date):
+            start_date = self.start_date
+        if self.end_date is not None and (end_date is None or self.end_date < end_date):
+            end_date = self.end_date
+        if self.logCodes is not None:
+            logCodes = self.logCodes if logCodes is None else [code for code in logCodes if code in self.logCodes]
+        return PartitionedLogs(self.directory, self.granularity, start_date, end_date, logCodes, root=self._root or self)
+
+    def countCode(self, logCode: LOG_CODES) -> int:
+        if self.logCodes is not None and logCode not in self.logCodes:
+            return 0
+        count = 0
+        for partition in self.partitions():
+            if not partition.overlaps(self.start_date, self.end_date):
+                continue
+            if partition.within(self.start_date, self.end_date):  # counted when it was written
+                count += partition.codeCounts[tarnslateLogCode(logCode)]
+            else:
+                count += sum(1 for _ in self._stream(partition, self.start_date, self.end_date, [logCode]))
+        return count
+
+    # ------ writing ------
+    def partitionName(self, date: datetime) -> str:
+        return date.strftime(PARTITION_FORMATS[self.granularity])
+
+    def append(self, log: Log) -> None:
+        self.extend([log])
+
+    def extend(self, logs: list[Log]) -> None:
+        """
+        Appends the logs to their partition files (flushed to disk). The manifest is only rewritten when a partition is
+        made, the counts of the others are caught up by _reconcile() the next time the store is opened.
+        """
+        if self._root is not None:
+            raise ValueError("Can't add logs to a filtered view")
+        groups: dict[str, list[Log]] = {}
+        for log in logs:
+            groups.setdefault(self.partitionName(log.date), []).append(log)
+        created = False
+        for name, group in groups.items():
+            if name not in self._partitions:
+                self._partitions[name] = Partition(name)
+                created = True
+            partition = self._partitions[name]
+            if partition.compressed:  # a late log for an old month, gzip files can have more added to the end
+                with gzip.open(self._file(partition.filename), 'at', newline='') as file:
+                    csv.writer(file).writerows(map(_log_to_row, group))
+            else:
+                append_logs_to_csv(group, self._file(partition.filename))
+            partition.add(group)
+            partition.size = path.getsize(self._file(partition.filename))  # goes with the counts, whenever they're written
+        if created:
+            self._write_manifest()
+
+    def compress(self, older_than: datetime) -> list[str]:
+        """
+        Gzips the partitions with nothing newer than older_than (except the current one), returns their names.
+        """
+        current = self.partitionName(datetime.now())
+        compressed = []
+        for partition in self.partitions():
+            if partition.compressed or partition.name == current or partition.rows == 0 or partition.last >= older_than:
+                continue
+            source, target = self._file(partition.filename), self._file(Partition(partition.name, compressed=True).filename)
+            with open(source, 'rb') as file:
+                data = file.read()
+            with atomic_open(target, binary=True) as file:
+                file.write(gzip.compress(data))
+            partition.compressed = True
+            partition.size = path.getsize(target)
+            self._write_manifest()  # before removing the csv so a crash leaves a usable file either way
+            remove(source)
+            compressed.append(partition.name)
+        return compressed
+
+
+def open_partitioned_logs(directory: str, granularity: str="month", import_from: str|None=None, backfill=None) -> PartitionedLogs:
+    """
+    Opens the partitioned log store, the first time it's opened the logs from the csv file import_from are copied in
+    (with their keys filled in by backfill(logs) if given, like open_columnar_logs).
+    """
+    logs = PartitionedLogs(directory, granularity)
+    if len(logs.partitions()) == 0 and import_from is not None and fileExits(import_from):
+        imported = read_logs_from_csv(import_from)
+        logs.extend(imported if backfill is None else backfill(imported))
+    return logs
@@ -0,0 +1,104 @@
+# report_arrays.py - logs as numpy arrays so the report filters are masks / bincount / searchsorted (needs numpy).
+
+from datetime import datetime, timedelta
+from dataStructures import LOG_CODES
+from csv_database import tarnslateLogCode
+from columnar_logs import ColumnarLogs, EPOCH
+
+try:
+    import numpy as np
+except ImportError:  # Pipeline runs the filters in python instead
+    np = None
+
+MICROSECOND = timedelta(microseconds=1)
+CODE_VALUES = {code: tarnslateLogCode(code) for code in LOG_CODES}  # same numbers as the columnar store
+
+
+def to_microseconds(date: datetime) -> int:  # exact, unlike datetime.timestamp() which depends on the time zone
+    return (date - EPOCH) // MICROSECOND
+
+
+class LogArrays:
+    """
+    The columns the reports need (date and log code) as numpy arrays, made from the logs once.
+    Dates are int64 microseconds since EPOCH so windows compare exactly like the Log dates do.
+    """
+    def __init__(self) -> None:
+        if np is None:
+            raise ImportError("numpy is needed for the vectorized reports")
+        self._size = 0
+        self._dates = np.zeros(0, dtype=np.int64)
+        self._codes = np.zeros(0, dtype=np.uint8)
+        self._codeCounts = None  # bincount of the codes, dropped when logs are added
+        self._byCode: dict[int, tuple] = {}  # code -> (its rows sorted by date, their dates), dropped when logs are added
+
+    @classmethod
+    def fromLogs(cls, logs) -> 'LogArrays':
+        arrays = cls()
+        if isinstance(logs, ColumnarLogs):  # already columns, no Log objects needed
+            arrays._extendColumnar(logs)
+        else:
+            arrays.extend(logs)
+        return arrays
+
+    # ------ adding logs ------
+    def extend(self, logs) -> None:
+        logs = logs if isinstance(logs, list) else list(logs)
+        n = len(logs)
+        self._add(
+            np.fromiter((to_microseconds(log.date) for log in logs), dtype=np.int64, count=n),
+            np.fromiter((CODE_VALUES[log.logCode] for log in logs), dtype=np.uint8, count=n),
+        )
+
+    def _extendColumnar(self, logs: ColumnarLogs) -> None:
+        self._add(np.asarray(logs.dates(), dtype=np.int64) * 1_000_000, np.asarray(logs.codes(), dtype=np.uint8))
+
+    def _add(self, dates, codes) -> None:
+        size = self._size + len(dates)
+        if size > len(self._dates):  # grow to double so extending a few logs at a time stays cheap
+            capacity = max(size, 2 * len(self._dates), 1024)
+            for name in ["_dates", "_codes"]:
+                grown = np.zeros(capacity, dtype=getattr(self, name).dtype)
+                grown[:self._size] = getattr(self, name)[:self._size]
+                setattr(self, name, grown)
+        for column, values in [(self._dates, dates), (self._codes, codes)]:
+            column[self._size:size] = values
+        self._size = size
+        self._codeCounts = None
+        self._byCode.clear()
+
+    # ------ columns ------
+    def __len__(self) -> int:
+        return self._size
+
+    def dates(self):  # microseconds since EPOCH
+        return self._dates[:self._size]
+
+    def codes(self):  # tarnslateLogCode values
+        return self._codes[:self._size]
+
+    # ------ reports ------
+    def codeCounts(self):  # number of logs of each code, by tarnslateLogCode value
+        if self._codeCounts is None:
+            self._codeCounts = np.bincount(self.codes(), minlength=len(CODE_VALUES))
+        return self._codeCounts
+
+    def countCode(self, logCode: LOG_CODES) -> int:
+        return int(self.codeCounts()[CODE_VALUES[logCode]])
+
+    def _sortedRows(self, logCode: LOG_CODES) -> tuple:  # (rows with the code in date order, their dates)
+        code = CODE_VALUES[logCode]
+        if code not in self._byCode:
+            rows = np.flatnonzero(self.codes() == code)
+            rows = rows[np.argsort(self.dates()[rows], kind="stable")]
+            self._byCode[code] = (rows, self.dates()[rows])
+        return self._byCode[code]
+
+    def datesOf(self, logCode: LOG_CODES, start_date: datetime|None=None, end_date: datetime|None=None) -> list[datetime]:
+        """
+        Dates of the logs with the code between start_date and end_date (inclusive), in the order they were added.
+        """
+        rows, dates = self._sortedRows(logCode)
+        start = 0 if start_date is None else np.searchsorted(dates, to_microseconds(start_date), side="left")
+        end = len(dates) if end_date is None else np.searchsorted(dates, to_microseconds(end_date), side="right")
+        return self.dates()[np.sort(rows[start:end])].astype("datetime64[us]").tolist()
@@ -0,0 +1,131 @@
+# skill_bitmasks.py - skills as bits so "can this employee use this equipment" is one AND (numpy is optional).
+
+from dataStructures import Employee, Equipment
+
+try:
+    import numpy as np
+except ImportError:  # bulk queries fall back to a python loop over the masks
+    np = None
+
+MAX_NUMPY_BITS = 64  # masks have to fit in a uint64 for the numpy path
+
+
+class SkillBitmasks:
+    """
+    Each skill ID gets a bit position, each employee's skills and each equipment's requirements become one int.
+    An employee can use a piece of equipment when requirements & ~skills == 0.
+    eligibleEquipment() / qualifiedEmployees() check the whole fleet at once, with numpy arrays when they're available.
+    Kept in sync by Manager like SkillIndex.
+    """
+    def __init__(self) -> None:
+        self._bits: dict[str, int] = {}  # skill ID -> bit position
+        self._freeBits: list[int] = []  # positions of deleted skills, reused
+        self._employees: dict[Employee, int] = {}  # employee -> mask of their skills
+        self._equipment: dict[Equipment, int] = {}  # equipment -> mask of its requirements
+        self._arrays: dict[str, tuple] = {}  # "employees" / "equipment" -> (objects, numpy masks), dropped on any change
+
+    def rebuild(self, employees: list[Employee], equipment: list[Equipment]) -> None:
+        self._bits.clear()
+        self._freeBits.clear()
+        self._employees = {emp: self.maskOf(emp.skillIds) for emp in employees}
+        self._equipment = {equip: self.maskOf(equip.skillRequirementsIDs) for equip in equipment}
+        self._arrays.clear()
+
+    def bit(self, skillId: str) -> int:
+        if skillId not in self._bits:
+            self._bits[skillId] = self._freeBits.pop() if self._freeBits else len(self._bits)
+        return self._bits[skillId]
+
+    def maskOf(self, skillIds) -> int:
+        mask = 0
+        for skillId in skillIds:
+            mask |= 1 << self.bit(skillId)
+        return mask
+
+    # ------ keeping it in sync ------
+    def updateEmployee(self, emp: Employee) -> None:  # after the employee's skills change
+        self._employees[emp] = self.maskOf(emp.skillIds)
+        self._arrays.pop("employees", None)
+
+    def updateEquipment(self, equip: Equipment) -> None:
+        self._equipment[equip] = self.maskOf(equip.skillRequirementsIDs)
+        self._arrays.pop("equipment", None)
+
+    def removeEmployee(self, emp: Employee) -> None:
+        self._employees.pop(emp, None)
+        self._arrays.pop("employees", None)
+
+    def removeEquipment(self, equip: Equipment) -> None:
+        self._equipment.pop(equip, None)
+        self._arrays.pop("equipment", None)
+
+    def renameSkill(self, oldSkillId: str, newSkillId: str) -> None:  # the bit moves with the ID, no mask changes
+        if oldSkillId in self._bits:
+            self._bits[newSkillId] = self._bits.pop(oldSkillId)
+
+    def dropSkill(self, skillId: str) -> None:
+        if skillId not in self._bits:
+            return
+        bit = self._bits.pop(skillId)
+        keep = ~(1 << bit)
+        for masks in (self._employees, self._equipment):
+            for obj in masks:
+                masks[obj] &= keep
+        self._freeBits.append(bit)
+        self._arrays.clear()
+
+    # ------ queries ------
+    def _employeeMask(self, emp: Employee) -> int:
+        mask = self._employees.get(emp)
+        return self.maskOf(emp.skillIds) if mask is None else mask
+
+    def _equipmentMask(self, equip: Equipment) -> int:
+        mask = self._equipment.get(equip)
+        return self.maskOf(equip.skillRequirementsIDs) if mask is None else mask
+
+    def canUse(self, emp: Employee, equip: Equipment) -> bool:
+        return self._equipmentMask(equip) & ~self._employeeMask(emp) == 0
+
+    def missingSkills(self, emp: Employee, equip: Equipment) -> list[str]:
+        missing = self._equipmentMask(equip) & ~self._employeeMask(emp)
+        if missing == 0:
+            return []
+        return [skillId for skillId in equip.skillRequirementsIDs if missing >> self._bits[skillId] & 1]  # in the equipment's order
+
+    def _array(self, table: str) -> tuple|None:  # (objects, uint64 masks) or None if numpy can't be used
+        if np is None or len(self._bits) + len(self._freeBits) > MAX_NUMPY_BITS:
+            return None
+        if table not in self._arrays:
+            masks = self._employees if table == "employees" else self._equipment
+            self._arrays[table] = (list(masks), np.fromiter(masks.values(), dtype=np.uint64, count=len(masks)))
+        return self._arrays[table]
+
+    def eligibleEquipment(self, emp: Employee, equipment: list[Equipment]|None=None) -> list[Equipment]:
+        """
+        Equipment the employee has every required skill for, out of `equipment` (in its order) or all of it.
+        """
+        have = self._employeeMask(emp)
+        if (arrays := self._array("equipment")) is not None:
+            objects, masks = arrays
+            eligible = [objects[i] for i in np.flatnonzero((masks & np.uint64(~have & (2**64 - 1))) == 0)]
+        else:
+            eligible = [equip for equip, required in self._equipment.items() if required & ~have == 0]
+        if equipment is None:
+            return eligible
+        eligible = set(eligible)
+        return [equip for equip in equipment if equip in eligible or (equip not in self._equipment and self.canUse(emp, equip))]
+
+    def qualifiedEmployees(self, equip: Equipment, employees: list[Employee]|None=None) -> list[Employee]:
+        """
+        Employees with every skill the equipment requires, out of `employees` (in its order) or all of them.
+        """
+        required = self._equipmentMask(equip)
+        if (arrays := self._array("employees")) is not None:
+            objects, masks = arrays
+            qualified = [objects[i] for i in np.flatnonzero((masks & np.uint64(required)) == np.uint64(required))]
+        else:
+            qualified = [emp for emp, have in self._employees.items() if required & ~have == 0]
+        if employees is None:
+            return qualified
+        qualified = set(qualified)
+        return [emp for emp in employees if emp in qualified or (emp not in self._employees and self.canUse(emp, equip))]
@@ -0,0 +1,57 @@
+# snapshot_cache.py - pickled copy of the parsed csv tables so startup doesn't have to parse them again.
+
+import pickle
+from os import stat
+from csv_database import atomic_open, fileExits
+
+SNAPSHOT_VERSION = 3  # bump when Employee / Equipment / Skill / KeyTable change so old snapshots are ignored
+
+
+def source_signature(filenames: list[str]) -> list[tuple]:
+    # (name, size, modified time) of each source file, a file that changes in any way gives a different signature
+    signature = []
+    for filename in filenames:
+        if fileExits(filename):
+            info = stat(filename)
+            signature.append((filename, info.st_size, info.st_mtime_ns))
+        else:
+            signature.append((filename, None, None))
+    return signature
+
+
+def _is_current(file, sources: list[str]) -> bool:  # reads just the header written before the tables
+    version, signature = pickle.load(file)
+    return version == SNAPSHOT_VERSION and signature == source_signature(sources)
+
+
+def read_snapshot_cache(filename: str, sources: list[str]) -> dict|None:
+    """
+    Returns the tables saved by write_snapshot_cache, or None if there isn't one or the source files changed since.
+    """
+    if not fileExits(filename):
+        return None
+    try:
+        with open(filename, 'rb') as file:
+            return pickle.load(file) if _is_current(file, sources) else None
+    except Exception:  # corrupt / made by another version of python, parse the csv files instead
+        return None
+
+
+def is_snapshot_cache_valid(filename: str, sources: list[str]) -> bool:
+    if not fileExits(filename):
+        return False
+    try:
+        with open(filename, 'rb') as file:
+            return _is_current(file, sources)
+    except Exception:
+        return False
+
+
+def write_snapshot_cache(filename: str, sources: list[str], tables: dict) -> None:
+    """
+    Saves the tables keyed to the current size and modified time of the source files.
+    Call it after the source files are written, the tables should match what's in them.
+    """
+    with atomic_open(filename, binary=True) as file:
+        pickle.dump((SNAPSHOT_VERSION, source_signature(sources)), file, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(tables, file, protocol=pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,28 @@
+# sql_rows.py - conversions between objects and table rows shared by sqlite_database.py and database.py (MySQL).
+
+from dataStructures import Log
+from csv_database import tarnslateLogCode, encode_log_date, decode_log_date
+
+LOG_COLUMNS = "date, emp_id, equip_id, log_code, notes, emp_key, equip_key"
+
+
+def row_keys(items: list, key_attr: str = "key") -> list[int]:
+    # objects that haven't been given a key yet (not added through Manager) get one past the biggest key
+    next_key = max([k for item in items if (k:=getattr(item, key_attr)) is not None], default=-1) + 1
+    keys = []
+    for item in items:
+        key = getattr(item, key_attr)
+        if key is None:
+            key = next_key
+            next_key += 1
+        keys.append(key)
+    return keys
+
+
+def log_row(log: Log) -> tuple:  # in LOG_COLUMNS order, dates the same as the csv files (whole seconds)
+    return (encode_log_date(log.date), log.empId, log.equipId, tarnslateLogCode(log.logCode), "-".join(log.notes), log.empKey, log.equipKey)
+
+
+def row_to_log(row) -> Log:
+    date, empId, equipId, logCode, notes, empKey, equipKey = row
+    return Log(date=decode_log_date(date), empId=empId, equipId=equipId, logCode=tarnslateLogCode(logCode), notes=notes.split("-") if notes else [], empKey=empKey, equipKey=equipKey)
@@ -0,0 +1,217 @@
+# sqlite_database.py - embedded alternative to csv_database.py (same read/write functions, backed by a SQLite file).
+
+import sqlite3
+from dataStructures import Employee, Equipment, Skill, Log, KeyTable
+from sql_rows import LOG_COLUMNS, row_keys, log_row, row_to_log
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS employees (
+    emp_key INTEGER PRIMARY KEY,
+    emp_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    contact_info TEXT NOT NULL,
+    num_lost_equips INTEGER NOT NULL DEFAULT 0,
+    is_admin INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_employees_emp_id ON employees (emp_id);
+
+CREATE TABLE IF NOT EXISTS employee_skills (
+    emp_key INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    skill_id TEXT NOT NULL,
+    PRIMARY KEY (emp_key, position)
+);
+CREATE INDEX IF NOT EXISTS idx_employee_skills_skill_id ON employee_skills (skill_id);
+
+CREATE TABLE IF NOT EXISTS employee_borrowed (
+    emp_key INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    equip_id TEXT NOT NULL,
+    PRIMARY KEY (emp_key, position)
+);
+
+CREATE TABLE IF NOT EXISTS equipment (
+    equip_key INTEGER PRIMARY KEY,
+    equip_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    borrower_id TEXT,
+    is_lost INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_equipment_equip_id ON equipment (equip_id);
+CREATE INDEX IF NOT EXISTS idx_equipment_borrower_id ON equipment (borrower_id);
+
+CREATE TABLE IF NOT EXISTS equipment_skills (
+    equip_key INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    skill_id TEXT NOT NULL,
+    PRIMARY KEY (equip_key, position)
+);
+CREATE INDEX IF NOT EXISTS idx_equipment_skills_skill_id ON equipment_skills (skill_id);
+
+CREATE TABLE IF NOT EXISTS equipment_queue (
+    equip_key INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    emp_id TEXT NOT NULL,
+    PRIMARY KEY (equip_key, position)
+);
+
+CREATE TABLE IF NOT EXISTS skills (
+    skill_key INTEGER PRIMARY KEY,
+    skill_id TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_skills_skill_id ON skills (skill_id);
+
+CREATE TABLE IF NOT EXISTS logs (
+    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    emp_id TEXT NOT NULL,
+    equip_id TEXT NOT NULL,
+    log_code INTEGER NOT NULL,
+    notes TEXT NOT NULL,
+    emp_key INTEGER,
+    equip_key INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_logs_date ON logs (date);
+CREATE INDEX IF NOT EXISTS idx_logs_code_date ON logs (log_code, date);
+CREATE INDEX IF NOT EXISTS idx_logs_emp_key ON logs (emp_key);
+CREATE INDEX IF NOT EXISTS idx_logs_equip_key ON logs (equip_key);
+
+CREATE TABLE IF NOT EXISTS id_keys (
+    table_name TEXT NOT NULL,
+    item_key INTEGER NOT NULL,
+    item_id TEXT NOT NULL,
+    is_active INTEGER NOT NULL,
+    PRIMARY KEY (table_name, item_key)
+);
+"""
+
+
+def create_connection(filename) -> sqlite3.Connection:
+    connection = sqlite3.connect(filename)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def close_connection(connection: sqlite3.Connection):
+    if connection:
+        connection.close()
+
+
+def write_employees_to_sqlite(employees: list[Employee], connection: sqlite3.Connection):
+    with connection:  # one transaction, rolled back on error
+        connection.execute("DELETE FROM employees")
+        connection.execute("DELETE FROM employee_skills")
+        connection.execute("DELETE FROM employee_borrowed")
+        _insert_employees(employees, row_keys(employees), connection)
+
+
+def _insert_employees(employees: list[Employee], keys: list[int], connection: sqlite3.Connection):
+    rows = [(key, emp.emp_id, emp.name, emp.password_hash, emp.contactInfo, emp.numLostEquips, int(emp.isAdmin)) for emp, key in zip(employees, keys)]
+    skill_rows = [(key, i, skill_id) for emp, key in zip(employees, keys) for i, skill_id in enumerate(emp.skillIds)]
+    borrowed_rows = [(key, i, equip_id) for emp, key in zip(employees, keys) for i, equip_id in enumerate(emp.borrowedEquipIds)]
+    connection.executemany("INSERT INTO employees VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    connection.executemany("INSERT INTO employee_skills VALUES (?, ?, ?)", skill_rows)
+    connection.executemany("INSERT INTO employee_borrowed VALUES (?, ?, ?)", borrowed_rows)
+
+
+def _read_lists(connection: sqlite3.Connection, table: str, key_column: str, value_column: str) -> dict[int, list[str]]:
+    # rebuilds the ordered lists (skills, borrowed equipment, queues) stored one row per item
+    lists: dict[int, list[str]] = {}
+    for key, value in connection.execute(f"SELECT {key_column}, {value_column} FROM {table} ORDER BY {key_column}, position"):
+        lists.setdefault(key, []).append(value)
+    return lists
+
+
+def read_employees_from_sqlite(connection: sqlite3.Connection) -> list[Employee]:
+    skills = _read_lists(connection, "employee_skills", "emp_key", "skill_id")
+    borrowed = _read_lists(connection, "employee_borrowed", "emp_key", "equip_id")
+    employees = []
+    for key, emp_id, name, password_hash, contactInfo, numLostEquips, isAdmin in connection.execute("SELECT * FROM employees ORDER BY rowid"):
+        employees.append(Employee(name, password_hash, emp_id, contactInfo, borrowed.get(key, []), skills.get(key, []), numLostEquips, isAdmin=bool(isAdmin), key=key))
+    return employees
+
+
+def write_equipment_to_sqlite(equipment: list[Equipment], connection: sqlite3.Connection):
+    with connection:
+        connection.execute("DELETE FROM equipment")
+        connection.execute("DELETE FROM equipment_skills")
+        connection.execute("DELETE FROM equipment_queue")
+        _insert_equipment(equipment, row_keys(equipment), connection)
+
+
+def _insert_equipment(equipment: list[Equipment], keys: list[int], connection: sqlite3.Connection):
+    rows = [(key, equip.equipId, equip.name, equip.borrower_id, int(equip.isLost)) for equip, key in zip(equipment, keys)]
+    skill_rows = [(key, i, skill_id) for equip, key in zip(equipment, keys) for i, skill_id in enumerate(equip.skillRequirementsIDs)]
+    queue_rows = [(key, i, emp_id) for equip, key in zip(equipment, keys) for i, emp_id in enumerate(equip.queue.savedItems())]
+    connection.executemany("INSERT INTO equipment VALUES (?, ?, ?, ?, ?)", rows)
+    connection.executemany("INSERT INTO equipment_skills VALUES (?, ?, ?)", skill_rows)
+    connection.executemany("INSERT INTO equipment_queue VALUES (?, ?, ?)", queue_rows)
+
+
+def read_equipment_from_sqlite(connection: sqlite3.Connection) -> list[Equipment]:
+    skills = _read_lists(connection, "equipment_skills", "equip_key", "skill_id")
+    queues = _read_lists(connection, "equipment_queue", "equip_key", "emp_id")
+    equipment = []
+    for key, equip_id, name, borrower_id, is_lost in connection.execute("SELECT * FROM equipment ORDER BY rowid"):
+        equip = Equipment(equipId=equip_id, name=name, borrower_id=borrower_id, skillRequirementsIDs=skills.get(key, []), queue=queues.get(key, []), key=key)
+        equip.isLost = bool(is_lost)
+        equipment.append(equip)
+    return equipment
+
+
+def write_skills_to_sqlite(skills: list[Skill], connection: sqlite3.Connection):
+    rows = [(key, skill.skillId, skill.name) for skill, key in zip(skills, row_keys(skills))]
+    with connection:
+        connection.execute("DELETE FROM skills")
+        connection.executemany("INSERT INTO skills VALUES (?, ?, ?)", rows)
+
+
+def read_skills_from_sqlite(connection: sqlite3.Connection) -> list[Skill]:
+    return [Skill(name=name, skillId=skill_id, key=key) for key, skill_id, name in connection.execute("SELECT * FROM skills ORDER BY rowid")]
+
+
+def write_logs_to_sqlite(logs: list[Log], connection: sqlite3.Connection):
+    with connection:
+        connection.execute("DELETE FROM logs")
+        connection.executemany(f"INSERT INTO logs ({LOG_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", map(log_row, logs))
+
+
+def append_logs_to_sqlite(logs: list[Log], connection: sqlite3.Connection):
+    with connection:
+        connection.executemany(f"INSERT INTO logs ({LOG_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", map(log_row, logs))
+
+
+def read_logs_from_sqlite(connection: sqlite3.Connection) -> list[Log]:
+    return [row_to_log(row) for row in connection.execute(f"SELECT {LOG_COLUMNS} FROM logs ORDER BY log_id")]
+
+
+def write_keys_to_sqlite(tables: dict[str, KeyTable], connection: sqlite3.Connection):
+    rows = [(table_name, key, item_id, int(is_active)) for table_name, table in tables.items() for key, item_id, is_active in table.rows()]
+    with connection:
+        connection.execute("DELETE FROM id_keys")
+        connection.executemany("INSERT INTO id_keys VALUES (?, ?, ?, ?)", rows)
+
+
+def read_keys_from_sqlite(connection: sqlite3.Connection) -> dict[str, KeyTable]:
+    rows: dict[str, list] = {}
+    for table_name, key, item_id, is_active in connection.execute("SELECT * FROM id_keys ORDER BY table_name, item_key"):
+        rows.setdefault(table_name, []).append((key, item_id, bool(is_active)))
+    return {table_name: KeyTable(table_rows) for table_name, table_rows in rows.items()}
+
+
+def save_transaction_to_sqlite(log: Log, equip: Equipment, emp: Employee, connection: sqlite3.Connection):
+    """
+    Saves a check-in / check-out / lost report as one transaction: the equipment row, the employee's borrowed list and the log.
+    Both objects need a key (they get one when added through Manager). Ones added since the last save are inserted.
+    """
+    with connection:
+        if connection.execute("UPDATE equipment SET borrower_id = ?, is_lost = ? WHERE equip_key = ?", (equip.borrower_id, int(equip.isLost), equip.key)).rowcount == 0:
+            _insert_equipment([equip], [equip.key], connection)
+        if connection.execute("UPDATE employees SET num_lost_equips = ? WHERE emp_key = ?", (emp.numLostEquips, emp.key)).rowcount == 0:
+            _insert_employees([emp], [emp.key], connection)
+        else:
+            connection.execute("DELETE FROM employee_borrowed WHERE emp_key = ?", (emp.key,))
+            connection.executemany("INSERT INTO employee_borrowed VALUES (?, ?, ?)", [(emp.key, i, equip_id) for i, equip_id in enumerate(emp.borrowedEquipIds)])
+        connection.execute(f"INSERT INTO logs ({LOG_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", log_row(log))
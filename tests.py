@@ -3,7 +3,23 @@ from GUI import *
 from manager import *
 from Pipeline import *
 from csv_database import *
-from os import remove
+from sqlite_database import *
+from database import ConnectionPool, MySQLRepository
+from columnar_logs import ColumnarLogs, open_columnar_logs, encode_id, np
+from background_saver import BackgroundSaver, AutosaveSchedule
+from partitioned_logs import PartitionedLogs, MANIFEST_FILE
+from log_rollups import CompactedLogs, compact_logs, read_rollups_from_csv
+from skill_bitmasks import SkillBitmasks
+from report_arrays import LogArrays
+from log_aggregates import LogAggregates
+from log_index import LogTimeIndex
+from snapshot_cache import read_snapshot_cache, write_snapshot_cache, is_snapshot_cache_valid
+from shutil import rmtree
+import sqlite3
+import gzip
+import pickle
+from sys import intern
+from os import remove, path
 
 
 def test_getMissingSkills(): # Here's an example to test the "getMissingSkills" function in dataStructures.py in the Equipment class
@@ -52,7 +68,7 @@ def persistent_data_test():
         {
             "func": lambda: write_logs_to_csv(logs=[log1], filename=test_fns[2]),  # Test writing logs to file
             "get_func": lambda: read_file(test_fns[2]),
-            "expected": "Date,Emp ID,Equip ID,Logcode,Notes\n\"16/02/2024, 01:01:01\",emp0,equip0,1,\n"
+            "expected": "Date,Emp ID,Equip ID,Logcode,Notes,Emp Key,Equip Key\n2024-02-16 01:01:01,emp0,equip0,1,,,\n"
         }, 
         {
             "func": lambda: write_skills_to_csv(skills=[skill1], filename=test_fns[3]), # Test writing skills to file
@@ -70,6 +86,768 @@ def persistent_data_test():
     print("- Data Saving is Persistent") # if it get's this far, success! So print result!
 
 
+def test_idRegistry():
+    emp1 = Employee(name="Test Emp", password_hash="123", emp_id="emp0", contactInfo="")
+    emp2 = Employee(name="Test Emp 2", password_hash="123", emp_id="emp1", contactInfo="")
+    registry = IDRegistry("emp_id", [emp1, emp2])
+
+    assert(registry.get("emp0") is emp1)
+    assert(registry.get("missing") is None)
+
+    registry.changeID(emp1, "emp5")  # ID changes move the key
+    assert(emp1.emp_id == "emp5")
+    assert(registry.get("emp5") is emp1 and "emp0" not in registry)
+
+    registry.remove(emp2)
+    assert(registry.get("emp1") is None and len(registry) == 1)
+
+    blank1 = Employee(name="", password_hash="", emp_id="", contactInfo="")  # two new (blank) items shouldn't knock each other out
+    blank2 = Employee(name="", password_hash="", emp_id="", contactInfo="")
+    registry.add(blank1)
+    registry.add(blank2)
+    registry.changeID(blank2, "emp2")
+    assert(registry.get("") is blank1 and registry.get("emp2") is blank2)
+    blank3 = Employee(name="", password_hash="", emp_id="", contactInfo="")
+    registry.add(blank3)
+    registry.changeID(blank1, "emp3")  # the other holder of "" takes over
+    assert(registry.get("") is blank3 and registry.get("emp3") is blank1)
+    registry.remove(blank3)
+    assert(registry.get("") is None and "" not in registry)
+    print("- IDRegistry passed tests")
+
+
+def test_availabilityIndex():
+    equip1 = Equipment(equipId="0", name="Equip 0")
+    equip2 = Equipment(equipId="1", name="Equip 1", borrower_id="emp0")
+    index = AvailabilityIndex([equip1, equip2])
+    assert(index.getAvailable() == [equip1])
+
+    equip1.borrower_id = "emp1"  # checked out
+    index.update(equip1)
+    equip2.borrower_id = None  # checked in
+    index.update(equip2)
+    assert(index.getAvailable() == [equip2])
+
+    equip1.isLost = True
+    index.update(equip1)
+    assert(index.getLost() == [equip1] and index.isLost(equip1))
+
+    index.remove(equip1)
+    assert(index.getLost() == [] and index.getAvailable() == [equip2])
+    print("- AvailabilityIndex passed tests")
+
+
+def test_skillIndex():
+    emp1 = Employee(name="Test Emp", password_hash="123", emp_id="emp0", contactInfo="", skillIds=["s0", "s1"])
+    emp2 = Employee(name="Test Emp 2", password_hash="123", emp_id="emp1", contactInfo="", skillIds=["s1"])
+    equip = Equipment(equipId="equip0", name="Test Equip", skillRequirementsIDs=["s1"])
+    index = SkillIndex()
+    index.rebuild([emp1, emp2], [equip])
+
+    assert(index.getEmployees("s1") == [emp1, emp2])
+    assert(index.getEquipment("s1") == [equip] and index.getEquipment("s0") == [])
+
+    index.renameSkill("s1", "s2")
+    assert(index.getEmployees("s1") == [] and index.getEmployees("s2") == [emp1, emp2])
+
+    emp2.removeSkill("s1")
+    index.removeReference(emp2, "s2")
+    assert(index.getEmployees("s2") == [emp1])
+
+    index.dropSkill("s2")
+    assert(index.getEmployees("s2") == [] and index.getEquipment("s2") == [])
+    print("- SkillIndex passed tests")
+
+
+def test_keyTable():
+    table = KeyTable()
+    key0, key1 = table.assign("emp0"), table.assign("emp1")
+    log = Log(date=datetime.now(), logCode=LOG_CODES.CHECKOUT, empId="emp0", equipId="equip0", notes=[], empKey=key0)
+
+    table.rename(key0, "emp5")  # the log doesn't need to change
+    assert(table.idOf(log.empKey) == "emp5" and table.keyOf("emp5") == key0 and table.keyOf("emp0") is None)
+
+    table.retire(key1)  # deleted employees can still be looked up by key
+    assert(table.keyOf("emp1") is None and table.idOf(key1) == "emp1")
+
+    write_keys_to_csv({"employees": table}, "keys_test.csv")
+    loaded = read_keys_from_csv("keys_test.csv")["employees"]
+    remove("keys_test.csv")
+    assert(loaded.rows() == table.rows())
+    assert(loaded.assign("emp2") == 2)  # new keys don't reuse old ones
+    print("- KeyTable passed tests")
+
+
+def test_appendLogs():
+    log1 = Log(date=datetime(year=2024, month=2, day=16, hour=1, minute=1, second=1), logCode=LOG_CODES.CHECKOUT, empId="emp0", equipId="equip0", notes=["note"], empKey=0, equipKey=0)
+    log2 = Log(date=datetime(year=2024, month=2, day=17, hour=1, minute=1, second=1), logCode=LOG_CODES.CHECKIN, empId="emp0", equipId="equip0", notes=["note"], empKey=0, equipKey=0)
+    fn = "logs_append_test.csv"
+
+    append_logs_to_csv([log1], fn)  # creates the file with a header
+    append_logs_to_csv([log2], fn)
+    assert(read_logs_from_csv(fn) == [log1, log2])
+    assert(logs_have_keys(fn))
+    with open(fn, 'w', newline='') as file:  # written before the key columns existed
+        file.write("Date,Emp ID,Equip ID,Logcode,Notes\n\"16/02/2024, 01:01:01\",emp0,equip0,1,note\n")
+    assert(not logs_have_keys(fn))
+    remove(fn)
+    print("- Log appending passed tests")
+
+
+def test_changeTracking():
+    tracker = ChangeTracker()
+    emp = Employee(name="Test Emp", password_hash="123", emp_id="emp0", contactInfo="", skillIds=["s0"])
+    skill = Skill(name="Test Skill", skillId="s0")
+    emp.track(tracker)
+    skill.track(tracker)
+    assert(tracker.dirty == set())  # attaching the tracker isn't a change
+
+    emp.contactInfo = "email@email.com"
+    assert(tracker.dirty == {"employees"})
+
+    tracker.clear()
+    emp.alterSkill("s0", "s1")  # in place list changes count too
+    skill.skillId = "s1"
+    assert(tracker.dirty == {"employees", "skills"})
+
+    tracker.clear()
+    with tracker.paused():  # already saved some other way
+        emp.contactInfo = "other@email.com"
+    assert(tracker.dirty == set())
+
+    # rows are tracked by key for storage that saves them one at a time
+    emp.key, skill.key = 4, 2
+    tracker.clear()
+    emp.name = "Renamed"
+    tracker.markRemoved("skills", 2)
+    assert(tracker.changedRows("employees") == {4} and tracker.removed == {"skills": {2}})
+    tracker.mark("employees")
+    assert(tracker.changedRows("employees") is None)  # every row
+    taken = tracker.take()
+    assert(tracker.dirty == set() and taken.dirty == {"employees", "skills"})
+    tracker.merge(taken)  # ex: the save failed
+    assert(tracker.dirty == {"employees", "skills"} and tracker.removed == {"skills": {2}})
+    print("- Change tracking passed tests")
+
+
+def test_sqliteStorage():
+    connection = create_connection(":memory:")
+    emp = Employee(name="Test Emp", password_hash="123", emp_id="emp0", contactInfo="", skillIds=["skill1"], key=0)
+    equip = Equipment(name="Test Equip", equipId="equip0", skillRequirementsIDs=["skill1"], key=0)
+    skill = Skill(name="Test Skill", skillId="skill1", key=0)
+    log = Log(date=datetime(year=2024, month=2, day=16, hour=1, minute=1, second=1), logCode=LOG_CODES.CHECKOUT, empId="emp0", equipId="equip0", notes=["note"], empKey=0, equipKey=0)
+
+    write_employees_to_sqlite([emp], connection)
+    write_equipment_to_sqlite([equip], connection)
+    write_skills_to_sqlite([skill], connection)
+    write_logs_to_sqlite([log], connection)
+    assert([x.fields() for x in read_employees_from_sqlite(connection)] == [emp.fields()])
+    assert([x.fields() for x in read_equipment_from_sqlite(connection)] == [equip.fields()])
+    assert(read_skills_from_sqlite(connection) == [skill] and read_logs_from_sqlite(connection) == [log])
+
+    # checkout saved as one transaction
+    equip.borrower_id = emp.emp_id
+    emp.borrowedEquipIds.append(equip.equipId)
+    save_transaction_to_sqlite(log, equip, emp, connection)
+    assert(read_employees_from_sqlite(connection)[0].borrowedEquipIds == ["equip0"])
+    assert(read_equipment_from_sqlite(connection)[0].borrower_id == "emp0")
+    assert(len(read_logs_from_sqlite(connection)) == 2)
+
+    # dates are saved like the csv files do, so a log reads back the same from either
+    precise = Log(date=log.date.replace(microsecond=123456), logCode=log.logCode, empId="emp0", equipId="equip0", notes=["note"], empKey=0, equipKey=0)
+    append_logs_to_sqlite([precise], connection)
+    write_logs_to_csv([precise], fn := "precise_logs_test.csv")
+    assert(read_logs_from_sqlite(connection)[-1] == read_logs_from_csv(fn)[0] and read_logs_from_csv(fn)[0].date == log.date)
+    remove(fn)
+
+    # equipment / employees added since the last save are inserted by the transaction
+    emp2 = Employee(name="New Emp", password_hash="123", emp_id="emp1", contactInfo="", skillIds=["skill1"], key=1)
+    equip2 = Equipment(name="New Equip", equipId="equip1", borrower_id="emp1", key=1)
+    emp2.borrowedEquipIds.append("equip1")
+    save_transaction_to_sqlite(log, equip2, emp2, connection)
+    assert([x.fields() for x in read_employees_from_sqlite(connection)] == [emp.fields(), emp2.fields()])
+    assert([x.fields() for x in read_equipment_from_sqlite(connection)] == [equip.fields(), equip2.fields()])
+    close_connection(connection)
+    print("- SQLite storage passed tests")
+
+
+def test_mysqlRepository():  # uses a SQLite file as a local stand-in for the MySQL server
+    fn = "mysql_standin_test.db"
+    create_connection(fn).close()  # same tables as the MySQL schema
+    pool = ConnectionPool(lambda: sqlite3.connect(fn), size=2)
+    repository = MySQLRepository(pool, placeholder="?", locking_reads=False)
+
+    emp1 = Employee(name="Test Emp", password_hash="123", emp_id="emp0", contactInfo="", key=0)
+    emp2 = Employee(name="Test Emp 2", password_hash="123", emp_id="emp1", contactInfo="", key=1)
+    equip = Equipment(name="Test Equip", equipId="equip0", key=0)
+    repository.save_employees([emp1, emp2])
+    repository.save_equipment([equip])
+    assert([x.emp_id for x in repository.read_employees()] == ["emp0", "emp1"])
+
+    # saving a kiosk's changed rows leaves the rest alone, deleted ones are removed
+    emp3 = Employee(name="Test Emp 3", password_hash="123", emp_id="emp2", contactInfo="", key=2)
+    emp2.name = "Renamed"
+    repository.save_employees([emp2, emp3])
+    assert([(x.emp_id, x.name) for x in repository.read_employees()] == [("emp0", "Test Emp"), ("emp1", "Renamed"), ("emp2", "Test Emp 3")])
+    repository.save_employees([], removed_keys=[2])
+    assert([x.emp_id for x in repository.read_employees()] == ["emp0", "emp1"])
+    repository.save_keys([("employees", 0, "emp0", True), ("employees", 1, "emp1", True)])
+    repository.save_keys([("employees", 1, "emp9", True)])
+    assert([row for row in repository.read_keys()["employees"].rows()] == [(0, "emp0", True), (1, "emp9", True)])
+
+    # two kiosks check out the same equipment, only the first one is saved
+    kiosk1_equip, kiosk2_equip = repository.read_equipment()[0], repository.read_equipment()[0]
+    kiosk1_equip.borrower_id = emp1.emp_id
+    emp1.borrowedEquipIds.append(equip.equipId)
+    log1 = Log(date=datetime(year=2024, month=2, day=16), logCode=LOG_CODES.CHECKOUT, empId="emp0", equipId="equip0", notes=[], empKey=0, equipKey=0)
+    assert(repository.save_transaction(log1, kiosk1_equip, emp1))
+
+    kiosk2_equip.borrower_id = emp2.emp_id
+    emp2.borrowedEquipIds.append(equip.equipId)
+    log2 = Log(date=datetime(year=2024, month=2, day=16), logCode=LOG_CODES.CHECKOUT, empId="emp1", equipId="equip0", notes=[], empKey=1, equipKey=0)
+    assert(not repository.save_transaction(log2, kiosk2_equip, emp2))
+    assert(repository.read_equipment_status(kiosk2_equip) == ("emp0", False))  # what kiosk 2 shows instead
+    emp2.borrowedEquipIds.remove(equip.equipId)
+
+    assert(repository.read_equipment()[0].borrower_id == "emp0")
+    assert([x.borrowedEquipIds for x in repository.read_employees()] == [["equip0"], []])
+    assert(list(repository.stream_logs(batch_size=1)) == [log1])
+    repository.append_logs([log2])
+    stream = repository.stream_logs(batch_size=1)
+    assert(next(stream) == log1)
+    stream.close()  # stopped part way, the connection still works for the next user
+    assert(repository.read_logs() == [log1, log2])
+    pool.close()
+    remove(fn)
+    print("- MySQLRepository passed tests")
+
+
+def test_logStreaming():
+    fn = "logs_stream_test.csv"
+    logs = [Log(date=datetime(year=2024, month=2, day=day), logCode=code, empId="emp0", equipId="equip0", notes=["note"]) for day in range(1, 11) for code in [LOG_CODES.CHECKOUT, LOG_CODES.LOST]]
+    write_logs_to_csv(logs, fn)
+
+    reader = CSVLogReader(fn)
+    assert(list(reader) == logs and list(reader) == logs)  # can be looped over more than once
+    in_range = list(stream_logs_from_csv(fn, start_date=datetime(year=2024, month=2, day=3), end_date=datetime(year=2024, month=2, day=4), logCodes=[LOG_CODES.LOST]))
+    assert([(log.date.day, log.logCode) for log in in_range] == [(3, LOG_CODES.LOST), (4, LOG_CODES.LOST)])
+
+    # the Pipeline filters can use the reader instead of a list
+    pipeline = Pipeline(report={'header': '', 'data': {}}, filters=[num_lost_equipment, lambda report: calc_datetimes_of(LOG_CODES.LOST, report, datetime(year=2024, month=2, day=9))], data=[reader, 1, 1, 1])
+    report = pipeline.executeFilters()
+    assert(report['data']['numLostEquipment'] == 10)
+    assert(report['data']['dateTimesOfLOST'] == [datetime(year=2024, month=2, day=9), datetime(year=2024, month=2, day=10)])
+    remove(fn)
+    print("- Log streaming passed tests")
+
+
+def test_logDates():
+    date = datetime(year=2024, month=2, day=16, hour=13, minute=1, second=1)
+    assert(encode_log_date(date) == "2024-02-16 13:01:01")
+    assert(decode_log_date(encode_log_date(date)) == date)
+    assert(decode_log_date("16/02/2024, 13:01:01") == date)  # files written before ISO dates still load
+
+    fn = "logs_dates_test.csv"
+    with open(fn, 'w', newline='') as f:  # old file with old dates & no key columns, then a new log appended
+        f.write("Date,Emp ID,Equip ID,Logcode,Notes\n\"16/02/2024, 13:01:01\",emp0,equip0,1,note\n")
+    append_logs_to_csv([Log(date=date + timedelta(days=1), logCode=LOG_CODES.CHECKIN, empId="emp0", equipId="equip0", notes=["note"])], fn)
+    assert([log.date for log in read_logs_from_csv(fn)] == [date, date + timedelta(days=1)])
+    assert([log.date for log in stream_logs_from_csv(fn, start_date=date + timedelta(hours=1))] == [date + timedelta(days=1)])
+    remove(fn)
+    print("- Log dates passed tests")
+
+
+def test_columnarLogs():
+    if np is None:
+        print("- Columnar logs skipped (numpy isn't installed)")
+        return
+    directory = "logs_store_test"
+    logs = [Log(date=datetime(year=2024, month=2, day=day, hour=1), logCode=code, empId=f"emp{day % 3}", equipId="equip0", notes=["a-b", "c"], empKey=day % 3, equipKey=None)
+            for day in range(1, 11) for code in [LOG_CODES.CHECKOUT, LOG_CODES.LOST]]
+    store = ColumnarLogs(directory)
+    store.extend(logs[:-1])
+    store.append(logs[-1])
+
+    reopened = ColumnarLogs(directory)
+    assert(len(reopened) == 20 and list(reopened) == logs and reopened[3] == logs[3])
+    assert(reopened.countCode(LOG_CODES.LOST) == 10)
+    in_range = reopened.filter(start_date=datetime(year=2024, month=2, day=9), logCodes=[LOG_CODES.LOST])
+    assert([log.date.day for log in in_range] == [9, 10])
+
+    # same report as with a list of logs
+    report = Pipeline(report={'header': '', 'data': {}}, filters=[num_lost_equipment, lambda report: calc_datetimes_of(LOG_CODES.LOST, report, datetime(year=2024, month=2, day=9))], data=[reopened, 1, 1, 1]).executeFilters()
+    assert(report['data']['numLostEquipment'] == 10 and report['data']['dateTimesOfLOST'] == [log.date for log in in_range])
+    del store, reopened, in_range
+    rmtree(directory)
+
+    # any character can be in an ID, a crash part way through adding one loses only that one
+    odd = Log(date=datetime(year=2024, month=2, day=1), logCode=LOG_CODES.CHECKOUT, empId="emp\n0", equipId="équip,1", notes=[])
+    ColumnarLogs(directory).append(odd)
+    with open(path.join(directory, "emp_ids_table.bin"), 'ab') as file:
+        file.write(encode_id("emp2")[:-1])
+    store = ColumnarLogs(directory)
+    assert(list(store) == [odd] and store.ids("emp_ids") == ["emp\n0"])
+    store.append(Log(date=odd.date, logCode=LOG_CODES.CHECKIN, empId="emp2", equipId="équip,1", notes=[]))
+    assert([log.empId for log in ColumnarLogs(directory)] == ["emp\n0", "emp2"])
+    del store
+    rmtree(directory)
+
+    # logs imported from csv get their keys filled in
+    write_logs_to_csv([odd], "logs_import_test.csv")
+    store = open_columnar_logs(directory, import_from="logs_import_test.csv", backfill=lambda logs: [Log(log.date, log.logCode, log.empId, log.equipId, log.notes, empKey=7, equipKey=8) for log in logs])
+    assert([(log.empKey, log.equipKey) for log in store] == [(7, 8)])
+    del store
+    rmtree(directory)
+    remove("logs_import_test.csv")
+    print("- Columnar logs passed tests")
+
+
+def test_atomicSave():
+    fn = "employees_atomic_test.csv"
+    emps = [Employee(name="Test Emp", password_hash="123", emp_id="emp0", contactInfo="", skillIds=["s0"])]
+    write_employees_to_csv(emps, fn)
+    with open(fn, 'r') as file:
+        saved = file.read()
+
+    try:  # fails part way through writing the rows
+        write_employees_to_csv(emps + [None], fn)
+        assert(False)
+    except AttributeError:
+        pass
+    with open(fn, 'r') as file:
+        assert(file.read() == saved)  # old file is untouched
+    assert(not fileExits(fn + ".tmp"))
+    remove(fn)
+    print("- Atomic saving passed tests")
+
+
+def test_backgroundSaver():
+    tracker = ChangeTracker()
+    emp = Employee(name="Test Emp", password_hash="123", emp_id="emp0", contactInfo="", skillIds=["s0"])
+    emp.track(tracker)
+    copy = emp.snapshot()
+    emp.skillIds.append("s1")
+    assert(copy.skillIds == ["s0"] and copy.emp_id == "emp0")  # the copy doesn't change with the original
+    copy.name = "changed"
+    assert(tracker.dirty == set() and emp.name == "Test Emp")  # and isn't tracked
+
+    saver = BackgroundSaver()
+    saved = []
+    saver.submit(lambda: saved.append(copy), tag={"employees"})
+    saver.submit(lambda: 1/0, tag={"skills"})
+    assert(saver.isBusy())
+    results = saver.wait()
+    assert(not saver.isBusy() and saved == [copy])
+    assert(results[0] == ({"employees"}, None) and results[1][0] == {"skills"} and isinstance(results[1][1], ZeroDivisionError))
+    saver.close()
+    print("- Background saving passed tests")
+
+
+def test_autosaveSchedule():
+    schedule = AutosaveSchedule(interval=1.5, every=3)
+    assert(schedule.intervalMs() == 1500)
+    assert([schedule.transaction() for _ in range(3)] == [False, False, True])
+    assert(not schedule.transaction())  # already asked for, until the save runs
+    schedule.ran()
+    assert(schedule.transaction())
+    schedule.ran()
+    schedule.saved()
+    assert(not schedule.transaction())
+
+    off = AutosaveSchedule()
+    assert(off.intervalMs() is None and not any(off.transaction() for _ in range(100)))
+    print("- Autosave schedule passed tests")
+
+
+def test_lazyList():
+    loads = []
+    def loader():
+        loads.append(1)
+        return ["a", "b"]
+    items = LazyList(loader)
+    assert(not items.isLoaded() and loads == [])  # nothing read until it's used
+
+    items.append("c")
+    assert(items.isLoaded() and items == ["a", "b", "c"] and len(items) == 3)
+    items.remove("a")
+    assert(list(items) == ["b", "c"] and items[-1] == "c")
+    assert(loads == [1])  # only read once
+    print("- LazyList passed tests")
+
+
+def test_snapshotCache():
+    source, cache = "employees_cache_test.csv", "cache_test.cache"
+    emps = [Employee(name="Test Emp", password_hash="123", emp_id="emp0", contactInfo="", skillIds=["s0"], key=0)]
+    keys = {"employees": KeyTable([(0, "emp0", True)])}
+    write_employees_to_csv(emps, source)
+    assert(read_snapshot_cache(cache, [source]) is None)  # no cache yet
+
+    write_snapshot_cache(cache, [source], {"employees": emps, "keys": keys})
+    assert(is_snapshot_cache_valid(cache, [source]))
+    cached = read_snapshot_cache(cache, [source])
+    assert(cached["employees"][0].fields() == emps[0].fields() and cached["keys"]["employees"].rows() == keys["employees"].rows())
+
+    with open(source, 'a') as file:  # source changed, the cache is out of date
+        file.write("\n")
+    assert(not is_snapshot_cache_valid(cache, [source]) and read_snapshot_cache(cache, [source]) is None)
+    remove(source)
+    remove(cache)
+    print("- Snapshot cache passed tests")
+
+
+def test_parallelLoading():
+    fn, emp_fn = "logs_parallel_test.csv", "employees_parallel_test.csv"
+    logs = [Log(date=datetime(year=2024, month=2, day=1 + i % 28, hour=i % 24), logCode=[LOG_CODES.CHECKIN, LOG_CODES.CHECKOUT, LOG_CODES.LOST][i % 3], empId=f"emp{i % 7}", equipId=f"equip{i % 5}", notes=["note"], empKey=i % 7, equipKey=None)
+            for i in range(500)]
+    write_logs_to_csv(logs, fn)
+    assert(read_logs_from_csv_parallel(fn, workers=3, min_bytes=0) == logs)  # split into 3 blocks, same order
+    assert(read_logs_from_csv_parallel(fn, workers=1) == logs)
+
+    # quoted fields (commas, quotes, line breaks) don't stop it running in parallel or split a row
+    quoted = [Log(date=log.date, logCode=log.logCode, empId=log.empId, equipId=log.equipId, notes=[f'said "hi",\nline {i}' * (i % 4)], empKey=log.empKey) for i, log in enumerate(logs)]
+    write_logs_to_csv(quoted, fn)
+    for workers in [2, 5]:
+        assert(read_logs_from_csv_parallel(fn, workers=workers, min_bytes=0) == quoted)
+
+    emps = [Employee(name="Test Emp", password_hash="123", emp_id=f"emp{i}", contactInfo="", skillIds=["s0"]) for i in range(10)]
+    write_employees_to_csv(emps, emp_fn)
+    tables = read_tables_from_csv({"employees": emp_fn, "logs": fn}, workers=2, min_bytes=0)
+    assert(tables["logs"] == quoted and [emp.fields() for emp in tables["employees"]] == [emp.fields() for emp in emps])
+    remove(fn)
+    remove(emp_fn)
+    print("- Parallel loading passed tests")
+
+
+def test_partitionedLogs():
+    directory = "logs_partitions_test"
+    logs = [Log(date=datetime(year=2024, month=month, day=day, hour=1), logCode=code, empId="emp0", equipId="equip0", notes=["note"], empKey=0, equipKey=0)
+            for month in [1, 2, 3] for day in [1, 15] for code in [LOG_CODES.CHECKOUT, LOG_CODES.LOST]]
+    store = PartitionedLogs(directory)
+    store.extend(logs)
+    assert([p.name for p in store.partitions()] == ["2024-01", "2024-02", "2024-03"])
+
+    store = PartitionedLogs(directory)  # reopened from the manifest
+    assert(list(store) == logs and len(store) == 12)
+    feb = store.filter(start_date=datetime(year=2024, month=2, day=1), end_date=datetime(year=2024, month=2, day=20))
+    assert(list(feb) == logs[4:8] and feb.countCode(LOG_CODES.LOST) == 2)
+    assert(store.filter(start_date=datetime(year=2024, month=2, day=10)).countCode(LOG_CODES.LOST) == 3)  # part of february, all of march
+
+    assert(store.compress(older_than=datetime(year=2024, month=3, day=1)) == ["2024-01", "2024-02"])
+    assert(fileExits(path.join(directory, "logs-2024-01.csv.gz")) and not fileExits(path.join(directory, "logs-2024-01.csv")))
+    late = Log(date=datetime(year=2024, month=1, day=20), logCode=LOG_CODES.CHECKIN, empId="emp0", equipId="equip0", notes=["late"], empKey=0, equipKey=0)
+    with open(manifest := path.join(directory, MANIFEST_FILE)) as file:
+        before = file.read()
+    store.append(late)  # added to the compressed file
+    store.append(Log(date=datetime(year=2024, month=3, day=20), logCode=LOG_CODES.CHECKIN, empId="emp0", equipId="equip0", notes=["new"], empKey=0, equipKey=0))
+    with open(manifest) as file:
+        assert(file.read() == before)  # appends to existing partitions don't rewrite it
+    reopened = PartitionedLogs(directory)  # counts the rows past the sizes in the manifest
+    assert(len(reopened) == 14 and reopened.countCode(LOG_CODES.CHECKIN) == 2 and [p.rows for p in reopened.partitions()] == [5, 4, 5])
+    assert(list(reopened.filter(end_date=datetime(year=2024, month=1, day=31))) == logs[:4] + [late])
+    assert([p.rows for p in PartitionedLogs(directory).partitions()] == [5, 4, 5])  # caught up once, not counted again
+
+    remove(path.join(directory, MANIFEST_FILE))  # lost manifest is rebuilt from the files
+    rebuilt = PartitionedLogs(directory)
+    assert(len(rebuilt) == 14 and rebuilt.countCode(LOG_CODES.CHECKIN) == 2)
+    rmtree(directory)
+    print("- Partitioned logs passed tests")
+
+
+def test_logRollups():
+    fn, rollups_fn, archive_fn = "logs_rollup_test.csv", "rollups_test.csv", "logs_archive_test.csv.gz"
+    logs = [Log(date=datetime(year=2024, month=2, day=day, hour=hour), logCode=code, empId="emp0", equipId="equip0", notes=["note"], empKey=0, equipKey=0)
+            for day in range(1, 11) for hour in [8, 17] for code in [LOG_CODES.CHECKOUT, LOG_CODES.CHECKIN]]
+    write_logs_to_csv(logs, fn)
+
+    assert(compact_logs(fn, rollups_fn, datetime(year=2024, month=2, day=6, hour=12), archive_fn) == 20)  # days 1-5
+    assert(compact_logs(fn, rollups_fn, datetime(year=2024, month=2, day=6, hour=13), archive_fn) == 0)  # same day, nothing to do
+    rollups = read_rollups_from_csv(rollups_fn)
+    assert(rollups.horizon == datetime(year=2024, month=2, day=6) and len(rollups.counts) == 10 and len(rollups) == 20)
+    assert(read_logs_from_csv(fn) == logs[20:])
+    with gzip.open(archive_fn, 'rt', newline='') as file:
+        assert(len(file.read().splitlines()) == 21)  # header + the folded logs
+
+    combined = CompactedLogs(rollups, read_logs_from_csv(fn))
+    assert(len(combined) == 40 and combined.countCode(LOG_CODES.CHECKOUT) == 20)
+    window = combined.filter(start_date=datetime(year=2024, month=2, day=5), end_date=datetime(year=2024, month=2, day=6, hour=12))
+    assert(window.countCode(LOG_CODES.CHECKIN) == 3)  # day 5 rolled up (2) + day 6 at 8:00
+    assert([log.date for log in window.filter(logCodes=[LOG_CODES.CHECKIN])] == [datetime(year=2024, month=2, day=5)] * 2 + [datetime(year=2024, month=2, day=6, hour=8)])
+
+    # same report as with every raw log
+    filters = [num_lost_equipment, lambda report: calc_frequency_of(LOG_CODES.CHECKIN, report)]
+    report = Pipeline(report={'header': '', 'data': {}}, filters=filters, data=[combined, 1, 1, 1]).executeFilters()
+    assert(report['data']['numLostEquipment'] == 0 and report['data']['frequencyOfCHECKIN'] == 20)
+
+    # a compaction that crashed after adding to the archive (before saving the rollups) doesn't archive logs twice
+    with open(archive_fn, 'ab') as file:
+        file.write(gzip.compress(b"half of a crashed compaction"))
+    assert(compact_logs(fn, rollups_fn, datetime(year=2024, month=2, day=8), archive_fn) == 8)  # days 6-7
+    with gzip.open(archive_fn, 'rt', newline='') as file:
+        archived = file.read()
+    assert(read_logs_from_csv(fn) == logs[28:] and len(archived.splitlines()) == 29 and "crashed" not in archived)  # header + days 1-7
+    assert(len(read_rollups_from_csv(rollups_fn)) == 28)
+    for x in [fn, rollups_fn, archive_fn]:
+        remove(x)
+    print("- Log rollups passed tests")
+
+
+def test_compactEntities():
+    ids = IdSet(["s0", "s1", "s2"])
+    assert("s1" in ids and ids == ["s0", "s1", "s2"] and ids[1] == "s1" and len(ids) == 3)
+    ids.append("s1")  # already there
+    assert(ids.replace("s1", "s3") and ids == ["s0", "s3", "s2"])  # keeps its place
+    ids.remove("s0")
+    assert(ids.discard("s2") and not ids.discard("s2") and ids == ["s3"])
+    try:
+        ids.remove("s0")
+        assert(False)
+    except ValueError:
+        pass
+
+    # every list method keeps the set (used past SMALL_SIZE) up to date
+    big = IdSet(f"e{i}" for i in range(12))
+    big.insert(0, "e5")  # already there
+    big.insert(0, "x")
+    del big[1]
+    big[2] = "y"
+    big += ["e3", "z"]
+    assert(big.pop() == "z" and big.pop(0) == "x")
+    try:
+        big[0] = "y"
+        assert(False)
+    except ValueError:
+        pass
+    big.sort()
+    assert(big == sorted(["e1", "y"] + [f"e{i}" for i in range(3, 12)]))
+    assert(all(x in big for x in big) and not any(x in big for x in ["e0", "e2", "x", "z"]))
+    del big[:9]
+    assert(big == ["e9", "y"] and "e9" in big and "e3" not in big)
+    big.clear()
+    assert("e9" not in big and len(big) == 0)
+
+    emp = Employee(name="Test Emp", password_hash="123", emp_id="emp0", contactInfo="", skillIds=["s0", "s1"])
+    equip = Equipment(equipId="equip0", name="Test Equipment", skillRequirementsIDs=["s2", "s1", "s0"])
+    assert(not hasattr(emp, "__dict__") and not hasattr(equip, "__dict__") and not hasattr(Skill("skill", "s0"), "__dict__"))
+    assert(equip.getMissingSkills(emp) == ["s2"] and emp.emp_id is intern("emp0"))
+    copy = pickle.loads(pickle.dumps(emp.snapshot()))
+    assert(copy.fields() == emp.fields() and copy.skillIds == ["s0", "s1"])
+    print("- Compact entities passed tests")
+
+
+def test_skillBitmasks():
+    emp1 = Employee(name="Test Emp", password_hash="123", emp_id="emp1", contactInfo="", skillIds=["s0", "s1"])
+    emp2 = Employee(name="Test Emp 2", password_hash="123", emp_id="emp2", contactInfo="", skillIds=["s1"])
+    equip1 = Equipment(equipId="equip1", name="Needs s0 and s1", skillRequirementsIDs=["s1", "s0"])
+    equip2 = Equipment(equipId="equip2", name="Needs s1", skillRequirementsIDs=["s1"])
+    equip3 = Equipment(equipId="equip3", name="Needs nothing")
+    bits = SkillBitmasks()
+    bits.rebuild([emp1, emp2], [equip1, equip2, equip3])
+
+    assert(bits.canUse(emp1, equip1) and not bits.canUse(emp2, equip1))
+    assert(bits.missingSkills(emp2, equip1) == equip1.getMissingSkills(emp2) == ["s0"])
+    assert(bits.eligibleEquipment(emp2) == [equip2, equip3] and bits.eligibleEquipment(emp2, [equip3, equip1]) == [equip3])
+    assert(bits.qualifiedEmployees(equip1) == [emp1] and bits.qualifiedEmployees(equip3) == [emp1, emp2])
+
+    emp2.skillIds.append("s0")
+    bits.updateEmployee(emp2)
+    assert(bits.qualifiedEmployees(equip1) == [emp1, emp2])
+    bits.renameSkill("s0", "s9")  # the bit moves with the ID
+    equip1.alterSkill("s0", "s9")
+    assert(bits.missingSkills(emp2, equip1) == [])
+    bits.dropSkill("s1")
+    equip3.skillRequirementsIDs.append("s2")  # gets the freed bit
+    bits.updateEquipment(equip3)
+    assert(bits.bit("s2") == 1 and bits.eligibleEquipment(emp1) == [equip1, equip2])
+
+    # more skills than fit in the numpy masks, same answers from the plain ints
+    many = SkillBitmasks()
+    skilled = Employee(name="Skilled", password_hash="123", emp_id="emp3", contactInfo="", skillIds=[f"s{i}" for i in range(80)])
+    many.rebuild([emp1, skilled], [equip1, equip2, Equipment(equipId="equip4", name="Needs s70", skillRequirementsIDs=["s70"])])
+    assert([x.equipId for x in many.eligibleEquipment(skilled)] == ["equip1", "equip2", "equip4"] and many.qualifiedEmployees(equip1) == [skilled])  # equip1 needs s9 now
+    print("- SkillBitmasks passed tests")
+
+
+def test_reservationQueue():
+    queue = ReservationQueue(["emp1", "emp2", f"emp3{PRIORITY_SEPARATOR}2"])  # saved form, emp3 has a higher priority
+    assert(list(queue) == ["emp3", "emp1", "emp2"] and len(queue) == 3)
+    assert(ReservationQueue.parseItem("emp:7") == ("emp:7", 0))  # ':' is part of the ID, not a priority
+    assert(not queue.push("emp1") and queue.push("emp4") and queue.push("emp5", priority=2))
+    assert(list(queue) == ["emp3", "emp5", "emp1", "emp2", "emp4"])  # first come first served within a priority
+    assert(queue.cancel("emp5") and not queue.cancel("emp5") and "emp5" not in queue)
+    assert(queue.rename("emp1", "emp9") and list(queue) == ["emp3", "emp9", "emp2", "emp4"])
+    assert(queue.pop() == "emp3" and queue.peek() == "emp9" and queue.priorityOf("emp2") == 0)
+    assert(queue.savedItems() == ["emp9", "emp2", "emp4"] and queue.copy() == queue and pickle.loads(pickle.dumps(queue)) == queue)
+    for i in range(100):  # lots of cancelled entries get cleared out of the heap
+        queue.push(f"x{i}")
+        queue.cancel(f"x{i}")
+    assert(len(queue._heap) < 20 and queue.pop() == "emp9" and queue.pop() == "emp2" and queue.pop() == "emp4" and queue.pop() is None)
+
+    # saved with the equipment
+    equip1 = Equipment(equipId="equip1", name="Test Equip", borrower_id="emp1", queue=["emp2", f"emp3{PRIORITY_SEPARATOR}1"])
+    write_equipment_to_csv([equip1], fn := "test_reservations.csv")
+    loaded = read_equipment_from_csv(fn)[0]
+    remove(fn)
+    assert(list(loaded.queue) == ["emp3", "emp2"] and loaded.queue.priorityOf("emp3") == 1)
+    assert(equip1.snapshot().queue is not equip1.queue)
+
+    index = ReservationIndex()
+    equip2 = Equipment(equipId="equip2", name="Test Equip 2", queue=["emp2"])
+    index.rebuild([equip1, equip2])
+    assert(index.getEquipment("emp2") == [equip1, equip2] and index.getEquipment("emp3") == [equip1])
+    index.renameEmployee("emp2", "emp7")
+    assert(index.getEquipment("emp2") == [] and index.removeEmployee("emp7") == [equip1, equip2])
+    index.removeEquipment(equip1)
+    assert(index.getEquipment("emp3") == [])
+    print("- ReservationQueue passed tests")
+
+
+def test_fusedFilters():
+    now = datetime.now()
+    logs = [Log(date=now - timedelta(hours=i * 5 + 1), logCode=[LOG_CODES.LOST, LOG_CODES.CHECKIN, LOG_CODES.CHECKOUT][i % 3], empId="0", equipId="0", notes=[]) for i in range(300)]
+
+    class CountedLogs(list):  # counts how many times the logs are looped over
+        passes = 0
+        def __iter__(self):
+            CountedLogs.passes += 1
+            return super().__iter__()
+
+    filters = [x['func'] for x in AllFilters]
+    expected = {'header': 'h', 'data': {}}
+    for report_filter in filters:  # each filter on its own
+        expected = report_filter(expected | {'data': expected['data'] | {'logs': logs, 'numEmployees': 1, 'numEquipment': 4, 'numSkills': 0}})
+    pipeline = Pipeline(report={'header': 'h', 'data': {}}, filters=filters, data=[CountedLogs(logs), 1, 4, 0])
+    report = pipeline.executeFilters()
+    assert(CountedLogs.passes == 1)
+    for key in ['numLostEquipment', 'percentageLost', 'frequencyOfLOST', 'frequencyOfCHECKIN', 'frequencyOfCHECKOUT', 'dateTimesOfLOST']:
+        assert(report['data'][key] == expected['data'][key])
+    assert(report['data']['frequencyOfLOST'] == 100 and len(report['data']['dateTimesOfLOST']) == 48)  # the last filter is 30 days, a lost log every 15 hours
+
+    # percentage on its own still adds the count, filters without an accumulator still run
+    pipeline = Pipeline(report={'header': 'h', 'data': {}}, filters=[calculate_percentage_lost, lambda report: update_header(report, "x")], data=[logs, 1, 4, 0])
+    report = pipeline.executeFilters()
+    assert(report['data']['numLostEquipment'] == 100 and report['data']['percentageLost'] == "2500.0 %" and report['header'] == "x")
+
+    # an incomplete accumulator fails when it's made, not halfway through a report
+    class NoFinish(Accumulator):
+        def addBatch(self, logs): pass
+    try:
+        NoFinish()
+        assert(False)
+    except TypeError:
+        pass
+    try:
+        class NoArrays(Accumulator):
+            vectorized = True
+            def addBatch(self, logs): pass
+            def finish(self, report): return report
+        assert(False)
+    except TypeError:
+        pass
+    print("- Fused filters passed tests")
+
+
+def test_logArrays():
+    if np is None:
+        print("- LogArrays skipped (numpy isn't installed)")
+        return
+    now = datetime.now()
+    logs = [Log(date=now - timedelta(minutes=i * 7, microseconds=i), logCode=[LOG_CODES.LOST, LOG_CODES.CHECKIN, LOG_CODES.CHECKOUT][i % 3 if i % 5 else 0], empId=f"emp{i % 4}", equipId=f"equip{i % 6}", notes=[]) for i in range(20_000)]
+    logs[100].date = now - timedelta(days=1)  # right on the edge of the one day window (the filter's start is a bit later)
+
+    filters = [x['func'] for x in AllFilters[1:]]  # not the header, it has the time in it
+    run = lambda engine, logs: Pipeline(report={'header': 'h', 'data': {}}, filters=filters, data=[logs, 1, 4, 0], engine=engine).executeFilters()
+    expected = run("python", logs)
+    assert(run("numpy", logs) == expected)
+
+    arrays = LogArrays.fromLogs(logs[:5])
+    arrays.extend(logs[5:])
+    assert(len(arrays) == len(logs) and arrays.countCode(LOG_CODES.LOST) == sum(1 for log in logs if log.logCode == LOG_CODES.LOST))
+    assert(arrays.datesOf(LOG_CODES.CHECKIN, logs[-1].date, logs[0].date) == [log.date for log in logs if log.logCode == LOG_CODES.CHECKIN])
+
+    # columnar logs are converted from their columns (dates in whole seconds)
+    directory = "logs_arrays_test"
+    store = ColumnarLogs(directory)
+    store.extend([Log(date=log.date.replace(microsecond=0), logCode=log.logCode, empId=log.empId, equipId=log.equipId, notes=[]) for log in logs])
+    without_logs = lambda report: {key: value for key, value in report['data'].items() if key != 'logs'}
+    assert(without_logs(run("auto", store)) == without_logs(run("python", list(store))))
+    view = store.filter(logCodes=[LOG_CODES.LOST])
+    assert(LogArrays.fromLogs(view).datesOf(LOG_CODES.LOST) == LogArrays.fromLogs(list(view)).datesOf(LOG_CODES.LOST))
+    del store, view
+    rmtree(directory)
+    print("- LogArrays passed tests")
+
+
+def test_logAggregates():
+    now = datetime.now()
+    logs = [Log(date=now - timedelta(hours=300 - i, microseconds=i), logCode=[LOG_CODES.LOST, LOG_CODES.CHECKIN, LOG_CODES.CHECKOUT][i % 3], empId=f"emp{i % 4}", equipId=f"equip{i % 6}", notes=[]) for i in range(300)]
+    aggregates = LogAggregates(logs[:100])
+    for log in logs[100:]:  # the rest added one at a time like Manager does
+        aggregates.add(log)
+
+    class UnreadLogs(list):  # fails if a report goes through the logs
+        def __iter__(self):
+            raise AssertionError("logs were read")
+
+    filters = [x['func'] for x in AllFilters[1:]]  # not the header, it has the time in it
+    expected = Pipeline(report={'header': 'h', 'data': {}}, filters=filters, data=[logs, 1, 4, 0], engine="python").executeFilters()
+    pipeline = Pipeline(report={'header': 'h', 'data': {}}, filters=filters, data=[UnreadLogs(logs), 1, 4, 0])
+    pipeline.addLogAggregates(aggregates)
+    report = pipeline.executeFilters()
+    assert({k: v for k, v in report['data'].items() if k != 'logs'} == {k: v for k, v in expected['data'].items() if k != 'logs'})
+
+    assert(len(aggregates) == 300 and aggregates.countCode(LOG_CODES.LOST) == 100)
+    assert(aggregates.countCode(LOG_CODES.CHECKOUT) == 100 and aggregates.countBetween(LOG_CODES.LOST, now - timedelta(hours=31)) == 10)
+
+    # a log older than the others of its code still shows up in the windows, in the order it was added
+    old = Log(date=now - timedelta(hours=5), logCode=LOG_CODES.LOST, empId="emp0", equipId="equip0", notes=[])
+    aggregates.add(old)
+    window = aggregates.datesOf(LOG_CODES.LOST, now - timedelta(hours=31))
+    assert(len(window) == 11 and window[-1] == old.date)
+    print("- LogAggregates passed tests")
+
+
+def test_logTimeIndex():
+    start = datetime(year=2024, month=3, day=1)
+    codes = [LOG_CODES.LOST, LOG_CODES.CHECKIN, LOG_CODES.CHECKOUT]
+    logs = [Log(date=start + timedelta(hours=i), logCode=codes[i % 3], empId="emp0", equipId="equip0", notes=[]) for i in range(200)]
+    late = [Log(date=start + timedelta(hours=(i * 37) % 200, minutes=30), logCode=codes[i % 2], empId="emp1", equipId="equip1", notes=["imported"]) for i in range(40)]
+    late.append(Log(date=logs[10].date, logCode=logs[10].logCode, empId="emp2", equipId="equip0", notes=[]))  # same date as one already in
+
+    def scan(added, logCode, start_date, end_date):  # what filtering the logs in the order they were added gives
+        return [log.date for log in added if log.logCode == logCode and (start_date is None or start_date <= log.date) and (end_date is None or log.date <= end_date)]
+
+    index = LogTimeIndex(logs[:150])
+    for log in logs[150:]:
+        index.add(log)
+    windows = [(start + timedelta(hours=20), start + timedelta(hours=60)), (None, start + timedelta(hours=5)), (start + timedelta(hours=190, minutes=1), None), (None, None), (start + timedelta(days=30), None)]
+    for start_date, end_date in windows:
+        for code in codes:
+            assert(index.datesOf(code, start_date, end_date) == scan(logs, code, start_date, end_date))
+    assert(index.countBetween(LOG_CODES.CHECKIN, start + timedelta(hours=20), start + timedelta(hours=60)) == 13)
+
+    # imported logs older than the newest ones, one at a time and all at once give the same answers
+    one_by_one, at_once = LogTimeIndex(logs), LogTimeIndex(logs)
+    for log in late:
+        one_by_one.add(log)
+    at_once.extend(late)
+    added = logs + late
+    for start_date, end_date in windows:
+        for code in codes:
+            expected = scan(added, code, start_date, end_date)
+            assert(one_by_one.datesOf(code, start_date, end_date) == expected and at_once.datesOf(code, start_date, end_date) == expected)
+            assert(at_once.countBetween(code, start_date, end_date) == len(expected))
+    assert(len(at_once) == 241)
+
+    # more late logs after a query are merged in with the ones already sorted
+    more = [Log(date=start + timedelta(hours=(i * 53) % 200, minutes=15), logCode=LOG_CODES.LOST, empId="emp3", equipId="equip3", notes=[]) for i in range(30)]
+    at_once.extend(more)
+    added += more
+    for start_date, end_date in windows:
+        assert(at_once.datesOf(LOG_CODES.LOST, start_date, end_date) == scan(added, LOG_CODES.LOST, start_date, end_date))
+        assert(at_once.countBetween(LOG_CODES.LOST, start_date, end_date) == len(scan(added, LOG_CODES.LOST, start_date, end_date)))
+    print("- LogTimeIndex passed tests")
+
+
 # --------------------------------------- everything after this point is temporary / for testing ---------------------------------------------------
 def generate_random_stuff_and_add_to_pipeline(pipeline: Pipeline):
     # generate 'random' logs (9 Lost Logs, 10 Checkin Logs, 11 Chekout Logs)
@@ -198,6 +976,32 @@ def do_tests():
     test_getMissingSkills()
     persistent_data_test()
     test_pipeline()
+    test_idRegistry()
+    test_availabilityIndex()
+    test_skillIndex()
+    test_keyTable()
+    test_appendLogs()
+    test_changeTracking()
+    test_sqliteStorage()
+    test_mysqlRepository()
+    test_logStreaming()
+    test_logDates()
+    test_columnarLogs()
+    test_atomicSave()
+    test_backgroundSaver()
+    test_autosaveSchedule()
+    test_lazyList()
+    test_snapshotCache()
+    test_parallelLoading()
+    test_partitionedLogs()
+    test_logRollups()
+    test_compactEntities()
+    test_skillBitmasks()
+    test_reservationQueue()
+    test_fusedFilters()
+    test_logArrays()
+    test_logAggregates()
+    test_logTimeIndex()
     # call the functions here
 
 